@@ -0,0 +1,211 @@
+"""
+Offline benchmarks against the local mock exchange
+
+    python benchmarks/bench.py all --json results.json
+    python benchmarks/bench.py all --compare results.json --tolerance 0.2
+
+`rest` measures requests/sec and p50/p99 latency of signed `create_order`
+and public calls under concurrency, `ws` measures messages/sec received,
+decoded and dispatched over a real websocket, and `dispatch` measures the
+decode and dispatch path alone on pre-built frames. With `--compare` the run
+exits non-zero when a throughput drops (or a latency grows) by more than
+`--tolerance` against a saved result.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import base58
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.rest import AsyncClient
+from orderly_sdk.ws import OrderlyPublicWsManager
+
+ACCOUNT_ID = "0xbench"
+SYMBOL = "PERP_ETH_USDC"
+
+
+def make_keys():
+    private_key = Ed25519PrivateKey.generate()
+    secret = private_key.private_bytes(
+        serialization.Encoding.Raw,
+        serialization.PrivateFormat.Raw,
+        serialization.NoEncryption(),
+    )
+    public = private_key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+    )
+    return base58.b58encode(public).decode(), base58.b58encode(secret).decode()
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def bench_rest(args) -> Dict[str, float]:
+    key, secret = make_keys()
+    results = {}
+    async with MockExchange(latency=args.latency, feed_rate=0) as exchange:
+        client = AsyncClient(
+            account_id=ACCOUNT_ID,
+            orderly_key=key,
+            orderly_secret=secret,
+            endpoint=exchange.rest_endpoint,
+            loop=asyncio.get_running_loop(),
+            pool_size=args.concurrency,
+        )
+        await client.warm_up(min(args.concurrency, 10))
+        template = client.order_template(symbol=SYMBOL, order_type="LIMIT", side="BUY")
+        calls = {
+            "create_order": lambda i: client.create_order(
+                {
+                    "symbol": SYMBOL,
+                    "order_type": "LIMIT",
+                    "side": "BUY",
+                    "order_price": 2000.5,
+                    "order_quantity": 0.01,
+                    "client_order_id": f"b{i}",
+                }
+            ),
+            "create_order_template": lambda i: client.create_order(
+                template.render(2000.5, 0.01, f"t{i}")
+            ),
+            "public_futures": lambda i: client.get_futures_for_one_market(SYMBOL),
+        }
+        for name, call in calls.items():
+            latencies: List[float] = []
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def timed(i, call=call, semaphore=semaphore, latencies=latencies):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await call(i)
+                    latencies.append(time.perf_counter() - started)
+                    assert response.get("success"), response
+
+            started = time.perf_counter()
+            await asyncio.gather(*(timed(i) for i in range(args.requests)))
+            elapsed = time.perf_counter() - started
+            results[f"rest.{name}.rps"] = args.requests / elapsed
+            results[f"rest.{name}.p50_ms"] = percentile(latencies, 0.5) * 1000
+            results[f"rest.{name}.p99_ms"] = percentile(latencies, 0.99) * 1000
+        await client.close_connection()
+    return results
+
+
+async def bench_ws(args) -> Dict[str, float]:
+    topics = [f"{SYMBOL}@trade", f"{SYMBOL}@bbo", f"{SYMBOL}@orderbookupdate"]
+    async with MockExchange(feed_rate=args.rate) as exchange:
+        ws = OrderlyPublicWsManager(
+            account_id=ACCOUNT_ID,
+            endpoint=exchange.ws_public_endpoint,
+            loop=asyncio.get_running_loop(),
+        )
+        counter = {"n": 0}
+
+        def on_message(data, ts):
+            counter["n"] += 1
+
+        for topic in topics:
+            ws.add_listener(topic, on_message)
+        ws.start()
+        while counter["n"] == 0:
+            await asyncio.sleep(0.01)
+        start_count = counter["n"]
+        started = time.perf_counter()
+        await asyncio.sleep(args.seconds)
+        elapsed = time.perf_counter() - started
+    return {"ws.msgs_per_sec": (counter["n"] - start_count) / elapsed}
+
+
+async def bench_dispatch(args) -> Dict[str, float]:
+    exchange = MockExchange(feed_rate=0)
+    books: Dict = {}
+    topics = [f"{SYMBOL}@trade", f"{SYMBOL}@bbo", f"{SYMBOL}@orderbookupdate"]
+    frames = []
+    ts = int(time.time() * 1000)
+    for i in range(args.messages):
+        message = exchange._message(topics[i % len(topics)], books, ts + i)
+        frames.append(json.dumps(message).encode())
+    results = {}
+    for typed in (False, True):
+        ws = OrderlyPublicWsManager(
+            account_id=ACCOUNT_ID, loop=asyncio.get_running_loop(), typed=typed
+        )
+        for topic in topics:
+            ws.add_listener(topic, lambda data, ts: None)
+            # queued messages are the ones converted to models when typed
+            ws.subscribe(topic, maxsize=1000, policy="drop_oldest")
+        runs = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for frame in frames:
+                await ws._dispatch(frame)
+            runs.append(time.perf_counter() - started)
+            for queue in ws.queues.values():
+                while not queue.empty():
+                    queue.get_nowait()
+        name = "typed" if typed else "dict"
+        results[f"dispatch.{name}.msgs_per_sec"] = len(frames) / statistics.median(runs)
+    return results
+
+
+BENCHMARKS = {"rest": bench_rest, "ws": bench_ws, "dispatch": bench_dispatch}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float):
+    failed = False
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        # latencies should not grow, throughputs should not drop
+        change = (value - base) / base
+        worse = change > tolerance if name.endswith("_ms") else change < -tolerance
+        failed |= worse
+        flag = "REGRESSION" if worse else "ok"
+        print(f"{name:45} {base:12.2f} -> {value:12.2f} {change:+7.1%} {flag}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("benchmark", choices=[*BENCHMARKS, "all"])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=20000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    results: Dict[str, float] = {}
+    for name in names:
+        results.update(asyncio.run(BENCHMARKS[name](args)))
+    for name, value in results.items():
+        print(f"{name:45} {value:12.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
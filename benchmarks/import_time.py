@@ -0,0 +1,96 @@
+"""
+Cold import time of the SDK modules
+
+    python benchmarks/import_time.py --json imports.json
+    python benchmarks/import_time.py --compare imports.json --tolerance 0.3
+
+Every module is imported in a fresh interpreter with `-X importtime`; the
+best of `--repeat` runs is reported. The run fails when a module pulls in a
+heavy dependency it should only load lazily, or with `--compare` when an
+import got slower than the saved result by more than `--tolerance`.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set
+
+# module -> dependencies it must not import eagerly
+MODULES: Dict[str, List[str]] = {
+    "orderly_sdk": ["aiohttp", "websockets", "cryptography", "loguru"],
+    "orderly_sdk.ws": ["aiohttp", "cryptography", "base58"],
+    "orderly_sdk.orderbook": ["aiohttp", "cryptography"],
+    "orderly_sdk.rest": ["cryptography", "base58", "websockets"],
+    "orderly_sdk.account": ["aiohttp", "websockets", "cryptography"],
+    "orderly_sdk.columnar": ["aiohttp", "websockets", "numpy", "pyarrow"],
+}
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def import_profile(module: str) -> Dict[str, int]:
+    """
+    Cumulative import time in microseconds of every module loaded
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": SRC + os.pathsep + os.environ.get("PYTHONPATH", ""),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    failed = False
+    for module, forbidden in MODULES.items():
+        best = None
+        loaded: Set[str] = set()
+        for _ in range(args.repeat):
+            profile = import_profile(module)
+            loaded = set(profile)
+            total = profile[module] / 1000
+            best = total if best is None else min(best, total)
+        results[module] = best
+        eager = sorted(d for d in forbidden if d in loaded)
+        failed |= bool(eager)
+        note = f"  imports {', '.join(eager)} eagerly" if eager else ""
+        print(f"{module:25} {best:8.1f} ms{note}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for module, value in results.items():
+            base = baseline.get(module)
+            if base and (value - base) / base > args.tolerance:
+                failed = True
+                print(f"{module:25} {base:8.1f} -> {value:8.1f} ms REGRESSION")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+# requires the private extra: pip install "orderly-sdk[private]"
 from asyncio import run
 
 from configs import *
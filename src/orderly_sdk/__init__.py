@@ -0,0 +1,49 @@
+"""
+Orderly.Network async Python SDK
+
+The public classes are imported lazily on first attribute access, so
+`import orderly_sdk` stays cheap and only the modules actually used (and
+their aiohttp, websockets or cryptography dependencies) are loaded.
+"""
+
+from typing import Any, List
+
+# attribute -> submodule defining it
+_LAZY = {
+    "AsyncClient": "rest",
+    "OrderlyPublicWsManager": "ws",
+    "OrderlyPrivateWsManager": "ws",
+    "WsTopicManager": "ws",
+    "ShardedPublicWsManager": "sharded",
+    "OrderBookManager": "orderbook",
+    "TradeAggregator": "candles",
+    "AccountState": "account",
+    "AccountPool": "pool",
+    "PrivateWsSupervisor": "pool",
+    "RateLimiter": "ratelimit",
+    "ResponseCache": "cache",
+    "OrderTemplate": "templates",
+    "LoopRunner": "runner",
+    "RingBuffer": "runner",
+    "Signer": "signing",
+    "Metrics": "metrics",
+    "OrderlyAPIException": "exceptions",
+    "OrderlyRequestException": "exceptions",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,259 @@
+"""
+Local account state kept in sync from the private websocket streams
+
+`AccountState` seeds positions, holdings, open orders and account info over
+REST once, then applies `position`, `balance` and `executionreport` updates as
+they arrive. A periodic REST reconciliation (and one after every reconnect)
+refreshes all of them and corrects any drift, so pre-trade checks are
+in-process lookups. Entries updated over the websocket while a reconciliation
+is in flight are newer than its REST snapshot and are kept.
+"""
+
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .exceptions import OrderlyAPIException
+from .log import logger
+
+if TYPE_CHECKING:
+    from .rest import AsyncClient
+    from .ws import WsTopicManager
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+_snake_cache: Dict[str, str] = {}
+
+OPEN_ORDER_STATUSES = ("NEW", "PARTIAL_FILLED", "REPLACED")
+
+
+def snake_case(key: str) -> str:
+    """
+    Convert a websocket camelCase key to the REST snake_case spelling
+    """
+    name = _snake_cache.get(key)
+    if name is None:
+        name = _snake_cache[key] = _CAMEL.sub("_", key).lower()
+    return name
+
+
+def _normalize(data: Dict) -> Dict:
+    return {snake_case(k): v for k, v in data.items()}
+
+
+def _data(response: Dict) -> Dict:
+    """
+    Payload of a successful REST response; a failed one must not be mistaken
+    for an empty account
+    """
+    if not response.get("success"):
+        raise OrderlyAPIException(response, None)
+    return response.get("data") or {}
+
+
+class AccountState:
+    """
+    In-memory positions, holdings, open orders and account info
+    """
+
+    def __init__(
+        self,
+        client: "AsyncClient",
+        ws: "WsTopicManager",
+        reconcile_interval: Optional[float] = 60,
+    ):
+        """
+        `ws` should be an `OrderlyPrivateWsManager` for the same account as
+        `client`. Set `reconcile_interval` to None to disable periodic REST
+        reconciliation.
+        """
+        self.client = client
+        self.ws = ws
+        self.reconcile_interval = reconcile_interval
+        self.positions: Dict[str, Dict] = {}
+        self.holdings: Dict[str, Dict] = {}
+        self.open_orders: Dict[int, Dict] = {}
+        self.info: Dict = {}
+        self.updated_at = 0.0
+        self.drift_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._resync: Optional[asyncio.Future] = None
+        # kind -> key -> monotonic time of the last websocket update
+        self._ws_updated: Dict[str, Dict[Any, float]] = {
+            "positions": {},
+            "holdings": {},
+            "open_orders": {},
+        }
+        ws.add_listener("position", self._on_position)
+        ws.add_listener("balance", self._on_balance)
+        ws.add_listener("executionreport", self._on_execution_report)
+        ws.add_connection_listener(self._on_connection_event)
+
+    async def start(self):
+        """
+        Seed the state over REST and start periodic reconciliation
+        """
+        await self.reconcile()
+        if self.reconcile_interval and self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        """
+        Stop periodic reconciliation
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._resync is not None:
+            self._resync.cancel()
+            self._resync = None
+
+    def position(self, symbol: str) -> Optional[Dict]:
+        """
+        Position of a symbol in REST (snake_case) spelling
+        """
+        return self.positions.get(symbol)
+
+    def position_qty(self, symbol: str) -> float:
+        """
+        Signed position quantity of a symbol
+        """
+        position = self.positions.get(symbol)
+        return (position.get("position_qty") or 0.0) if position else 0.0
+
+    def holding(self, token: str) -> float:
+        """
+        Holding of a token
+        """
+        holding = self.holdings.get(token)
+        return (holding.get("holding") or 0.0) if holding else 0.0
+
+    def orders(self, symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Open orders, optionally for one symbol
+        """
+        if symbol is None:
+            return list(self.open_orders.values())
+        return [o for o in self.open_orders.values() if o.get("symbol") == symbol]
+
+    def _on_position(self, data: Dict, ts: int):
+        now = time.monotonic()
+        updated = self._ws_updated["positions"]
+        for position in data.get("positions") or ():
+            position = _normalize(position)
+            self.positions[position["symbol"]] = position
+            updated[position["symbol"]] = now
+        self.updated_at = time.time()
+
+    def _on_balance(self, data: Dict, ts: int):
+        now = time.monotonic()
+        updated = self._ws_updated["holdings"]
+        for token, balance in (data.get("balances") or {}).items():
+            balance = _normalize(balance)
+            balance["token"] = token
+            self.holdings[token] = balance
+            updated[token] = now
+        self.updated_at = time.time()
+
+    def _on_execution_report(self, data: Dict, ts: int):
+        order = _normalize(data)
+        order_id = order.get("order_id")
+        if order.get("status") in OPEN_ORDER_STATUSES:
+            self.open_orders[order_id] = order
+        else:
+            self.open_orders.pop(order_id, None)
+        self._ws_updated["open_orders"][order_id] = time.monotonic()
+        self.updated_at = time.time()
+
+    def _on_connection_event(self, event: str, info: Dict):
+        if event != "reconnected":
+            return
+        if self._resync is not None:
+            self._resync.cancel()
+        self._resync = asyncio.ensure_future(self.reconcile(), loop=self.ws.loop)
+        self._resync.add_done_callback(self._on_resync_done)
+
+    def _on_resync_done(self, task: asyncio.Future):
+        if task is self._resync:
+            self._resync = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error(
+                "account reconciliation after reconnect failed"
+            )
+
+    async def _fetch_open_orders(self) -> Dict[int, Dict]:
+        open_orders = {}
+        async for order in self.client.iter_orders({"status": "INCOMPLETE"}):
+            open_orders[order["order_id"]] = order
+        return open_orders
+
+    def _merge(self, kind: str, fresh: Dict, started: float) -> Dict:
+        """
+        REST snapshot `fresh` with the entries updated over the websocket
+        since `started` taken from the current state
+        """
+        current = getattr(self, kind)
+        updated = self._ws_updated[kind]
+        merged = dict(fresh)
+        for key, at in list(updated.items()):
+            if at < started:
+                # superseded by the snapshot
+                del updated[key]
+            elif key in current:
+                merged[key] = current[key]
+            else:
+                merged.pop(key, None)
+        return merged
+
+    @staticmethod
+    def _drifted(old: Dict[str, Dict], new: Dict[str, Dict], field: str) -> bool:
+        keys = set(old) | set(new)
+        return any(
+            (old.get(k) or {}).get(field) != (new.get(k) or {}).get(field) for k in keys
+        )
+
+    async def reconcile(self):
+        """
+        Refresh positions, holdings, open orders and account info over REST,
+        counting any drift
+
+        Raises `OrderlyAPIException` and keeps the current state when any of
+        the responses is not successful.
+        """
+        started = time.monotonic()
+        positions, holdings, open_orders, info = await asyncio.gather(
+            self.client.get_all_positions(),
+            self.client.get_current_holding(),
+            self._fetch_open_orders(),
+            self.client.get_account_info(),
+        )
+        positions = _data(positions).get("rows") or ()
+        holdings = _data(holdings).get("holding") or ()
+        info = _data(info)
+        new_positions = self._merge(
+            "positions", {p["symbol"]: p for p in positions}, started
+        )
+        new_holdings = self._merge(
+            "holdings", {h["token"]: h for h in holdings}, started
+        )
+        new_orders = self._merge("open_orders", open_orders, started)
+        if self.updated_at and (
+            self._drifted(self.positions, new_positions, "position_qty")
+            or self._drifted(self.holdings, new_holdings, "holding")
+            or set(self.open_orders) != set(new_orders)
+        ):
+            self.drift_count += 1
+            logger.warning("account state drifted from REST, resynced")
+        self.positions = new_positions
+        self.holdings = new_holdings
+        self.open_orders = new_orders
+        self.info = info or self.info
+        self.updated_at = time.time()
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.exception(e)
@@ -0,0 +1,153 @@
+"""
+Response cache for slowly changing public REST endpoints
+
+Entries expire after a per-endpoint TTL and the least recently used entries
+are evicted beyond `maxsize`. Concurrent callers of the same key share one
+in-flight request, and expired entries carrying an ETag are revalidated with
+`If-None-Match` instead of being downloaded again.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+# (endpoint prefix, ttl in seconds), first match wins; unmatched endpoints
+# are not cached
+DEFAULT_TTLS: List[Tuple[str, float]] = [
+    ("public/info", 300),
+    ("public/futures", 5),
+    ("public/insurancefund", 60),
+    ("public/system_info", 10),
+]
+
+# fetch(etag) -> (response or None when not modified, etag, cacheable)
+Fetch = Callable[[Optional[str]], Awaitable[Tuple[Any, Optional[str], bool]]]
+
+
+class _Entry:
+    __slots__ = ("value", "etag", "expires")
+
+    def __init__(self, value: Any, etag: Optional[str], expires: float):
+        self.value = value
+        self.etag = etag
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    TTL and LRU bounded cache with request coalescing
+
+    Cached responses are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[List[Tuple[str, float]]] = None,
+        maxsize: int = 256,
+    ):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.revalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, ep: str) -> Optional[float]:
+        """
+        TTL of an endpoint, or None if it is not cached
+        """
+        for prefix, ttl in self.ttls:
+            if ep.startswith(prefix):
+                return ttl
+        return None
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Fresh cached response of a key, or None
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires <= time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _store(self, key: Hashable, value: Any, etag: Optional[str], ttl: float):
+        self._entries[key] = _Entry(value, etag, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, ttl: float, fetch: Fetch) -> Any:
+        """
+        Return the cached response of `key`, calling `fetch` at most once
+        for all concurrent callers when it is missing or expired
+
+        Waiting callers share the outcome of the fetch, except a cancellation
+        of the caller running it: the next waiter then fetches instead.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # the caller that was fetching got cancelled, not this one
+            return await self.get_or_fetch(key, ttl, fetch)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, etag, cacheable = await fetch(entry.etag if entry else None)
+            if value is None and entry is not None:
+                # 304 Not Modified
+                self.revalidated += 1
+                value = entry.value
+                etag = etag or entry.etag
+            if cacheable:
+                self._store(key, value, etag, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def invalidate(self, prefix: str = ""):
+        """
+        Drop cached responses whose endpoint starts with `prefix`
+
+        Keys are `(endpoint, params)` tuples as built by `AsyncClient`.
+        """
+        for key in [k for k in self._entries if str(k[0]).startswith(prefix)]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Size and hit/miss/coalesced/revalidated counters
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+        }
@@ -0,0 +1,600 @@
+"""
+Incremental candles and rolling trade statistics built from `<symbol>@trade`
+
+`TradeAggregator` listens to the trade topic of a websocket manager and keeps,
+per symbol, OHLCV candles at several resolutions and rolling VWAP, volume,
+trade count and realized volatility windows. Every trade is O(1): candles
+update the current bucket in place and each window adds the trade to running
+sums and evicts what fell out of it. Candles and trades live in fixed-capacity
+ring buffers of `array` columns, so memory stays bounded. `seed()` fills both
+once from REST klines and recent market trades; live trades arriving meanwhile
+are buffered and applied afterwards. The usual order is `track()`, `seed()`,
+then starting the websocket manager.
+"""
+
+import asyncio
+import math
+from array import array
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .log import logger
+from .ws import WsTopicManager
+
+_UNITS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+DEFAULT_RESOLUTIONS = ("1s", "1m", "5m", "15m", "1h", "4h", "1d")
+DEFAULT_WINDOWS = ("1m", "5m", "1h")
+# resolutions served by the kline endpoint
+KLINE_TYPES = {"1m", "5m", "15m", "30m", "1h", "4h", "12h", "1d", "1w"}
+
+_YEAR_MS = 365 * 86_400_000
+
+
+def interval_ms(name: str) -> int:
+    """
+    Length of an interval such as "1s", "5m", "4h" or "1d" in milliseconds
+    """
+    try:
+        return int(name[:-1]) * _UNITS[name[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"invalid interval {name!r}") from None
+
+
+class Candle(NamedTuple):
+    """
+    OHLCV candle; `amount` is the quote volume and `count` the number of
+    trades (0 for candles seeded from klines)
+    """
+
+    start: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    amount: float
+    count: int
+
+
+class CandleSeries:
+    """
+    Candles of one resolution in a ring buffer of `capacity` candles
+
+    Intervals without trades have no candle.
+    """
+
+    __slots__ = (
+        "interval",
+        "capacity",
+        "n",
+        "_start",
+        "_open",
+        "_high",
+        "_low",
+        "_close",
+        "_volume",
+        "_amount",
+        "_count",
+    )
+
+    def __init__(self, interval: int, capacity: int = 1000):
+        self.interval = interval
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all candles
+        """
+        # candles ever added; slot of candle i is i % capacity
+        self.n = 0
+        self._start = array("q")
+        self._open = array("d")
+        self._high = array("d")
+        self._low = array("d")
+        self._close = array("d")
+        self._volume = array("d")
+        self._amount = array("d")
+        self._count = array("q")
+
+    def __len__(self) -> int:
+        return min(self.n, self.capacity)
+
+    def _candle(self, slot: int) -> Candle:
+        return Candle(
+            self._start[slot],
+            self._open[slot],
+            self._high[slot],
+            self._low[slot],
+            self._close[slot],
+            self._volume[slot],
+            self._amount[slot],
+            self._count[slot],
+        )
+
+    def _append(self, start, open_, high, low, close, volume, amount, count):
+        values = (start, open_, high, low, close, volume, amount, count)
+        columns = (
+            self._start,
+            self._open,
+            self._high,
+            self._low,
+            self._close,
+            self._volume,
+            self._amount,
+            self._count,
+        )
+        if self.n < self.capacity:
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            slot = self.n % self.capacity
+            for column, value in zip(columns, values):
+                column[slot] = value
+        self.n += 1
+
+    def update(self, ts: int, price: float, size: float) -> Optional[Candle]:
+        """
+        Add a trade; returns the previous candle when this trade opens a new
+        one
+        """
+        start = ts - ts % self.interval
+        if self.n:
+            slot = (self.n - 1) % self.capacity
+            current = self._start[slot]
+            if start < current:
+                self._update_late(start, price, size)
+                return None
+            if start == current:
+                if price > self._high[slot]:
+                    self._high[slot] = price
+                elif price < self._low[slot]:
+                    self._low[slot] = price
+                self._close[slot] = price
+                self._volume[slot] += size
+                self._amount[slot] += price * size
+                self._count[slot] += 1
+                return None
+            closed = self._candle(slot)
+        else:
+            closed = None
+        self._append(start, price, price, price, price, size, price * size, 1)
+        return closed
+
+    def _update_late(self, start: int, price: float, size: float):
+        # out of order trade, usually for the candle just before the current
+        capacity = self.capacity
+        for i in range(self.n - 2, max(self.n - capacity, 0) - 1, -1):
+            slot = i % capacity
+            candle_start = self._start[slot]
+            if candle_start > start:
+                continue
+            if candle_start == start:
+                self._high[slot] = max(self._high[slot], price)
+                self._low[slot] = min(self._low[slot], price)
+                self._volume[slot] += size
+                self._amount[slot] += price * size
+                self._count[slot] += 1
+            return
+
+    def load(self, candles: Iterable[Candle]):
+        """
+        Replace the series with candles in ascending start order
+        """
+        self.clear()
+        for candle in candles:
+            self._append(*candle)
+
+    @property
+    def current(self) -> Optional[Candle]:
+        """
+        The latest, still open candle
+        """
+        return self._candle((self.n - 1) % self.capacity) if self.n else None
+
+    def last(self, n: Optional[int] = None) -> List[Candle]:
+        """
+        Up to `n` latest candles (all buffered if None), oldest first
+        """
+        size = len(self)
+        n = size if n is None else min(n, size)
+        capacity = self.capacity
+        return [self._candle(i % capacity) for i in range(self.n - n, self.n)]
+
+
+class _Window:
+    __slots__ = ("length", "start", "pv", "volume", "r2", "evicted")
+
+    def __init__(self, length: int, start: int):
+        self.length = length
+        # sequence number of the oldest trade in the window
+        self.start = start
+        self.pv = 0.0
+        self.volume = 0.0
+        self.r2 = 0.0
+        self.evicted = 0
+
+
+class RollingStats:
+    """
+    Rolling VWAP, volume, trade count and realized volatility over several
+    time windows
+
+    All windows share one ring buffer of the last `capacity` trades, growing
+    up to that size; each keeps its own oldest trade and running sums. If a
+    window holds more than `capacity` trades it is truncated to the newest
+    ones. Windows are measured back from the latest trade time unless a query
+    passes `now_ms`.
+    """
+
+    def __init__(self, windows: Sequence[str] = DEFAULT_WINDOWS, capacity: int = 16384):
+        self.capacity = capacity
+        self.windows: Dict[str, _Window] = {
+            name: _Window(interval_ms(name), 0) for name in windows
+        }
+        self.clear()
+
+    def clear(self):
+        """
+        Remove all trades
+        """
+        self.windows = {n: _Window(w.length, 0) for n, w in self.windows.items()}
+        # trades ever added; slot of trade i is i % capacity
+        self.n = 0
+        self._ts = array("q")
+        self._price = array("d")
+        self._size = array("d")
+        # squared log return against the previous trade
+        self._r2 = array("d")
+        self.last_price = 0.0
+        self.last_ts = 0
+
+    def _evict(self, window: _Window):
+        slot = window.start % self.capacity
+        price = self._price[slot]
+        size = self._size[slot]
+        window.pv -= price * size
+        window.volume -= size
+        window.r2 -= self._r2[slot]
+        window.start += 1
+        window.evicted += 1
+        if window.start == self.n:
+            window.pv = window.volume = window.r2 = 0.0
+            window.evicted = 0
+        elif window.evicted >= self.capacity:
+            # bound the drift of the running sums
+            self._recompute(window)
+
+    def _recompute(self, window: _Window):
+        window.pv = window.volume = window.r2 = 0.0
+        window.evicted = 0
+        capacity = self.capacity
+        for i in range(window.start, self.n):
+            slot = i % capacity
+            window.pv += self._price[slot] * self._size[slot]
+            window.volume += self._size[slot]
+            window.r2 += self._r2[slot]
+
+    def _expire(self, window: _Window, now_ms: int):
+        cutoff = now_ms - window.length
+        ts = self._ts
+        capacity = self.capacity
+        while window.start < self.n and ts[window.start % capacity] <= cutoff:
+            self._evict(window)
+
+    def add(self, ts: int, price: float, size: float):
+        """
+        Add a trade
+        """
+        last = self.last_price
+        r2 = math.log(price / last) ** 2 if last > 0 and price > 0 else 0.0
+        n = self.n
+        capacity = self.capacity
+        if n < capacity:
+            self._ts.append(ts)
+            self._price.append(price)
+            self._size.append(size)
+            self._r2.append(r2)
+        else:
+            oldest = n - capacity
+            for window in self.windows.values():
+                if window.start == oldest:
+                    self._evict(window)
+            slot = n % capacity
+            self._ts[slot] = ts
+            self._price[slot] = price
+            self._size[slot] = size
+            self._r2[slot] = r2
+        self.n = n + 1
+        self.last_price = price
+        if ts > self.last_ts:
+            self.last_ts = ts
+        pv = price * size
+        for window in self.windows.values():
+            window.pv += pv
+            window.volume += size
+            window.r2 += r2
+            self._expire(window, self.last_ts)
+
+    def _window(self, name: str, now_ms: Optional[int]) -> _Window:
+        window = self.windows[name]
+        if now_ms is not None:
+            self._expire(window, now_ms)
+        return window
+
+    def trade_count(self, window: str, now_ms: Optional[int] = None) -> int:
+        """
+        Number of trades in the window
+        """
+        return self.n - self._window(window, now_ms).start
+
+    def volume(self, window: str, now_ms: Optional[int] = None) -> float:
+        """
+        Traded base volume in the window
+        """
+        return self._window(window, now_ms).volume
+
+    def vwap(self, window: str, now_ms: Optional[int] = None) -> Optional[float]:
+        """
+        Volume weighted average price in the window, None without trades
+        """
+        w = self._window(window, now_ms)
+        return w.pv / w.volume if w.volume > 0 else None
+
+    def realized_variance(self, window: str, now_ms: Optional[int] = None) -> float:
+        """
+        Sum of squared trade to trade log returns in the window
+        """
+        return max(self._window(window, now_ms).r2, 0.0)
+
+    def volatility(
+        self, window: str, annualize: bool = False, now_ms: Optional[int] = None
+    ) -> float:
+        """
+        Realized volatility in the window, optionally scaled to a year
+        """
+        variance = self.realized_variance(window, now_ms)
+        if annualize:
+            variance *= _YEAR_MS / self.windows[window].length
+        return math.sqrt(variance)
+
+    def stats(self, window: str, now_ms: Optional[int] = None) -> Dict:
+        """
+        All statistics of a window
+        """
+        return {
+            "count": self.trade_count(window, now_ms),
+            "volume": self.volume(window),
+            "vwap": self.vwap(window),
+            "volatility": self.volatility(window),
+        }
+
+
+class SymbolAggregate:
+    """
+    Candles and rolling statistics of one symbol
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        resolutions: Sequence[str],
+        windows: Sequence[str],
+        candle_capacity: int,
+        trade_capacity: int,
+    ):
+        self.symbol = symbol
+        self.candles: Dict[str, CandleSeries] = {
+            name: CandleSeries(interval_ms(name), candle_capacity)
+            for name in resolutions
+        }
+        self.rolling = RollingStats(windows, trade_capacity)
+        self.seeded = False
+        # live trades received while seeding
+        self.pending: Optional[List[tuple]] = None
+
+    def clear(self):
+        """
+        Remove all candles and trades
+        """
+        for series in self.candles.values():
+            series.clear()
+        self.rolling.clear()
+        self.seeded = False
+
+    @property
+    def last_price(self) -> float:
+        return self.rolling.last_price
+
+    def __getitem__(self, resolution: str) -> CandleSeries:
+        return self.candles[resolution]
+
+
+class TradeAggregator:
+    """
+    Keeps candles and rolling statistics in sync from public trade streams
+    """
+
+    max_pending: int = 10000
+
+    def __init__(
+        self,
+        ws: WsTopicManager,
+        resolutions: Sequence[str] = DEFAULT_RESOLUTIONS,
+        windows: Sequence[str] = DEFAULT_WINDOWS,
+        candle_capacity: int = 1000,
+        trade_capacity: int = 16384,
+        on_candle: Optional[Callable[[str, str, Candle], None]] = None,
+    ):
+        """
+        `resolutions` and `windows` are intervals like "1s", "5m" or "1d".
+        Each resolution keeps `candle_capacity` candles and the windows of a
+        symbol share a buffer of `trade_capacity` trades.
+
+        `on_candle(symbol, resolution, candle)` is called with every candle
+        that closed, i.e. when the first trade of the next interval arrives.
+        """
+        for name in (*resolutions, *windows):
+            interval_ms(name)
+        self.ws = ws
+        self.resolutions = tuple(resolutions)
+        self.windows = tuple(windows)
+        self.candle_capacity = candle_capacity
+        self.trade_capacity = trade_capacity
+        self.on_candle = on_candle
+        self.symbols: Dict[str, SymbolAggregate] = {}
+
+    def track(self, symbol: str) -> SymbolAggregate:
+        """
+        Start aggregating the trades of a symbol
+        """
+        aggregate = self.symbols.get(symbol)
+        if aggregate is None:
+            aggregate = self.symbols[symbol] = SymbolAggregate(
+                symbol,
+                self.resolutions,
+                self.windows,
+                self.candle_capacity,
+                self.trade_capacity,
+            )
+            self.ws.add_listener(
+                symbol + "@trade",
+                lambda data, ts: self._on_trade(aggregate, data, ts),
+            )
+        return aggregate
+
+    def get(self, symbol: str) -> Optional[SymbolAggregate]:
+        """
+        Get the aggregate of a tracked symbol
+        """
+        return self.symbols.get(symbol)
+
+    def __getitem__(self, symbol: str) -> SymbolAggregate:
+        return self.symbols[symbol]
+
+    def _on_trade(self, aggregate: SymbolAggregate, data: Dict, ts: int):
+        price = float(data["price"])
+        size = float(data["size"])
+        pending = aggregate.pending
+        if pending is not None:
+            pending.append((ts, price, size))
+            if len(pending) > self.max_pending:
+                del pending[0]
+            return
+        self._apply(aggregate, ts, price, size)
+
+    def _apply(self, aggregate: SymbolAggregate, ts: int, price: float, size: float):
+        aggregate.rolling.add(ts, price, size)
+        on_candle = self.on_candle
+        for name, series in aggregate.candles.items():
+            closed = series.update(ts, price, size)
+            if closed is not None and on_candle is not None:
+                on_candle(aggregate.symbol, name, closed)
+
+    async def seed(
+        self,
+        client,
+        symbols: Optional[Iterable[str]] = None,
+        kline_limit: int = 1000,
+        trade_limit: int = 500,
+    ):
+        """
+        Fill candles and windows once from REST for `symbols` (all tracked
+        ones if None)
+
+        Resolutions served by the kline endpoint are loaded from klines (a
+        signed endpoint, so `client` needs credentials); the others and the
+        rolling windows are built from the latest `trade_limit` market
+        trades. Live trades newer than those are applied afterwards.
+
+        Call it after `track()` and before or while starting the websocket.
+        Seeding replaces what a symbol already aggregated, since history
+        cannot be inserted before live trades.
+        """
+        symbols = list(self.symbols if symbols is None else symbols)
+        for symbol in symbols:
+            aggregate = self.track(symbol)
+            aggregate.clear()
+            aggregate.pending = []
+        await asyncio.gather(
+            *(
+                self._seed_symbol(client, self.symbols[s], kline_limit, trade_limit)
+                for s in symbols
+            )
+        )
+
+    async def _seed_symbol(
+        self, client, aggregate: SymbolAggregate, kline_limit: int, trade_limit: int
+    ):
+        symbol = aggregate.symbol
+        klines = [n for n in aggregate.candles if n in KLINE_TYPES]
+        last_ts = 0
+        try:
+            responses = await asyncio.gather(
+                client.get_market_trades(symbol, trade_limit),
+                *(client.get_kline(symbol, n, kline_limit) for n in klines),
+                return_exceptions=True,
+            )
+            trades = self._rows(symbol, "market trades", responses[0])
+            seeded = set()
+            for name, response in zip(klines, responses[1:]):
+                rows = self._rows(symbol, f"{name} klines", response)
+                if rows:
+                    aggregate.candles[name].load(_kline_candles(rows))
+                    seeded.add(name)
+            trades.sort(key=lambda t: t["executed_timestamp"])
+            for trade in trades:
+                ts = int(trade["executed_timestamp"])
+                price = float(trade["executed_price"])
+                size = float(trade["executed_quantity"])
+                aggregate.rolling.add(ts, price, size)
+                for name, series in aggregate.candles.items():
+                    if name not in seeded:
+                        series.update(ts, price, size)
+                last_ts = ts
+            aggregate.seeded = True
+        finally:
+            pending = aggregate.pending or []
+            aggregate.pending = None
+            for ts, price, size in pending:
+                if ts > last_ts:
+                    self._apply(aggregate, ts, price, size)
+
+    @staticmethod
+    def _rows(symbol: str, what: str, response) -> List[Dict]:
+        if isinstance(response, Exception) or not response.get("success"):
+            logger.warning("could not seed {} {}: {}", symbol, what, response)
+            return []
+        return list(response["data"]["rows"])
+
+    def candles(
+        self, symbol: str, resolution: str, n: Optional[int] = None
+    ) -> List[Candle]:
+        """
+        Up to `n` latest candles of a symbol, oldest first
+        """
+        return self.symbols[symbol].candles[resolution].last(n)
+
+    def stats(self, symbol: str, window: str, now_ms: Optional[int] = None) -> Dict:
+        """
+        Rolling count, volume, VWAP and volatility of a symbol
+        """
+        return self.symbols[symbol].rolling.stats(window, now_ms)
+
+
+def _kline_candles(rows: List[Dict]) -> List[Candle]:
+    candles = [
+        Candle(
+            int(row["start_timestamp"]),
+            float(row["open"]),
+            float(row["high"]),
+            float(row["low"]),
+            float(row["close"]),
+            float(row["volume"]),
+            float(row["amount"]),
+            0,
+        )
+        for row in rows
+    ]
+    candles.sort(key=lambda c: c.start)
+    return candles
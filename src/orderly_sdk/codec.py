@@ -0,0 +1,118 @@
+"""
+Module for JSON encoding and decoding in Orderly SDK
+
+The fastest available backend is picked at import time: orjson, then msgspec,
+then the standard library. All decoders accept ``bytes`` as well as ``str`` so
+websocket frames can be decoded without converting them to text first.
+Encoders always return compact UTF-8 ``bytes`` that can be signed and sent
+as is.
+"""
+
+import json as jsonlib
+from typing import Any, Callable, Dict, Optional, Union
+
+Decoder = Callable[[Union[bytes, str]], Any]
+Encoder = Callable[[Any], bytes]
+
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    return jsonlib.loads(data)
+
+
+def _orjson_loads() -> Optional[Decoder]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+def _msgspec_loads() -> Optional[Decoder]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    return msgspec.json.Decoder().decode
+
+
+_BACKENDS: Dict[str, Callable[[], Optional[Decoder]]] = {
+    "orjson": _orjson_loads,
+    "msgspec": _msgspec_loads,
+    "json": lambda: _json_loads,
+}
+
+
+def get_decoder(backend: Optional[Union[str, Decoder]] = None) -> Decoder:
+    """
+    Get a JSON decoder
+
+    `backend` may be a callable, one of "orjson", "msgspec" or "json", or None
+    to pick the fastest installed backend.
+    """
+    if callable(backend):
+        return backend
+    if backend is None:
+        for name in ("orjson", "msgspec"):
+            decoder = _BACKENDS[name]()
+            if decoder is not None:
+                return decoder
+        return _json_loads
+    if backend not in _BACKENDS:
+        raise ValueError(f"unknown json backend: {backend}")
+    decoder = _BACKENDS[backend]()
+    if decoder is None:
+        raise ImportError(f"json backend {backend} is not installed")
+    return decoder
+
+
+loads: Decoder = get_decoder()
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return jsonlib.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _orjson_dumps() -> Optional[Encoder]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.dumps
+
+
+def _msgspec_dumps() -> Optional[Encoder]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    return msgspec.json.Encoder().encode
+
+
+_ENCODERS: Dict[str, Callable[[], Optional[Encoder]]] = {
+    "orjson": _orjson_dumps,
+    "msgspec": _msgspec_dumps,
+    "json": lambda: _json_dumps,
+}
+
+
+def get_encoder(backend: Optional[Union[str, Encoder]] = None) -> Encoder:
+    """
+    Get a JSON encoder, see `get_decoder()` for `backend`
+    """
+    if callable(backend):
+        return backend
+    if backend is None:
+        for name in ("orjson", "msgspec"):
+            encoder = _ENCODERS[name]()
+            if encoder is not None:
+                return encoder
+        return _json_dumps
+    if backend not in _ENCODERS:
+        raise ValueError(f"unknown json backend: {backend}")
+    encoder = _ENCODERS[backend]()
+    if encoder is None:
+        raise ImportError(f"json backend {backend} is not installed")
+    return encoder
+
+
+dumps: Encoder = get_encoder()
@@ -0,0 +1,267 @@
+"""
+Columnar buffers for batch export of market data
+
+Rows from websocket topics or paged REST calls are appended straight into
+typed, growable column buffers, so no per-row Python objects are kept. The
+columns can be exported as NumPy arrays or an Arrow record batch; both are
+optional dependencies (`pip install orderly-sdk[columnar]`).
+"""
+
+from array import array
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from .ws import WsTopicManager
+
+FLOAT = "float"
+INT = "int"
+CATEGORY = "category"
+
+_TYPECODES = {FLOAT: "d", INT: "q", CATEGORY: "i"}
+_NUMPY_DTYPES = {FLOAT: "float64", INT: "int64", CATEGORY: "int32"}
+
+# (column name, payload key or alternative keys, kind)
+Column = Tuple[str, Union[str, Tuple[str, ...]], str]
+
+TRADE_COLUMNS: List[Column] = [
+    ("ts", ("ts", "executed_timestamp"), INT),
+    ("symbol", "symbol", CATEGORY),
+    ("side", "side", CATEGORY),
+    ("price", ("price", "executed_price"), FLOAT),
+    ("size", ("size", "executed_quantity"), FLOAT),
+]
+
+KLINE_COLUMNS: List[Column] = [
+    ("start_ts", ("start_timestamp", "startTime"), INT),
+    ("end_ts", ("end_timestamp", "endTime"), INT),
+    ("symbol", "symbol", CATEGORY),
+    ("open", "open", FLOAT),
+    ("high", "high", FLOAT),
+    ("low", "low", FLOAT),
+    ("close", "close", FLOAT),
+    ("volume", "volume", FLOAT),
+    ("amount", "amount", FLOAT),
+]
+
+ORDERBOOK_LEVEL_COLUMNS: List[Column] = [
+    ("ts", "ts", INT),
+    ("symbol", "symbol", CATEGORY),
+    ("side", "side", CATEGORY),
+    ("price", "price", FLOAT),
+    ("size", "size", FLOAT),
+]
+
+
+class _ColumnBuffer:
+    __slots__ = ("kind", "data", "length", "categories", "codes")
+
+    def __init__(self, kind: str, capacity: int):
+        typecode = _TYPECODES[kind]
+        self.kind = kind
+        # at least one slot, as appends grow the buffer by doubling it
+        capacity = max(1, capacity)
+        self.data = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self.length = 0
+        self.categories: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def append(self, value: Any):
+        if self.kind == CATEGORY:
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.categories)
+                self.categories.append(value)
+            value = code
+        elif value is None:
+            value = float("nan") if self.kind == FLOAT else 0
+        data = self.data
+        if self.length == len(data):
+            data.extend(data)
+        data[self.length] = value
+        self.length += 1
+
+    def values(self) -> array:
+        return self.data[: self.length]
+
+    def clear(self):
+        self.length = 0
+
+
+class ColumnarSink:
+    """
+    Accumulates message rows into typed column buffers
+
+    `columns` is a list of (name, key, kind) where key is the payload key, or
+    a tuple of alternative keys (e.g. websocket and REST spellings), and kind
+    is "float", "int" or "category" (dictionary encoded).
+    """
+
+    def __init__(self, columns: List[Column], capacity: int = 1024):
+        self.columns = columns
+        self._keys = [
+            (key,) if isinstance(key, str) else tuple(key) for _, key, _ in columns
+        ]
+        self._buffers = [_ColumnBuffer(kind, capacity) for _, _, kind in columns]
+
+    def __len__(self) -> int:
+        return self._buffers[0].length if self._buffers else 0
+
+    def append(self, row: Dict, ts: Optional[int] = None):
+        """
+        Append one row; `ts` fills a missing "ts" key
+
+        A value that does not fit its column raises and leaves no part of
+        the row behind.
+        """
+        get = row.get
+        length = len(self)
+        try:
+            for keys, buffer in zip(self._keys, self._buffers):
+                value = None
+                for key in keys:
+                    value = get(key)
+                    if value is not None:
+                        break
+                if value is None and keys[0] == "ts":
+                    value = ts
+                buffer.append(value)
+        except Exception:
+            self._truncate(length)
+            raise
+
+    def _truncate(self, length: int):
+        # drop a partly appended row so the columns stay aligned
+        for buffer in self._buffers:
+            buffer.length = min(buffer.length, length)
+
+    def extend(self, rows: Iterable[Dict], ts: Optional[int] = None):
+        """
+        Append many rows
+        """
+        for row in rows:
+            self.append(row, ts)
+
+    async def extend_async(self, rows: AsyncIterable[Dict]) -> int:
+        """
+        Drain an async row iterator such as `AsyncClient.iter_trades()`
+        """
+        count = 0
+        async for row in rows:
+            self.append(row)
+            count += 1
+        return count
+
+    def on_message(self, data: Any, ts: Optional[int] = None):
+        """
+        Listener for `WsTopicManager.add_listener()`
+        """
+        if isinstance(data, list):
+            self.extend(data, ts)
+        else:
+            self.append(data, ts)
+
+    def attach(self, ws: "WsTopicManager", topic: str):
+        """
+        Record every message of a websocket topic
+        """
+        ws.add_listener(topic, self.on_message)
+
+    def clear(self):
+        """
+        Drop all rows, keeping the allocated buffers
+        """
+        for buffer in self._buffers:
+            buffer.clear()
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Export the columns as NumPy arrays
+
+        Category columns are returned as object arrays of their values.
+        """
+        import numpy as np
+
+        result = {}
+        for (name, _, kind), buffer in zip(self.columns, self._buffers):
+            values = np.frombuffer(buffer.values(), dtype=_NUMPY_DTYPES[kind])
+            if kind == CATEGORY:
+                values = np.asarray(buffer.categories, dtype=object)[values]
+            result[name] = values
+        return result
+
+    def to_arrow(self):
+        """
+        Export the columns as a `pyarrow.RecordBatch`
+
+        Category columns become dictionary arrays.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for (_, _, kind), buffer in zip(self.columns, self._buffers):
+            if kind == CATEGORY:
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(buffer.values(), pa.int32()),
+                        pa.array(buffer.categories),
+                    )
+                )
+            elif kind == FLOAT:
+                arrays.append(pa.array(buffer.values(), pa.float64()))
+            else:
+                arrays.append(pa.array(buffer.values(), pa.int64()))
+        return pa.RecordBatch.from_arrays(arrays, names=[c[0] for c in self.columns])
+
+
+class OrderBookLevelSink(ColumnarSink):
+    """
+    Flattens order book snapshots and updates into one row per level
+    """
+
+    def __init__(self, capacity: int = 4096):
+        super().__init__(ORDERBOOK_LEVEL_COLUMNS, capacity)
+
+    def on_message(self, data: Any, ts: Optional[int] = None):
+        """
+        Append the levels of a message; a message with a bad level raises
+        and is dropped whole
+        """
+        ts = data.get("ts", ts)
+        symbol = data.get("symbol")
+        ts_col, symbol_col, side_col, price_col, size_col = self._buffers
+        length = len(self)
+        try:
+            for side, levels in (("BID", data.get("bids")), ("ASK", data.get("asks"))):
+                for price, size in levels or ():
+                    ts_col.append(ts)
+                    symbol_col.append(symbol)
+                    side_col.append(side)
+                    price_col.append(price)
+                    size_col.append(size)
+        except Exception:
+            self._truncate(length)
+            raise
+
+
+def trade_sink(capacity: int = 1024) -> ColumnarSink:
+    """
+    Sink for `<symbol>@trade` messages or market trades REST rows
+    """
+    return ColumnarSink(TRADE_COLUMNS, capacity)
+
+
+def kline_sink(capacity: int = 1024) -> ColumnarSink:
+    """
+    Sink for `<symbol>@kline_<type>` messages or kline REST rows
+    """
+    return ColumnarSink(KLINE_COLUMNS, capacity)
@@ -3,20 +3,52 @@ Module for helper functions in Orderly SDK
 """
 
 import asyncio
+import time
+import warnings
 
 
 def get_loop():
     """
-    check if there is an event loop in the current thread, if not create one
-    inspired by https://stackoverflow.com/questions/46727787/runtimeerror-there-is-no-current-event-loop-in-thread-in-async-apscheduler
+    The running event loop, else the loop set for the current thread, else a
+    new loop set for it
+
+    Does not rely on the deprecated implicit loop creation of
+    `asyncio.get_event_loop()`. Code that owns no loop should pass one
+    explicitly, e.g. `orderly_sdk.runner.LoopRunner().loop`.
     """
     try:
-        loop = asyncio.get_event_loop()
-        return loop
-    except RuntimeError as e:
-        if str(e).startswith("There is no current event loop in thread"):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            loop = asyncio.get_event_loop()
+        if not loop.is_closed():
             return loop
-        else:
-            raise
+    except RuntimeError:
+        pass
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+async def cancel_tasks():
+    """
+    Cancel every other task of the running loop and wait until they finish,
+    before the loop that owns them is stopped
+    """
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def timestamp_ms() -> int:
+    """
+    Current wall-clock time in milliseconds
+
+    Read from `time.time()` on every call, so signed timestamps follow NTP
+    adjustments instead of drifting from the server's clock.
+    """
+    return int(time.time() * 1000)
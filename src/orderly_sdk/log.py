@@ -1,26 +1,82 @@
 """
 Logging module
+
+Importing the SDK does not touch the loguru sinks; call `setup_logging()` (or
+`set_level()`) to install the SDK's JSON sink. Per-request and per-message
+debug output is only formatted when `debug_enabled()`, i.e. when that sink
+was installed at DEBUG level; set `verbose` to True or False to force it on
+or off, e.g. to get those messages on sinks configured outside the SDK.
 """
 
 import sys
+from typing import Any, Optional, Union
 
 from loguru import logger
 
-logger.add(
-    sys.stderr,
-    format='{{"timestamp":"{time}","level":"{level}","message":"{message}"}}',
-    level="INFO",
-)
+JSON_FORMAT = '{{"timestamp":"{time}","level":"{level}","message":"{message}"}}'
+
+# None follows the level given to setup_logging(); True/False forces the
+# per-request and per-frame debug messages on or off
+verbose: Optional[bool] = None
+
+_DEBUG = 10
+
+_handler_id: Optional[int] = None
+
+# whether the sink installed by setup_logging() accepts DEBUG records
+_debug = False
+
+
+def debug_enabled() -> bool:
+    """
+    Whether per-request and per-frame debug messages are produced
+    """
+    if verbose is not None:
+        return verbose
+    return _debug
+
+
+def _level_no(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        if level < 0:
+            raise ValueError(f"invalid log level: {level}")
+        return level
+    return logger.level(level).no
+
+
+def setup_logging(
+    level: Union[str, int] = "INFO",
+    sink: Any = sys.stderr,
+    enqueue: bool = False,
+    fmt: str = JSON_FORMAT,
+    replace: bool = True,
+) -> int:
+    """
+    Install the SDK log sink and return its loguru handler id
+
+    With `enqueue`, records are handed to a background thread that does the
+    formatting and writing, so logging never blocks order sending or frame
+    handling. `replace` removes all existing sinks first (including loguru's
+    default one); otherwise only a sink installed earlier by this function is
+    replaced. `level` is a loguru level name or severity number.
+    """
+    global _handler_id, _debug
+    # fail before any sink is removed
+    level = _level_no(level)
+    if replace:
+        logger.remove()
+    elif _handler_id is not None:
+        try:
+            logger.remove(_handler_id)
+        except ValueError:
+            pass
+    _handler_id = logger.add(sink, format=fmt, level=level, enqueue=enqueue)
+    _debug = level <= _DEBUG
+    return _handler_id
 
 
-def set_level(level):
+def set_level(level, enqueue: bool = False):
     """
     Set the log level
     """
-    global logger
-    logger.remove()
-    logger.add(
-        sys.stderr,
-        format='{{"timestamp":"{time}","level":"{level}","message":"{message}"}}',
-        level=level,
-    )
+    setup_logging(level, enqueue=enqueue)
@@ -0,0 +1,240 @@
+"""
+Latency instrumentation for the REST and websocket clients
+
+Pass a `Metrics` instance as `metrics=` to `AsyncClient` or a websocket
+manager to record stage timings into per-endpoint and per-topic histograms.
+Without it the clients skip all timing. Histograms use fixed buckets so they
+can be exported in the Prometheus text format with `to_prometheus()`, and
+every observation can be forwarded to callbacks, e.g. to record into
+OpenTelemetry instruments:
+
+    hist = meter.create_histogram("orderly_latency_seconds")
+    metrics.add_callback(lambda name, labels, value: hist.record(
+        value, {"stage": name, **labels}))
+
+REST stages: `rest_sign_seconds`, `rest_acquire_seconds` (waiting for the
+client rate limiter and a pooled or new connection, and sending the
+request), `rest_ttfb_seconds`, `rest_decode_seconds` and
+`rest_request_seconds`, labelled by method and endpoint. Websocket stages:
+`ws_latency_seconds` (exchange timestamp to receive), `ws_decode_seconds`
+and `ws_dispatch_seconds`, labelled by topic, plus the `ws_queue_depth`
+gauge.
+"""
+
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# upper bounds in seconds, from 50us to 10s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; the last bucket counts values above all bounds
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Record one value
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Upper bound of the bucket holding the `q` quantile
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Count, sum, mean and p50/p99 upper bounds
+        """
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    Registry of latency histograms and gauges
+
+    Observations from shards running on other threads are not locked; a
+    concurrent update may rarely be lost, which is acceptable for latency
+    statistics.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.callbacks: List[Callable[[str, Dict[str, str], float], None]] = []
+        # gauge name -> (label name, fn returning {label value: value})
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+    def add_callback(self, callback: Callable[[str, Dict[str, str], float], None]):
+        """
+        Call `callback(name, labels, value)` for every observation
+        """
+        self.callbacks.append(callback)
+
+    def add_gauge(self, name: str, label: str, collect: Callable[[], Dict[str, float]]):
+        """
+        Register a gauge read at export time; `collect()` returns
+        `{label value: value}`
+
+        Gauges registered under the same name, e.g. by every connection of a
+        `PrivateWsSupervisor`, are exported as one gauge summed per label
+        value.
+        """
+        self._gauges.append((name, label, collect))
+
+    def remove_gauge(self, collect: Callable[[], Dict[str, float]]):
+        """
+        Unregister the gauges read by `collect`
+        """
+        self._gauges = [g for g in self._gauges if g[2] != collect]
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """
+        Record `value` in the histogram `name` with `labels`
+        """
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = self.histograms[(name, labels)] = Histogram(self.buckets)
+        histogram.observe(value)
+        if self.callbacks:
+            label_dict = dict(labels)
+            for callback in self.callbacks:
+                callback(name, label_dict, value)
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        """
+        Current values of all registered gauges
+        """
+        return {name: values for (name, _), values in self._merged_gauges().items()}
+
+    def _merged_gauges(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        merged: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for name, label, collect in self._gauges:
+            values = merged.setdefault((name, label), {})
+            for value_label, value in collect().items():
+                values[value_label] = values.get(value_label, 0) + value
+        return merged
+
+    def collect(self) -> Dict[str, Dict[Labels, Dict[str, Any]]]:
+        """
+        Snapshot of every histogram, keyed by name and labels
+        """
+        result: Dict[str, Dict[Labels, Dict[str, Any]]] = {}
+        for (name, labels), histogram in self.histograms.items():
+            result.setdefault(name, {})[labels] = histogram.snapshot()
+        return result
+
+    def reset(self):
+        """
+        Drop all recorded histograms
+        """
+        self.histograms.clear()
+
+    def to_prometheus(self, prefix: str = "orderly_") -> str:
+        """
+        Render histograms and gauges in the Prometheus text exposition format
+        """
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = prefix + name
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            base = [f'{k}="{_escape(v)}"' for k, v in labels]
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                le = ",".join(base + [f'le="{bound}"'])
+                lines.append(f"{metric}_bucket{{{le}}} {cumulative}")
+            le = ",".join(base + ['le="+Inf"'])
+            lines.append(f"{metric}_bucket{{{le}}} {histogram.count}")
+            label_str = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{metric}_sum{label_str} {histogram.sum}")
+            lines.append(f"{metric}_count{label_str} {histogram.count}")
+        for (name, label), values in self._merged_gauges().items():
+            metric = prefix + name
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            for value_label, value in values.items():
+                lines.append(f'{metric}{{{label}="{_escape(value_label)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+async def _on_request_start(session, ctx, params):
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx["start"] = time.perf_counter()
+
+
+async def _on_request_headers_sent(session, ctx, params):
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx["sent"] = time.perf_counter()
+
+
+def trace_config() -> "aiohttp.TraceConfig":
+    """
+    aiohttp trace hooks marking when a request starts and when its headers
+    are on the wire
+    """
+    import aiohttp
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_request_headers_sent.append(_on_request_headers_sent)
+    return config
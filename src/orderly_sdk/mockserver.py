@@ -0,0 +1,815 @@
+"""
+Local stand-in for the Orderly REST and websocket APIs
+
+`MockExchange` serves the REST endpoints used by `AsyncClient` (with ed25519
+signature checks, paging, configurable latency and 429 rate limiting) and the
+public and private websocket protocols spoken by `WsTopicManager` (ping/pong,
+auth, subscribe, orderbook requests and synthetic market data at a
+configurable rate). It is meant for offline development, examples and
+benchmarks, not as a model of matching engine behaviour.
+
+    async with MockExchange(feed_rate=10000) as exchange:
+        client = AsyncClient(endpoint=exchange.rest_endpoint, ...)
+        ws = OrderlyPublicWsManager(endpoint=exchange.ws_public_endpoint, ...)
+
+Run `python -m orderly_sdk.mockserver` to serve it standalone.
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json as jsonlib
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from aiohttp import web
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+DEFAULT_SYMBOLS = ("PERP_ETH_USDC", "PERP_BTC_USDC")
+
+_BASE_PRICES = {"PERP_ETH_USDC": 2000.0, "PERP_BTC_USDC": 60000.0}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _ok(data: Any = None) -> Dict:
+    return {"success": True, "data": data, "timestamp": _now_ms()}
+
+
+def _error(code: int, message: str) -> Dict:
+    return {"success": False, "code": code, "message": message}
+
+
+class _Market:
+    """
+    Random walk price state of one symbol
+    """
+
+    __slots__ = ("symbol", "price", "tick", "ts")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.price = _BASE_PRICES.get(symbol, 100.0)
+        self.tick = self.price / 20000
+        self.ts = _now_ms()
+
+    def step(self) -> float:
+        self.price = max(self.tick, self.price + random.choice((-1, 0, 1)) * self.tick)
+        return round(self.price, 2)
+
+
+class _Book:
+    """
+    Order book of one symbol as sent on one connection
+
+    Levels sit on whole ticks around the market price, bids below and asks
+    above it, and every update removes the levels the price moved through,
+    so a client applying the updates to the snapshot never sees a crossed
+    book. `ts` follows the wall clock and only moves forward.
+    """
+
+    __slots__ = ("market", "bids", "asks", "ts")
+
+    depth = 20
+
+    def __init__(self, market: _Market):
+        self.market = market
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.ts = _now_ms()
+        self._diff(self.bids, -1)
+        self._diff(self.asks, 1)
+
+    def _diff(self, levels: Dict[float, float], side: int) -> List[List[float]]:
+        """
+        Move `levels` to the current price; returns the changed levels
+        """
+        tick = self.market.tick
+        center = round(self.market.price / tick)
+        prices = [round((center + side * (i + 1)) * tick, 6) for i in range(self.depth)]
+        wanted = set(prices)
+        changes = [[price, 0.0] for price in levels if price not in wanted]
+        for price, _ in changes:
+            del levels[price]
+        for price in prices:
+            if price not in levels or random.random() < 0.1:
+                levels[price] = round(random.uniform(0.1, 5), 3)
+                changes.append([price, levels[price]])
+        return changes
+
+    def update(self, ts: int) -> Dict:
+        """
+        Step the market and return the delta, stamped `ts` or just after
+        the previous update
+        """
+        self.market.step()
+        prev_ts = self.ts
+        self.ts = max(ts, prev_ts + 1)
+        return {
+            "symbol": self.market.symbol,
+            "prevTs": prev_ts,
+            "bids": self._diff(self.bids, -1),
+            "asks": self._diff(self.asks, 1),
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "symbol": self.market.symbol,
+            "bids": [[p, self.bids[p]] for p in sorted(self.bids, reverse=True)],
+            "asks": [[p, self.asks[p]] for p in sorted(self.asks)],
+        }
+
+
+class _Account:
+    __slots__ = ("account_id", "orders", "connections")
+
+    def __init__(self, account_id: str):
+        self.account_id = account_id
+        self.orders: Dict[int, Dict] = {}
+        # private connection -> subscribed topics
+        self.connections: Dict[ServerConnection, Set[str]] = {}
+
+
+class MockExchange:
+    """
+    In-process mock of the Orderly REST and websocket APIs
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ws_port: int = 0,
+        symbols: Sequence[str] = DEFAULT_SYMBOLS,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        rate_limit: Optional[float] = None,
+        feed_rate: float = 100.0,
+        ping_interval: float = 10.0,
+        history_rows: int = 250,
+        keys: Optional[Dict[str, str]] = None,
+        verify_signatures: bool = True,
+        max_clock_skew_ms: int = 300_000,
+    ):
+        """
+        `latency` (+ up to `latency_jitter`) seconds are added to every REST
+        response. `rate_limit` allows that many REST requests per second
+        before answering 429. `feed_rate` is the number of market data
+        messages per second sent to each public connection, spread over its
+        subscribed topics. `keys` maps accepted orderly keys (base58 public
+        keys) to account ids; by default any correctly signed key is accepted.
+        """
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.feed_rate = feed_rate
+        self.ping_interval = ping_interval
+        self.keys = keys
+        self.verify_signatures = verify_signatures
+        self.max_clock_skew_ms = max_clock_skew_ms
+        self.markets = {symbol: _Market(symbol) for symbol in symbols}
+        self.accounts: Dict[str, _Account] = {}
+        self.trades = [self._history_trade(i) for i in range(history_rows)]
+        self.requests = 0
+        self.rejected = 0
+        self._order_ids = itertools.count(1)
+        self._tokens = rate_limit or 0.0
+        self._refilled = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+        self._ws_server = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    # lifecycle
+
+    async def start(self) -> "MockExchange":
+        """
+        Start the REST and websocket servers
+        """
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_route("*", "/v1/{ep:.*}", self._handle_rest)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        self._ws_server = await serve(
+            self._handle_ws, self.host, self.ws_port, max_size=None
+        )
+        self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """
+        Stop both servers and all feed tasks
+        """
+        for task in list(self._tasks):
+            task.cancel()
+        if self._ws_server is not None:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self) -> "MockExchange":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @property
+    def rest_endpoint(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_public_endpoint(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}/ws/stream/"
+
+    @property
+    def ws_private_endpoint(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}/v2/ws/private/stream/"
+
+    def _account(self, account_id: str) -> _Account:
+        account = self.accounts.get(account_id)
+        if account is None:
+            account = self.accounts[account_id] = _Account(account_id)
+        return account
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # auth
+
+    def _verify(self, key: str, message: bytes, signature: str) -> Optional[str]:
+        """
+        Check an ed25519 signature; returns an error message or None
+        """
+        if not key.startswith("ed25519:"):
+            return "orderly key must start with ed25519:"
+        key = key[len("ed25519:") :]
+        if self.keys is not None and key not in self.keys:
+            return "orderly key is not registered"
+        if not self.verify_signatures:
+            return None
+        # the signing dependencies are optional, see the "private" extra
+        import base58
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+            Ed25519PublicKey,
+        )
+
+        try:
+            public_key = Ed25519PublicKey.from_public_bytes(base58.b58decode(key))
+            public_key.verify(base64.b64decode(signature), message)
+        except (InvalidSignature, ValueError):
+            return "signature verification failed"
+        return None
+
+    def _check_timestamp(self, ts: str) -> Optional[str]:
+        try:
+            skew = abs(_now_ms() - int(ts))
+        except ValueError:
+            return "invalid timestamp"
+        if skew > self.max_clock_skew_ms:
+            return "timestamp expired"
+        return None
+
+    def _take_token(self) -> bool:
+        if self.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    # REST
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        if self.latency or self.latency_jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.latency_jitter))
+        if not self._take_token():
+            self.rejected += 1
+            return web.json_response(_error(-1003, "too many requests"), status=429)
+        return await handler(request)
+
+    async def _authenticate(self, request: web.Request) -> Tuple[Optional[str], str]:
+        """
+        Verify a signed request; returns (account id, error message)
+        """
+        headers = request.headers
+        key = headers.get("orderly-key", "")
+        ts = headers.get("orderly-timestamp", "")
+        signature = headers.get("orderly-signature", "")
+        if not (key and ts and signature):
+            return None, "missing auth headers"
+        error = self._check_timestamp(ts)
+        if error:
+            return None, error
+        body = await request.read()
+        message = (ts + request.method + request.raw_path).encode() + body
+        error = self._verify(key, message, signature)
+        if error:
+            return None, error
+        account_id = headers.get("orderly-account-id")
+        if self.keys is not None:
+            account_id = self.keys[key[len("ed25519:") :]]
+        if not account_id:
+            return None, "missing orderly-account-id"
+        return account_id, ""
+
+    async def _handle_rest(self, request: web.Request) -> web.StreamResponse:
+        ep = request.match_info["ep"]
+        method = request.method.lower()
+        if ep.startswith("public/"):
+            return await self._handle_public(request, ep[len("public/") :])
+        account_id, error = await self._authenticate(request)
+        if account_id is None:
+            return web.json_response(_error(-1001, error), status=401)
+        account = self._account(account_id)
+        handler = getattr(
+            self, f"_{method}_{ep.replace('/', '_').replace('-', '_')}", None
+        )
+        if handler is None:
+            return web.json_response(
+                _error(-1000, f"unknown endpoint {ep}"), status=404
+            )
+        body = await request.read()
+        payload = jsonlib.loads(body) if body else None
+        return web.json_response(await handler(account, request.query, payload))
+
+    async def _handle_public(self, request: web.Request, ep: str) -> web.StreamResponse:
+        query = request.query
+        if ep == "system_info":
+            return web.json_response(_ok({"status": 0, "msg": "ok"}))
+        if ep == "info":
+            etag = '"symbols-%d"' % len(self.markets)
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            rows = [self._symbol_info(m) for m in self.markets.values()]
+            return web.json_response(_ok({"rows": rows}), headers={"ETag": etag})
+        if ep.startswith("futures/"):
+            market = self.markets.get(ep[len("futures/") :])
+            if market is None:
+                return web.json_response(_error(-1004, "unknown symbol"), status=400)
+            return web.json_response(_ok(self._futures_info(market)))
+        if ep == "insurancefund":
+            return web.json_response(_ok({"rows": [{"balance": 1_000_000.0}]}))
+        if ep == "market_trades":
+            market = self.markets.get(query.get("symbol", ""))
+            if market is None:
+                return web.json_response(_error(-1004, "unknown symbol"), status=400)
+            limit = int(query.get("limit", 10))
+            rows = [self._market_trade(market) for _ in range(limit)]
+            return web.json_response(_ok({"rows": rows}))
+        if ep in ("liquidation", "liquidated_positions"):
+            return web.json_response(_ok(self._page([], query)))
+        return web.json_response(_error(-1000, f"unknown endpoint {ep}"), status=404)
+
+    @staticmethod
+    def _page(rows: List[Dict], query) -> Dict:
+        page = int(query.get("page", 1))
+        size = int(query.get("size", 25))
+        start = (page - 1) * size
+        return {
+            "meta": {
+                "total": len(rows),
+                "records_per_page": size,
+                "current_page": page,
+            },
+            "rows": rows[start : start + size],
+        }
+
+    # signed endpoints, named _<method>_<endpoint>
+
+    async def _post_order(self, account: _Account, query, payload: Dict) -> Dict:
+        order = self._create_order(account, payload)
+        return _ok(
+            {
+                "order_id": order["order_id"],
+                "client_order_id": order["client_order_id"],
+                "order_type": order["type"],
+                "order_price": order["price"],
+                "order_quantity": order["quantity"],
+            }
+        )
+
+    async def _post_batch_order(self, account: _Account, query, payload: Dict) -> Dict:
+        rows = []
+        for request in payload.get("orders") or ():
+            order = self._create_order(account, request)
+            rows.append(
+                {
+                    "order_id": order["order_id"],
+                    "client_order_id": order["client_order_id"],
+                }
+            )
+        return _ok({"rows": rows})
+
+    async def _delete_batch_order(self, account: _Account, query, payload) -> Dict:
+        ids = [int(i) for i in query.get("order_ids", "").split(",") if i]
+        rows = [self._cancel(account, account.orders.get(i), i) for i in ids]
+        return {"success": True, "data": {"rows": rows}, "errors": []}
+
+    async def _delete_client_batch_order(self, account: _Account, query, payload):
+        ids = [i for i in query.get("client_order_ids", "").split(",") if i]
+        by_coid = {o["client_order_id"]: o for o in account.orders.values()}
+        rows = [self._cancel(account, by_coid.get(i), i) for i in ids]
+        return {"success": True, "data": {"rows": rows}, "errors": []}
+
+    async def _delete_orders(self, account: _Account, query, payload) -> Dict:
+        symbol = query.get("symbol")
+        for order in list(account.orders.values()):
+            if order["status"] == "NEW" and symbol in (None, order["symbol"]):
+                self._cancel(account, order, order["order_id"])
+        return _ok({"status": "CANCEL_ALL_SENT"})
+
+    async def _get_orders(self, account: _Account, query, payload) -> Dict:
+        rows = list(account.orders.values())
+        status = query.get("status")
+        if status == "INCOMPLETE":
+            rows = [o for o in rows if o["status"] == "NEW"]
+        elif status == "COMPLETED":
+            rows = [o for o in rows if o["status"] != "NEW"]
+        elif status:
+            rows = [o for o in rows if o["status"] == status]
+        if "symbol" in query:
+            rows = [o for o in rows if o["symbol"] == query["symbol"]]
+        return _ok(self._page(rows, query))
+
+    async def _get_trades(self, account: _Account, query, payload) -> Dict:
+        return _ok(self._page(self.trades, query))
+
+    async def _get_funding_fee_history(self, account: _Account, query, payload):
+        return _ok(self._page([], query))
+
+    async def _get_pnl_settlement_history(self, account: _Account, query, payload):
+        return _ok(self._page([], query))
+
+    async def _get_positions(self, account: _Account, query, payload) -> Dict:
+        rows = [
+            {"symbol": m.symbol, "position_qty": 0.0, "mark_price": m.price}
+            for m in self.markets.values()
+        ]
+        return _ok({"rows": rows})
+
+    async def _get_client_holding(self, account: _Account, query, payload) -> Dict:
+        return _ok({"holding": [{"token": "USDC", "holding": 10_000.0, "frozen": 0}]})
+
+    async def _get_client_info(self, account: _Account, query, payload) -> Dict:
+        return _ok({"account_id": account.account_id, "max_leverage": 10})
+
+    async def _get_client_statistics(self, account: _Account, query, payload):
+        return _ok({"perp_trading_volume_last_30_days": 0.0})
+
+    async def _get_kline(self, account: _Account, query, payload) -> Dict:
+        market = self.markets.get(query.get("symbol", ""))
+        if market is None:
+            return _error(-1004, "unknown symbol")
+        now = _now_ms()
+        rows = []
+        for i in range(int(query.get("limit", 100))):
+            price = market.step()
+            start = now - (i + 1) * 60_000
+            rows.append(
+                {
+                    "symbol": market.symbol,
+                    "start_timestamp": start,
+                    "end_timestamp": start + 60_000,
+                    "open": price,
+                    "high": price + market.tick,
+                    "low": price - market.tick,
+                    "close": price,
+                    "volume": 1.0,
+                    "amount": price,
+                }
+            )
+        return _ok({"rows": rows})
+
+    async def _post_liquidation(self, account: _Account, query, payload) -> Dict:
+        return _ok({})
+
+    async def _post_claim_insurance_fund(self, account: _Account, query, payload):
+        return _ok({})
+
+    # orders
+
+    def _create_order(self, account: _Account, request: Dict) -> Dict:
+        order_id = next(self._order_ids)
+        order = {
+            "order_id": order_id,
+            "client_order_id": request.get("client_order_id"),
+            "symbol": request.get("symbol"),
+            "side": request.get("side"),
+            "type": request.get("order_type"),
+            "price": request.get("order_price"),
+            "quantity": request.get("order_quantity"),
+            "status": "NEW",
+            "created_time": _now_ms(),
+        }
+        account.orders[order_id] = order
+        self._push_execution_report(account, order)
+        return order
+
+    def _cancel(self, account: _Account, order: Optional[Dict], order_id) -> Dict:
+        if order is None or order["status"] != "NEW":
+            return {
+                "order_id": order_id,
+                "success": False,
+                "error_message": "not found",
+            }
+        order["status"] = "CANCELLED"
+        self._push_execution_report(account, order)
+        return {"order_id": order["order_id"], "success": True, "error_message": None}
+
+    def _push_execution_report(self, account: _Account, order: Dict):
+        data = {
+            "symbol": order["symbol"],
+            "clientOrderId": order["client_order_id"],
+            "orderId": order["order_id"],
+            "type": order["type"],
+            "side": order["side"],
+            "quantity": order["quantity"],
+            "price": order["price"],
+            "status": order["status"],
+            "timestamp": _now_ms(),
+        }
+        message = jsonlib.dumps(
+            {"topic": "executionreport", "ts": _now_ms(), "data": data}
+        )
+        for connection, topics in account.connections.items():
+            if "executionreport" in topics:
+                self._spawn(connection.send(message))
+
+    # synthetic data
+
+    def _symbol_info(self, market: _Market) -> Dict:
+        return {
+            "symbol": market.symbol,
+            "quote_min": 0,
+            "quote_max": market.price * 10,
+            "quote_tick": market.tick,
+            "base_min": 0.001,
+            "base_max": 1000,
+            "base_tick": 0.001,
+            "min_notional": 10,
+            "price_range": 0.03,
+        }
+
+    def _futures_info(self, market: _Market) -> Dict:
+        return {
+            "symbol": market.symbol,
+            "index_price": market.price,
+            "mark_price": market.price,
+            "est_funding_rate": 0.0001,
+            "last_funding_rate": 0.0001,
+            "next_funding_time": _now_ms() + 3_600_000,
+            "open_interest": 1000.0,
+        }
+
+    def _market_trade(self, market: _Market) -> Dict:
+        return {
+            "symbol": market.symbol,
+            "side": random.choice(("BUY", "SELL")),
+            "executed_price": market.step(),
+            "executed_quantity": round(random.uniform(0.01, 2), 3),
+            "executed_timestamp": _now_ms(),
+        }
+
+    def _history_trade(self, i: int) -> Dict:
+        market = random.choice(list(self.markets.values()))
+        return {
+            "id": i + 1,
+            "symbol": market.symbol,
+            "side": random.choice(("BUY", "SELL")),
+            "executed_price": market.price,
+            "executed_quantity": 0.1,
+            "fee": 0.01,
+            "executed_timestamp": _now_ms() - i * 1000,
+        }
+
+    def _book(self, books: Dict[str, _Book], symbol: str) -> Optional[_Book]:
+        book = books.get(symbol)
+        if book is None and symbol in self.markets:
+            book = books[symbol] = _Book(self.markets[symbol])
+        return book
+
+    def _message(self, topic: str, books: Dict[str, _Book], ts: int) -> Dict:
+        """
+        A feed message of `topic`; order book updates carry their book's ts
+        """
+        data = self._topic_data(topic, books, ts)
+        if topic.endswith("@orderbookupdate") and data:
+            ts = books[data["symbol"]].ts
+        return {"topic": topic, "ts": ts, "data": data}
+
+    def _topic_data(self, topic: str, books: Dict[str, _Book], ts: int) -> Any:
+        symbol, _, kind = topic.partition("@")
+        market = self.markets.get(symbol)
+        if topic in ("bbos", "tickers"):
+            return [
+                self._topic_data(f"{s}@{topic[:-1]}", books, ts) for s in self.markets
+            ]
+        if market is None:
+            return {}
+        if kind == "trade":
+            return {
+                "symbol": symbol,
+                "price": market.step(),
+                "size": round(random.uniform(0.01, 2), 3),
+                "side": random.choice(("BUY", "SELL")),
+                "source": 0,
+            }
+        if kind == "bbo":
+            price = market.step()
+            return {
+                "symbol": symbol,
+                "bid": price - market.tick,
+                "bidSize": 1.0,
+                "ask": price + market.tick,
+                "askSize": 1.0,
+            }
+        if kind == "ticker":
+            price = market.step()
+            return {
+                "symbol": symbol,
+                "open": price,
+                "close": price,
+                "high": price,
+                "low": price,
+                "volume": 1.0,
+                "amount": price,
+                "count": 1,
+            }
+        if kind == "orderbookupdate":
+            return self._book(books, symbol).update(ts)
+        if kind == "orderbook":
+            return self._book(books, symbol).snapshot()
+        if kind.startswith("kline"):
+            price = market.step()
+            return {
+                "symbol": symbol,
+                "type": kind.partition("_")[2],
+                "open": price,
+                "close": price,
+                "high": price,
+                "low": price,
+                "volume": 1.0,
+                "amount": price,
+                "startTime": ts - ts % 60_000,
+                "endTime": ts - ts % 60_000 + 60_000,
+            }
+        return {}
+
+    # websocket
+
+    async def _handle_ws(self, connection: ServerConnection):
+        path = connection.request.path
+        private = path.startswith("/v2/ws/private/stream/")
+        account_id = path.rstrip("/").rpartition("/")[2]
+        topics: Set[str] = set()
+        authenticated = False
+        account = self._account(account_id) if private else None
+        if account is not None:
+            account.connections[connection] = topics
+        # symbol -> order book state of this connection
+        books: Dict[str, _Book] = {}
+        pinger = asyncio.create_task(self._ping(connection))
+        feeder = None
+        if not private and self.feed_rate > 0:
+            feeder = asyncio.create_task(self._feed(connection, topics, books))
+        try:
+            async for frame in connection:
+                message = jsonlib.loads(frame)
+                event = message.get("event")
+                reply: Dict[str, Any] = {
+                    "id": message.get("id"),
+                    "event": event,
+                    "success": True,
+                    "ts": _now_ms(),
+                }
+                if event == "pong":
+                    continue
+                if event == "ping":
+                    await connection.send(jsonlib.dumps({"event": "pong"}))
+                    continue
+                if event == "auth":
+                    params = message.get("params") or {}
+                    ts = str(params.get("timestamp", ""))
+                    error = self._check_timestamp(ts) or self._verify(
+                        params.get("orderly_key", ""),
+                        ts.encode(),
+                        params.get("sign", ""),
+                    )
+                    authenticated = error is None
+                    if error:
+                        reply.update(success=False, errorMsg=error)
+                elif event == "subscribe":
+                    topic = message.get("topic", "")
+                    if private and not authenticated:
+                        reply.update(success=False, errorMsg="not authenticated")
+                    else:
+                        topics.add(topic)
+                elif event == "unsubscribe":
+                    topics.discard(message.get("topic", ""))
+                elif event == "request":
+                    params = message.get("params") or {}
+                    symbol = params.get("symbol", "")
+                    book = self._book(books, symbol)
+                    if book is None:
+                        reply.update(success=False, errorMsg=f"unknown symbol {symbol}")
+                    else:
+                        reply.update(data=book.snapshot(), ts=book.ts)
+                else:
+                    reply.update(success=False, errorMsg=f"unknown event {event}")
+                await connection.send(jsonlib.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            pinger.cancel()
+            if feeder is not None:
+                feeder.cancel()
+            if account is not None:
+                account.connections.pop(connection, None)
+
+    async def _ping(self, connection: ServerConnection):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await connection.send(jsonlib.dumps({"event": "ping", "ts": _now_ms()}))
+
+    async def _feed(
+        self, connection: ServerConnection, topics: Set[str], books: Dict[str, _Book]
+    ):
+        """
+        Send `feed_rate` messages per second round-robin over the topics
+        """
+        started = time.monotonic()
+        sent = 0
+        cycle: List[str] = []
+        index = 0
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                if not topics:
+                    started = time.monotonic()
+                    sent = 0
+                    continue
+                if set(cycle) != topics:
+                    cycle = sorted(topics)
+                due = int((time.monotonic() - started) * self.feed_rate) - sent
+                ts = _now_ms()
+                for _ in range(due):
+                    topic = cycle[index % len(cycle)]
+                    index += 1
+                    message = self._message(topic, books, ts)
+                    await connection.send(jsonlib.dumps(message))
+                sent += due
+        except ConnectionClosed:
+            pass
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve a mock Orderly exchange")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ws-port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--feed-rate", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    async def serve_forever():
+        exchange = MockExchange(
+            host=args.host,
+            port=args.port,
+            ws_port=args.ws_port,
+            latency=args.latency,
+            rate_limit=args.rate_limit,
+            feed_rate=args.feed_rate,
+        )
+        async with exchange:
+            print(f"REST      {exchange.rest_endpoint}")
+            print(f"WS public {exchange.ws_public_endpoint}<account_id>")
+            print(f"WS private {exchange.ws_private_endpoint}<account_id>")
+            await asyncio.Event().wait()
+
+    asyncio.run(serve_forever())
+
+
+if __name__ == "__main__":
+    main()
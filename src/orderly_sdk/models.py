@@ -0,0 +1,270 @@
+"""
+Compact typed models for hot websocket payloads
+
+The dict API stays the default. With `typed=True` on a websocket manager,
+messages of the topics below are converted into `__slots__` objects, with
+prices and quantities parsed as `float` or `Decimal`.
+"""
+
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+Number = Callable[[Any], Any]
+
+
+def to_decimal(value: Any) -> Optional[Decimal]:
+    """
+    Parse a JSON number into a Decimal without binary float noise
+    """
+    if value is None:
+        return None
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+def _float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class PriceLevel(NamedTuple):
+    """
+    One order book level
+    """
+
+    price: Any
+    size: Any
+
+
+class Model:
+    """
+    Base class for typed payloads
+
+    `_fields` lists (attribute, payload key, is_number) triples.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[Tuple[str, str, bool], ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict, number: Number = _float, ts: Optional[int] = None):
+        """
+        Build the model from a payload dict
+        """
+        obj = cls.__new__(cls)
+        get = data.get
+        for attr, key, is_number in cls._fields:
+            value = get(key)
+            setattr(obj, attr, number(value) if is_number else value)
+        if "ts" in cls.__slots__:
+            obj.ts = get("ts", ts)
+        return obj
+
+    def to_dict(self) -> Dict:
+        """
+        Convert back to a plain dict keyed by attribute name
+        """
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{a}={getattr(self, a)!r}" for a in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _compile_from_dict(fields: Tuple[Tuple[str, str, bool], ...]) -> classmethod:
+    """
+    Generate a `from_dict` that assigns every slot directly, without looping
+    over `_fields` and calling `setattr` per message
+    """
+    lines = [
+        "def from_dict(cls, data, number=float, ts=None):",
+        "    obj = new(cls)",
+        "    get = data.get",
+    ]
+    for attr, key, is_number in fields:
+        if is_number:
+            # check None inline so `number` can be the float builtin
+            value = f"None if (v := get({key!r})) is None else number(v)"
+        else:
+            value = f"get({key!r})"
+        lines.append(f"    obj.{attr} = {value}")
+    lines += ["    obj.ts = get('ts', ts)", "    return obj"]
+    namespace: Dict[str, Any] = {"new": object.__new__}
+    exec("\n".join(lines), namespace)
+    return classmethod(namespace["from_dict"])
+
+
+def _model(name: str, fields: Tuple[Tuple[str, str, bool], ...], doc: str):
+    slots = tuple(attr for attr, _, _ in fields) + ("ts",)
+    namespace = {
+        "__slots__": slots,
+        "_fields": fields,
+        "__doc__": doc,
+        "from_dict": _compile_from_dict(fields),
+    }
+    return type(name, (Model,), namespace)
+
+
+Trade = _model(
+    "Trade",
+    (
+        ("symbol", "symbol", False),
+        ("price", "price", True),
+        ("size", "size", True),
+        ("side", "side", False),
+        ("source", "source", False),
+    ),
+    "Public trade from `<symbol>@trade`",
+)
+
+Bbo = _model(
+    "Bbo",
+    (
+        ("symbol", "symbol", False),
+        ("bid", "bid", True),
+        ("bid_size", "bidSize", True),
+        ("ask", "ask", True),
+        ("ask_size", "askSize", True),
+    ),
+    "Best bid and offer from `<symbol>@bbo` or `bbos`",
+)
+
+Ticker = _model(
+    "Ticker",
+    (
+        ("symbol", "symbol", False),
+        ("open", "open", True),
+        ("close", "close", True),
+        ("high", "high", True),
+        ("low", "low", True),
+        ("volume", "volume", True),
+        ("amount", "amount", True),
+        ("count", "count", False),
+    ),
+    "24h ticker from `<symbol>@ticker` or `tickers`",
+)
+
+ExecutionReport = _model(
+    "ExecutionReport",
+    (
+        ("symbol", "symbol", False),
+        ("client_order_id", "clientOrderId", False),
+        ("order_id", "orderId", False),
+        ("type", "type", False),
+        ("side", "side", False),
+        ("quantity", "quantity", True),
+        ("price", "price", True),
+        ("trade_id", "tradeId", False),
+        ("executed_price", "executedPrice", True),
+        ("executed_quantity", "executedQuantity", True),
+        ("fee", "fee", True),
+        ("fee_asset", "feeAsset", False),
+        ("total_executed_quantity", "totalExecutedQuantity", True),
+        ("avg_price", "avgPrice", True),
+        ("status", "status", False),
+        ("reason", "reason", False),
+        ("timestamp", "timestamp", False),
+    ),
+    "Private order update from `executionreport`",
+)
+
+Position = _model(
+    "Position",
+    (
+        ("symbol", "symbol", False),
+        ("position_qty", "positionQty", True),
+        ("cost_position", "costPosition", True),
+        ("average_open_price", "averageOpenPrice", True),
+        ("mark_price", "markPrice", True),
+        ("est_liq_price", "estLiqPrice", True),
+        ("unsettled_pnl", "unsettledPnl", True),
+        ("settle_price", "settlePrice", True),
+        ("pending_long_qty", "pendingLongQty", True),
+        ("pending_short_qty", "pendingShortQty", True),
+        ("timestamp", "timestamp", False),
+    ),
+    "Private position from the `position` topic",
+)
+
+
+class OrderBookData(Model):
+    """
+    Order book snapshot or update from `<symbol>@orderbook(update)`
+    """
+
+    __slots__ = ("symbol", "bids", "asks", "prev_ts", "ts")
+
+    @classmethod
+    def from_dict(cls, data: Dict, number: Number = _float, ts: Optional[int] = None):
+        obj = object.__new__(cls)
+        get = data.get
+        # tuple.__new__ skips the Python-level NamedTuple constructor
+        new = tuple.__new__
+        obj.symbol = get("symbol")
+        obj.bids = [
+            new(PriceLevel, (number(p), number(s))) for p, s in get("bids") or ()
+        ]
+        obj.asks = [
+            new(PriceLevel, (number(p), number(s))) for p, s in get("asks") or ()
+        ]
+        obj.prev_ts = get("prevTs")
+        obj.ts = get("ts", ts)
+        return obj
+
+
+# topic suffix -> (model, whether data is a list, key holding the list)
+TOPIC_MODELS: Dict[str, Tuple[Type[Model], bool, Optional[str]]] = {
+    "trade": (Trade, False, None),
+    "bbo": (Bbo, False, None),
+    "bbos": (Bbo, True, None),
+    "ticker": (Ticker, False, None),
+    "tickers": (Ticker, True, None),
+    "orderbook": (OrderBookData, False, None),
+    "orderbookupdate": (OrderBookData, False, None),
+    "executionreport": (ExecutionReport, False, None),
+    "position": (Position, True, "positions"),
+}
+
+
+class TypedDecoder:
+    """
+    Converts topic payloads into typed models
+
+    `number` is applied to prices and quantities: `float` (default) or
+    `Decimal`.
+    """
+
+    def __init__(self, number: Type = float):
+        self.number: Number = to_decimal if number is Decimal else float
+        self._cache: Dict[str, Optional[Tuple[Callable, bool, Optional[str]]]] = {}
+
+    def _lookup(self, topic: str):
+        try:
+            return self._cache[topic]
+        except KeyError:
+            spec = TOPIC_MODELS.get(topic.rpartition("@")[2])
+            if spec is not None:
+                # keep the bound constructor to skip the attribute lookups
+                model, many, key = spec
+                spec = (model.from_dict, many, key)
+            self._cache[topic] = spec
+            return spec
+
+    def convert(self, topic: str, data: Any, ts: Optional[int] = None) -> Any:
+        """
+        Convert `data` of `topic`, returning it unchanged for unknown topics
+        """
+        spec = self._lookup(topic)
+        if spec is None:
+            return data
+        from_dict, many, key = spec
+        if not many:
+            return from_dict(data, self.number, ts)
+        number = self.number
+        items: List = data.get(key) if key is not None else data
+        return [from_dict(item, number, ts) for item in items or ()]
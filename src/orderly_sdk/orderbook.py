@@ -0,0 +1,325 @@
+"""
+Locally maintained order books built from Orderly websocket streams
+
+`OrderBookManager` requests a snapshot through `WsTopicManager.request()` and
+applies `<symbol>@orderbookupdate` deltas on top of it. Updates are chained by
+their `prevTs`; a gap triggers a new snapshot request and buffered updates are
+replayed once it arrives.
+"""
+
+import asyncio
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .log import logger
+from .ws import WsTopicManager
+
+
+class BookSide:
+    """
+    One side of an order book kept as sorted parallel arrays
+
+    Prices are stored as sort keys (price for asks, -price for bids) so the
+    best level is always at index 0.
+    """
+
+    __slots__ = ("_keys", "_sizes", "_sign")
+
+    def __init__(self, descending: bool):
+        self._keys = array("d")
+        self._sizes = array("d")
+        self._sign = -1.0 if descending else 1.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self):
+        """
+        Remove all levels
+        """
+        del self._keys[:]
+        del self._sizes[:]
+
+    def load(self, levels: Iterable):
+        """
+        Replace all levels with `[[price, size], ...]`
+        """
+        sign = self._sign
+        pairs = sorted((sign * float(p), float(s)) for p, s in levels if float(s))
+        self._keys = array("d", [k for k, _ in pairs])
+        self._sizes = array("d", [s for _, s in pairs])
+
+    def update(self, price: float, size: float):
+        """
+        Set the size at a price level, removing the level when size is 0
+        """
+        key = self._sign * price
+        keys = self._keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size:
+                self._sizes[i] = size
+            else:
+                del keys[i]
+                del self._sizes[i]
+        elif size:
+            keys.insert(i, key)
+            self._sizes.insert(i, size)
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """
+        Best (price, size) or None if the side is empty
+        """
+        if not self._keys:
+            return None
+        return self._sign * self._keys[0], self._sizes[0]
+
+    def size_at(self, price: float) -> float:
+        """
+        Size resting at a price level
+        """
+        key = self._sign * price
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._sizes[i]
+        return 0.0
+
+    def depth(self, n: int) -> List[Tuple[float, float]]:
+        """
+        Top `n` levels as (price, size), best first
+        """
+        sign = self._sign
+        return [(sign * k, s) for k, s in zip(self._keys[:n], self._sizes[:n])]
+
+    def vwap(self, size: float) -> Optional[float]:
+        """
+        Average price to fill `size` by sweeping from the best level
+        """
+        remaining = size
+        notional = 0.0
+        for key, level_size in zip(self._keys, self._sizes):
+            take = level_size if level_size < remaining else remaining
+            notional += take * key
+            remaining -= take
+            if remaining <= 0:
+                return self._sign * notional / size
+        return None
+
+
+class OrderBook:
+    """
+    Order book for a single symbol
+    """
+
+    __slots__ = ("symbol", "bids", "asks", "ts", "synced")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.ts = 0
+        self.synced = False
+
+    def load_snapshot(self, data: Dict, ts: int):
+        """
+        Replace the book with a snapshot
+        """
+        self.bids.load(data.get("bids") or ())
+        self.asks.load(data.get("asks") or ())
+        self.ts = ts
+        self.synced = True
+
+    def apply_update(self, data: Dict, ts: int):
+        """
+        Apply an incremental update
+        """
+        bids = self.bids
+        for price, size in data.get("bids") or ():
+            bids.update(float(price), float(size))
+        asks = self.asks
+        for price, size in data.get("asks") or ():
+            asks.update(float(price), float(size))
+        self.ts = ts
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        """
+        Best bid (price, size)
+        """
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        """
+        Best ask (price, size)
+        """
+        return self.asks.best()
+
+    def mid_price(self) -> Optional[float]:
+        """
+        Mid price between best bid and best ask
+        """
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> Optional[float]:
+        """
+        Best ask minus best bid
+        """
+        bid = self.bids.best()
+        ask = self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth(self, n: int) -> Dict[str, List[Tuple[float, float]]]:
+        """
+        Top `n` levels on both sides
+        """
+        return {"bids": self.bids.depth(n), "asks": self.asks.depth(n)}
+
+    def vwap(self, side: str, size: float) -> Optional[float]:
+        """
+        Average fill price for a market order of `size`
+
+        `side` is the order side: "BUY" sweeps asks, "SELL" sweeps bids.
+        """
+        book_side = self.asks if side.upper() == "BUY" else self.bids
+        return book_side.vwap(size)
+
+
+class _BookState:
+    __slots__ = ("book", "pending", "requested")
+
+    def __init__(self, symbol: str):
+        self.book = OrderBook(symbol)
+        self.pending: List[Tuple[Dict, int]] = []
+        self.requested = False
+
+
+class OrderBookManager:
+    """
+    Keeps local order books in sync from a public websocket manager
+    """
+
+    max_pending: int = 1000
+
+    def __init__(
+        self,
+        ws: WsTopicManager,
+        on_update: Optional[Callable[[OrderBook], None]] = None,
+    ):
+        self.ws = ws
+        self.on_update = on_update
+        self._states: Dict[str, _BookState] = {}
+        ws.add_connection_listener(self._on_connection_event)
+
+    def track(self, symbol: str) -> OrderBook:
+        """
+        Start maintaining the order book of a symbol
+        """
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _BookState(symbol)
+            self.ws.add_listener(
+                symbol + "@orderbookupdate",
+                lambda data, ts: self._on_update(state, data, ts),
+            )
+            self.ws.add_listener(
+                symbol + "@orderbook",
+                lambda data, ts: self._on_snapshot(state, data, ts),
+                subscribe=False,
+            )
+        return state.book
+
+    def get(self, symbol: str) -> Optional[OrderBook]:
+        """
+        Get the order book of a tracked symbol
+        """
+        state = self._states.get(symbol)
+        return state.book if state is not None else None
+
+    def __getitem__(self, symbol: str) -> OrderBook:
+        return self._states[symbol].book
+
+    def resync(self, symbol: str):
+        """
+        Drop the local book and request a fresh snapshot
+        """
+        state = self._states[symbol]
+        state.book.synced = False
+        self._request_snapshot(state)
+
+    def _on_connection_event(self, event: str, info: Dict):
+        # updates missed while disconnected make every book stale
+        if event not in ("disconnected", "reconnected"):
+            return
+        for state in self._states.values():
+            state.book.synced = False
+            state.pending = []
+            state.requested = False
+
+    def _request_snapshot(self, state: _BookState):
+        if state.requested:
+            return
+        state.requested = True
+        symbol = state.book.symbol
+        logger.debug("requesting orderbook snapshot for {}", symbol)
+        task = asyncio.ensure_future(self.ws.request(symbol), loop=self.ws.loop)
+        task.add_done_callback(lambda t: self._on_request_done(state, t))
+
+    def _on_request_done(self, state: _BookState, task: asyncio.Future):
+        if task.cancelled() or task.exception() is not None:
+            logger.warning(
+                "orderbook snapshot request for {} failed", state.book.symbol
+            )
+            state.requested = False
+
+    def _buffer(self, state: _BookState, data: Dict, ts: int):
+        pending = state.pending
+        pending.append((data, ts))
+        if len(pending) > self.max_pending:
+            del pending[0]
+
+    def _on_update(self, state: _BookState, data: Dict, ts: int):
+        book = state.book
+        if not book.synced:
+            self._buffer(state, data, ts)
+            self._request_snapshot(state)
+            return
+        if ts <= book.ts:
+            return
+        prev_ts = data.get("prevTs")
+        if prev_ts is not None and prev_ts != book.ts:
+            logger.warning(
+                "orderbook gap on {}: prevTs {} != {}", book.symbol, prev_ts, book.ts
+            )
+            book.synced = False
+            self._buffer(state, data, ts)
+            self._request_snapshot(state)
+            return
+        book.apply_update(data, ts)
+        if self.on_update is not None:
+            self.on_update(book)
+
+    def _on_snapshot(self, state: _BookState, data: Dict, ts: int):
+        book = state.book
+        state.requested = False
+        book.load_snapshot(data, ts)
+        pending = state.pending
+        state.pending = []
+        for update, update_ts in pending:
+            if update_ts <= book.ts:
+                continue
+            prev_ts = update.get("prevTs")
+            if prev_ts is not None and prev_ts > book.ts:
+                # the snapshot is older than the buffered updates
+                book.synced = False
+                state.pending = [(u, t) for u, t in pending if t > book.ts]
+                self._request_snapshot(state)
+                return
+            book.apply_update(update, update_ts)
+        if self.on_update is not None:
+            self.on_update(book)
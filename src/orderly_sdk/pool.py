@@ -0,0 +1,373 @@
+"""
+Many accounts in one process
+
+`AccountPool` gives every account identity its own lightweight `AsyncClient`
+(key, signature and per-account rate limits) on top of one shared
+`aiohttp.ClientSession` and connection pool, and optionally one shared
+`Signer`. `PrivateWsSupervisor` runs the private websocket of every account
+from one place: the exchange authenticates each connection for a single
+account so the sockets cannot be multiplexed, but listeners, the decoder and
+the connect schedule are shared and an account costs one socket plus a small
+manager object.
+"""
+
+import asyncio
+import functools
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import aiohttp
+
+from .cache import ResponseCache
+from .codec import Decoder, Encoder, get_decoder, get_encoder
+from .helpers import get_loop
+from .log import logger
+from .metrics import Metrics, trace_config
+from .ratelimit import RateLimiter
+from .rest import AsyncClient
+from .signing import Signer
+from .ws import OrderlyPrivateWsManager
+
+
+class AccountPool:
+    """
+    REST clients of many accounts sharing one connection pool
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        loop=None,
+        timeout: Optional[Union[float, aiohttp.ClientTimeout]] = None,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        keepalive_timeout: Optional[float] = 30,
+        dns_cache_ttl: Optional[int] = 300,
+        force_close: bool = False,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        rate_rules: Optional[List[Tuple[str, str, str, float, int]]] = None,
+        shared_buckets: Sequence[str] = ("public",),
+        cache: Optional[ResponseCache] = None,
+        json_encoder: Optional[Union[str, Encoder]] = None,
+        metrics: Optional[Metrics] = None,
+        signer: Union[bool, Signer, None] = None,
+    ):
+        """
+        The connection options are those of `AsyncClient` and apply to the
+        one shared pool.
+
+        With `rate_limits` (see `RateLimiter`) every account gets its own
+        limiter, except for the `shared_buckets` (by default the per-IP
+        public limit) which are shared by all accounts.
+
+        `signer=True` signs through a new `Signer` thread pool during bursts;
+        pass a `Signer` to configure it.
+        """
+        self.endpoint = endpoint
+        self.loop = loop or get_loop()
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            self.client_timeout = timeout
+        else:
+            self.client_timeout = aiohttp.ClientTimeout(
+                total=AsyncClient.timeout if timeout is None else timeout
+            )
+        self._owns_connector = connector is None
+        if connector is None:
+            connector = aiohttp.TCPConnector(
+                limit=pool_size,
+                limit_per_host=pool_size_per_host,
+                keepalive_timeout=None if force_close else keepalive_timeout,
+                use_dns_cache=dns_cache_ttl != 0,
+                ttl_dns_cache=dns_cache_ttl,
+                force_close=force_close,
+                enable_cleanup_closed=True,
+                loop=self.loop,
+            )
+        self.session = aiohttp.ClientSession(
+            loop=self.loop,
+            headers={"Accept": "application/json"},
+            connector=connector,
+            connector_owner=self._owns_connector,
+            timeout=self.client_timeout,
+            trace_configs=[trace_config()] if metrics is not None else None,
+        )
+        self.rate_limits = rate_limits
+        self.rate_rules = rate_rules
+        self._shared_limiter = None
+        self.shared_buckets = tuple(shared_buckets)
+        if rate_limits is not None:
+            self._shared_limiter = RateLimiter(rate_limits, rate_rules)
+        self.cache = cache
+        self._dumps = get_encoder(json_encoder)
+        self.metrics = metrics
+        self._owns_signer = signer is True
+        self.signer = Signer() if signer is True else signer or None
+        # (ep, version) -> (uri, signed path), the same for every account
+        self._routes: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self.clients: Dict[str, AsyncClient] = {}
+        self.public = self._client("pool_public")
+
+    def _client(self, _id: str, **identity) -> AsyncClient:
+        client = AsyncClient(
+            _id=_id,
+            endpoint=self.endpoint,
+            loop=self.loop,
+            timeout=self.client_timeout,
+            rate_limiter=self._rate_limiter(),
+            cache=self.cache,
+            json_encoder=self._dumps,
+            metrics=self.metrics,
+            session=self.session,
+            signer=self.signer,
+            **identity,
+        )
+        client._routes = self._routes
+        return client
+
+    def _rate_limiter(self) -> Optional[RateLimiter]:
+        shared = self._shared_limiter
+        if shared is None:
+            return None
+        limiter = RateLimiter(self.rate_limits, self.rate_rules)
+        for name in self.shared_buckets:
+            if name in shared.buckets:
+                limiter.buckets[name] = shared.buckets[name]
+        return limiter
+
+    def add(
+        self,
+        account_id: str,
+        orderly_key: Optional[str] = None,
+        orderly_secret: Optional[str] = None,
+    ) -> AsyncClient:
+        """
+        Register an account and return its client
+        """
+        if account_id in self.clients:
+            raise ValueError(f"account {account_id} is already in the pool")
+        client = self._client(
+            f"pool_{account_id}",
+            account_id=account_id,
+            orderly_key=orderly_key,
+            orderly_secret=orderly_secret,
+        )
+        self.clients[account_id] = client
+        return client
+
+    def remove(self, account_id: str) -> Optional[AsyncClient]:
+        """
+        Drop an account; its connections stay in the shared pool
+        """
+        return self.clients.pop(account_id, None)
+
+    def __getitem__(self, account_id: str) -> AsyncClient:
+        return self.clients[account_id]
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self.clients
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.clients)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    async def gather(
+        self,
+        call: Callable[[AsyncClient], Awaitable[Any]],
+        return_exceptions: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Run `call(client)` for every account concurrently
+
+        `await pool.gather(lambda c: c.get_all_positions())` returns
+        `{account_id: result}`, with exceptions as results unless
+        `return_exceptions` is False.
+        """
+        ids = list(self.clients)
+        results = await asyncio.gather(
+            *(call(self.clients[i]) for i in ids),
+            return_exceptions=return_exceptions,
+        )
+        return dict(zip(ids, results))
+
+    async def warm_up(self, connections: int = 1):
+        """
+        Open `connections` pooled keep-alive connections ahead of time
+        """
+        await self.public.warm_up(connections)
+
+    async def close(self):
+        """
+        Close the shared session and the signer thread pool it created
+        """
+        await self.session.close()
+        if self._owns_signer and self.signer is not None:
+            self.signer.close()
+
+    async def __aenter__(self) -> "AccountPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class PrivateWsSupervisor:
+    """
+    Private websocket connections of many accounts under one supervisor
+    """
+
+    # seconds between connection starts, so hundreds of accounts do not
+    # hit the server with their handshakes and auth at once
+    connect_interval: float = 0.02
+
+    def __init__(
+        self,
+        endpoint: str = "",
+        loop=None,
+        json_decoder: Optional[Union[str, Decoder]] = None,
+        typed: bool = False,
+        number_type: type = float,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.endpoint = endpoint
+        self.loop = loop or get_loop()
+        # one decoder for every connection
+        self._decoder = get_decoder(json_decoder)
+        self.typed = typed
+        self.number_type = number_type
+        self.metrics = metrics
+        self.managers: Dict[str, OrderlyPrivateWsManager] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # topic -> callbacks invoked with (account_id, data, ts)
+        self.listeners: Dict[str, List[Callable[[str, Any, int], None]]] = {}
+        # callbacks invoked with (account_id, event, info)
+        self.connection_listeners: List[Callable[[str, str, Dict], None]] = []
+        self._connect_args: Optional[Tuple[Optional[float], Dict]] = None
+        self._next_start = 0.0
+
+    def add(
+        self,
+        account_id: str,
+        orderly_key: Optional[str] = None,
+        orderly_secret: Optional[str] = None,
+    ) -> OrderlyPrivateWsManager:
+        """
+        Register an account; it connects right away if the supervisor runs
+        """
+        if account_id in self.managers:
+            raise ValueError(f"account {account_id} is already supervised")
+        ws = OrderlyPrivateWsManager(
+            _id=f"WS_PRIVATE_{account_id}",
+            account_id=account_id,
+            orderly_key=orderly_key,
+            orderly_secret=orderly_secret,
+            endpoint=self.endpoint,
+            loop=self.loop,
+            json_decoder=self._decoder,
+            typed=self.typed,
+            number_type=self.number_type,
+            metrics=self.metrics,
+        )
+        for topic, callbacks in self.listeners.items():
+            for callback in callbacks:
+                ws.add_listener(topic, functools.partial(callback, account_id))
+        for callback in self.connection_listeners:
+            ws.add_connection_listener(functools.partial(callback, account_id))
+        self.managers[account_id] = ws
+        if self._connect_args is not None:
+            self._start_one(account_id)
+        return ws
+
+    async def remove(self, account_id: str):
+        """
+        Disconnect an account and stop supervising it
+        """
+        ws = self.managers.pop(account_id, None)
+        task = self._tasks.pop(account_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if ws is not None and self.metrics is not None:
+            self.metrics.remove_gauge(ws._queue_depths)
+
+    def __getitem__(self, account_id: str) -> OrderlyPrivateWsManager:
+        return self.managers[account_id]
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self.managers
+
+    def __len__(self) -> int:
+        return len(self.managers)
+
+    def add_listener(self, topic: str, callback: Callable[[str, Any, int], None]):
+        """
+        Call `callback(account_id, data, ts)` for every message on a topic
+        of any account, e.g. "executionreport" or "position"
+        """
+        self.listeners.setdefault(topic, []).append(callback)
+        for account_id, ws in self.managers.items():
+            ws.add_listener(topic, functools.partial(callback, account_id))
+
+    def add_connection_listener(self, callback: Callable[[str, str, Dict], None]):
+        """
+        Call `callback(account_id, event, info)` on connection events of any
+        account, see `WsTopicManager.add_connection_listener()`
+        """
+        self.connection_listeners.append(callback)
+        for account_id, ws in self.managers.items():
+            ws.add_connection_listener(functools.partial(callback, account_id))
+
+    def connected(self) -> List[str]:
+        """
+        Ids of the accounts whose connection is currently up
+        """
+        return [i for i, ws in self.managers.items() if ws._connected]
+
+    def _start_one(self, account_id: str):
+        timeout, kwargs = self._connect_args
+        now = self.loop.time()
+        self._next_start = max(now, self._next_start) + self.connect_interval
+        delay = self._next_start - now - self.connect_interval
+        self._tasks[account_id] = self.loop.create_task(
+            self._run(self.managers[account_id], delay, timeout, kwargs)
+        )
+
+    @staticmethod
+    async def _run(ws: OrderlyPrivateWsManager, delay: float, timeout, kwargs):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await ws._connect(timeout, **kwargs)
+
+    def start(self, timeout: Optional[int | float] = None, **kwargs):
+        """
+        Connect every account, `connect_interval` apart; accounts added
+        later connect as they are added
+        """
+        self._connect_args = (timeout, kwargs)
+        for account_id in self.managers:
+            if account_id not in self._tasks:
+                self._start_one(account_id)
+
+    async def stop(self):
+        """
+        Close every connection
+        """
+        self._connect_args = None
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.debug("stopped {} private connections", len(tasks))
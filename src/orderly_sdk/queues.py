@@ -0,0 +1,109 @@
+"""
+Bounded topic queues with backpressure and conflation policies
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+CONFLATE = "conflate"
+
+POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST, CONFLATE)
+
+
+def symbol_key(item: Any) -> Optional[Hashable]:
+    """
+    Default conflation key: the symbol of a message, or None for a single slot
+    """
+    if isinstance(item, dict):
+        return item.get("symbol")
+    return getattr(item, "symbol", None)
+
+
+class TopicQueue(asyncio.Queue):
+    """
+    asyncio.Queue with an overflow policy
+
+    * block: `put()` waits for room, pushing backpressure to the receive loop
+    * drop_oldest: the oldest queued message is discarded to make room
+    * drop_newest: the incoming message is discarded when the queue is full
+    * conflate: only the latest message per `key(message)` is kept
+
+    `dropped` and `conflated` count discarded messages.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        policy: str = BLOCK,
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy: {policy}")
+        self.policy = policy
+        self.key = key or symbol_key
+        self.dropped = 0
+        self.conflated = 0
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        if self.policy == CONFLATE:
+            self._queue = OrderedDict()
+        else:
+            super()._init(maxsize)
+
+    def _put(self, item):
+        if self.policy == CONFLATE:
+            self._queue[self.key(item)] = item
+        else:
+            self._queue.append(item)
+
+    def _get(self):
+        if self.policy == CONFLATE:
+            return self._queue.popitem(last=False)[1]
+        return self._queue.popleft()
+
+    async def put(self, item):
+        if self.policy == BLOCK:
+            return await super().put(item)
+        return self.put_nowait(item)
+
+    def put_nowait(self, item):
+        policy = self.policy
+        if policy == CONFLATE:
+            key = self.key(item)
+            if key in self._queue:
+                self._queue[key] = item
+                self.conflated += 1
+                return
+        if policy != BLOCK and self.full():
+            if policy == DROP_NEWEST:
+                self.dropped += 1
+                return
+            self._discard_oldest()
+        return super().put_nowait(item)
+
+    def _discard_oldest(self):
+        self._get()
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+        if self.policy == CONFLATE:
+            self.conflated += 1
+        else:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth and discard counters
+        """
+        return {
+            "policy": self.policy,
+            "size": self.qsize(),
+            "maxsize": self.maxsize,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
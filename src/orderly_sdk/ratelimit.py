@@ -0,0 +1,171 @@
+"""
+Client-side rate limiting for Orderly REST calls
+
+Requests are mapped to a token bucket by method and endpoint. Callers waiting
+on the same bucket are served by priority, so order placement and cancels get
+tokens ahead of informational requests when the budget is tight.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+# bucket name -> (tokens per second, burst capacity)
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "private": (10, 10),
+    "public": (10, 10),
+}
+
+# (method or "*", endpoint prefix, bucket, weight, priority), first match wins;
+# prefixes match whole path segments, so "order" covers "order/123" but not
+# "orders", and the empty prefix matches everything
+DEFAULT_RULES: List[Tuple[str, str, str, float, int]] = [
+    ("post", "order", "private", 1, PRIORITY_HIGH),
+    ("put", "order", "private", 1, PRIORITY_HIGH),
+    ("delete", "order", "private", 1, PRIORITY_HIGH),
+    ("delete", "orders", "private", 1, PRIORITY_HIGH),
+    ("post", "batch-order", "private", 1, PRIORITY_HIGH),
+    ("delete", "batch-order", "private", 1, PRIORITY_HIGH),
+    ("delete", "client/order", "private", 1, PRIORITY_HIGH),
+    ("delete", "client/batch-order", "private", 1, PRIORITY_HIGH),
+    ("*", "public/", "public", 1, PRIORITY_LOW),
+    ("*", "", "private", 1, PRIORITY_LOW),
+]
+
+
+def _matches(prefix: str, ep: str) -> bool:
+    """
+    Whether `prefix` is made of whole leading path segments of `ep`
+    """
+    prefix = prefix.rstrip("/")
+    return not prefix or ep == prefix or ep.startswith(prefix + "/")
+
+
+class TokenBucket:
+    """
+    Async token bucket refilled continuously at `rate` tokens per second
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def drain(self):
+        """
+        Empty the bucket, e.g. after the server answered 429
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    async def acquire(self, weight: float = 1, priority: int = PRIORITY_LOW):
+        """
+        Wait until `weight` tokens are available
+
+        Lower `priority` values are served first. Raises ValueError when
+        `weight` exceeds the capacity, as it could never be served.
+        """
+        if weight > self.capacity:
+            raise ValueError(
+                f"weight {weight} exceeds the bucket capacity {self.capacity}"
+            )
+        self._refill()
+        if not self._waiters and self.tokens >= weight:
+            self.tokens -= weight
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), weight, future))
+        self._schedule()
+        await future
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        weight = self._waiters[0][2]
+        delay = max(0.0, (weight - self.tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        self._refill()
+        waiters = self._waiters
+        while waiters:
+            _, _, weight, future = waiters[0]
+            if future.done():
+                heapq.heappop(waiters)
+                continue
+            if self.tokens < weight:
+                break
+            heapq.heappop(waiters)
+            self.tokens -= weight
+            future.set_result(None)
+        self._schedule()
+
+
+class RateLimiter:
+    """
+    Maps REST requests to shared token buckets
+
+    `limits` maps bucket names to (rate, burst) and `rules` is a list of
+    (method, endpoint prefix, bucket, weight, priority) tried in order, see
+    `DEFAULT_RULES`.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        rules: Optional[List[Tuple[str, str, str, float, int]]] = None,
+    ):
+        limits = DEFAULT_LIMITS if limits is None else limits
+        self.buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rate, capacity)
+            for name, (rate, capacity) in limits.items()
+        }
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self._cache: Dict[Tuple[str, str], Tuple[str, float, int]] = {}
+
+    def classify(self, method: str, ep: str) -> Tuple[str, float, int]:
+        """
+        Get the (bucket, weight, priority) of a request
+        """
+        key = (method, ep)
+        rule = self._cache.get(key)
+        if rule is None:
+            rule = ("", 0, PRIORITY_LOW)
+            for rule_method, prefix, bucket, weight, priority in self.rules:
+                if rule_method in ("*", method) and _matches(prefix, ep):
+                    rule = (bucket, weight, priority)
+                    break
+            self._cache[key] = rule
+        return rule
+
+    async def acquire(
+        self, method: str, ep: str, priority: Optional[int] = None
+    ) -> Optional[TokenBucket]:
+        """
+        Wait for the bucket of a request and return it
+        """
+        name, weight, rule_priority = self.classify(method, ep)
+        bucket = self.buckets.get(name)
+        if bucket is None or not weight:
+            return None
+        await bucket.acquire(weight, rule_priority if priority is None else priority)
+        return bucket
@@ -0,0 +1,404 @@
+"""
+Raw websocket frame recording and replay
+
+`FrameRecorder` appends every raw frame with its receive timestamp to a
+segmented, memory-mapped log. Each segment file holds records of
+
+    int64 receive time (ns) | uint32 frame length | frame bytes
+
+and gets a JSON sidecar index with its time range, topic counts and a sparse
+timestamp -> offset table. `FrameLog` reads the segments back, seeking by
+timestamp and skipping segments without the wanted topics, and `Replayer`
+feeds the frames through `WsTopicManager._dispatch()`, the same decode and
+dispatch path as live data, at wall-clock, accelerated or maximum speed.
+"""
+
+import asyncio
+import bisect
+import json as jsonlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .log import logger
+
+_RECORD = struct.Struct("<qI")
+_TOPIC = re.compile(rb'"topic":\s*"([^"]+)"')
+_PING = b"ping"
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+
+def is_ping(frame: bytes) -> bool:
+    """
+    Whether a raw frame is a server ping
+    """
+    if _PING not in frame:
+        return False
+    try:
+        message = jsonlib.loads(bytes(frame))
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("event") == "ping"
+
+
+def frame_topic(frame: bytes) -> Optional[str]:
+    """
+    Topic of a raw frame without decoding it
+    """
+    match = _TOPIC.search(frame)
+    return match.group(1).decode() if match else None
+
+
+class _Segment:
+    """
+    One memory-mapped segment being written
+    """
+
+    __slots__ = (
+        "path",
+        "file",
+        "map",
+        "size",
+        "offset",
+        "count",
+        "first_ts",
+        "last_ts",
+        "topics",
+        "index",
+    )
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        # never reuse the name of an existing segment
+        self.file = open(path, "x+b")
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.size = size
+        self.offset = 0
+        self.count = 0
+        self.first_ts: Optional[int] = None
+        self.last_ts: Optional[int] = None
+        self.topics: Dict[str, int] = {}
+        # sparse (timestamp, offset) pairs
+        self.index: List[Tuple[int, int]] = []
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        # drop the unused, zero filled tail
+        self.file.truncate(self.offset)
+        self.file.close()
+        _write_index(
+            self.path,
+            {
+                "count": self.count,
+                "size": self.offset,
+                "first_ts": self.first_ts,
+                "last_ts": self.last_ts,
+                "topics": self.topics,
+                "index": self.index,
+            },
+        )
+
+
+def _write_index(path: str, index: Dict):
+    tmp = path + INDEX_SUFFIX + ".tmp"
+    with open(tmp, "w") as f:
+        jsonlib.dump(index, f)
+    os.replace(tmp, path + INDEX_SUFFIX)
+
+
+class FrameRecorder:
+    """
+    Append-only recorder of raw websocket frames
+
+    Attach it with `recorder.attach(ws)`; frames are copied into the current
+    segment's memory map, a new segment is started once `segment_size` bytes
+    are used, and every `index_interval` records a timestamp -> offset entry
+    is added to the segment index.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 64 * 1024 * 1024,
+        index_interval: int = 1024,
+        prefix: str = "frames",
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.index_interval = index_interval
+        self.prefix = prefix
+        os.makedirs(directory, exist_ok=True)
+        sequences = [
+            int(p[len(prefix) + 1 : -len(SEGMENT_SUFFIX)])
+            for p in os.listdir(directory)
+            if p.startswith(prefix + "-")
+            and p.endswith(SEGMENT_SUFFIX)
+            and p[len(prefix) + 1 : -len(SEGMENT_SUFFIX)].isdigit()
+        ]
+        # continue after the newest segment, also when older ones were pruned
+        self._sequence = max(sequences) + 1 if sequences else 0
+        self._segment: Optional[_Segment] = None
+        # shards of a threaded manager record from several threads
+        self._lock = threading.Lock()
+        self.frames = 0
+
+    def _roll(self, needed: int):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"{self.prefix}-{self._sequence:06d}{SEGMENT_SUFFIX}"
+        self._sequence += 1
+        size = max(self.segment_size, needed)
+        self._segment = _Segment(os.path.join(self.directory, name), size)
+
+    def write(self, frame: bytes, ts_ns: Optional[int] = None):
+        """
+        Append one frame; `ts_ns` defaults to the current time
+        """
+        if ts_ns is None:
+            ts_ns = time.time_ns()
+        if isinstance(frame, str):
+            frame = frame.encode()
+        length = len(frame)
+        needed = _RECORD.size + length
+        with self._lock:
+            segment = self._segment
+            if segment is None or segment.offset + needed > segment.size:
+                self._roll(needed)
+                segment = self._segment
+            offset = segment.offset
+            _RECORD.pack_into(segment.map, offset, ts_ns, length)
+            start = offset + _RECORD.size
+            segment.map[start : start + length] = frame
+            segment.offset = start + length
+            if segment.count % self.index_interval == 0:
+                segment.index.append((ts_ns, offset))
+            segment.count += 1
+            if segment.first_ts is None:
+                segment.first_ts = ts_ns
+            segment.last_ts = ts_ns
+            topic = frame_topic(frame)
+            if topic is not None:
+                segment.topics[topic] = segment.topics.get(topic, 0) + 1
+            self.frames += 1
+
+    def attach(self, ws: Any):
+        """
+        Record every frame of a websocket manager, or of every shard of a
+        `ShardedPublicWsManager`
+        """
+        for manager in getattr(ws, "shards", None) or (ws,):
+            manager.add_frame_listener(self.write)
+
+    def flush(self):
+        """
+        Flush the current segment to disk
+        """
+        with self._lock:
+            if self._segment is not None:
+                self._segment.map.flush()
+
+    def close(self):
+        """
+        Close the current segment and write its index
+        """
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameLog:
+    """
+    Read access to a directory of recorded segments
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        names = sorted(p for p in os.listdir(directory) if p.endswith(SEGMENT_SUFFIX))
+        self.segments: List[Tuple[str, Dict]] = [
+            (path, self._load_index(path))
+            for path in (os.path.join(directory, n) for n in names)
+        ]
+        self.segments = [(p, i) for p, i in self.segments if i["count"]]
+        self.segments.sort(key=lambda s: s[1]["first_ts"])
+
+    @staticmethod
+    def _load_index(path: str) -> Dict:
+        try:
+            with open(path + INDEX_SUFFIX) as f:
+                return jsonlib.load(f)
+        except FileNotFoundError:
+            # segment of a recorder that did not close cleanly
+            logger.warning("rebuilding missing index of {}", path)
+            return _scan_index(path)
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        return self.segments[0][1]["first_ts"] if self.segments else None
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        return self.segments[-1][1]["last_ts"] if self.segments else None
+
+    def __len__(self) -> int:
+        return sum(index["count"] for _, index in self.segments)
+
+    def topics(self) -> Dict[str, int]:
+        """
+        Message count per topic over all segments
+        """
+        topics: Dict[str, int] = {}
+        for _, index in self.segments:
+            for topic, count in index["topics"].items():
+                topics[topic] = topics.get(topic, 0) + count
+        return topics
+
+    def frames(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        topics: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield `(ts_ns, frame)` in recording order, optionally from `start_ns`,
+        up to `end_ns` and only for `topics`
+        """
+        wanted = set(topics) if topics is not None else None
+        for path, index in self.segments:
+            if end_ns is not None and index["first_ts"] > end_ns:
+                return
+            if start_ns is not None and index["last_ts"] < start_ns:
+                continue
+            if wanted is not None and not wanted.intersection(index["topics"]):
+                continue
+            offset = 0
+            if start_ns is not None and index["index"]:
+                i = bisect.bisect_right([ts for ts, _ in index["index"]], start_ns)
+                offset = index["index"][i - 1][1] if i else 0
+            yield from _read_segment(
+                path, index["size"], offset, start_ns, end_ns, wanted
+            )
+
+
+def _read_segment(
+    path: str,
+    size: int,
+    offset: int,
+    start_ns: Optional[int],
+    end_ns: Optional[int],
+    topics: Optional[Set[str]],
+) -> Iterator[Tuple[int, bytes]]:
+    if not size:
+        return
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+            unpack_from = _RECORD.unpack_from
+            header = _RECORD.size
+            while offset + header <= size:
+                ts, length = unpack_from(view, offset)
+                if not length:
+                    return
+                start = offset + header
+                offset = start + length
+                if start_ns is not None and ts < start_ns:
+                    continue
+                if end_ns is not None and ts > end_ns:
+                    return
+                frame = view[start:offset]
+                if topics is not None and frame_topic(frame) not in topics:
+                    continue
+                yield ts, frame
+
+
+def _scan_index(path: str) -> Dict:
+    size = os.path.getsize(path)
+    index: Dict[str, Any] = {
+        "count": 0,
+        "size": 0,
+        "first_ts": None,
+        "last_ts": None,
+        "topics": {},
+        "index": [],
+    }
+    topics = index["topics"]
+    for ts, frame in _read_segment(path, size, 0, None, None, None):
+        if index["first_ts"] is None:
+            index["first_ts"] = ts
+        index["last_ts"] = ts
+        index["count"] += 1
+        index["size"] += _RECORD.size + len(frame)
+        topic = frame_topic(frame)
+        if topic is not None:
+            topics[topic] = topics.get(topic, 0) + 1
+    return index
+
+
+class Replayer:
+    """
+    Feeds a recorded log through a websocket manager's dispatch path
+
+    The manager does not need to be connected; ping frames are skipped since
+    there is nobody to answer.
+    """
+
+    # yield to the event loop every this many frames at maximum speed
+    yield_every: int = 1000
+
+    def __init__(self, ws: Any, log: FrameLog):
+        self.ws = ws
+        self.log = log
+        self.position_ns: Optional[int] = None
+        self.frames = 0
+
+    def seek(self, ts_ns: int):
+        """
+        Continue the next `run()` from the first frame at or after `ts_ns`
+        """
+        self.position_ns = ts_ns
+
+    async def run(
+        self,
+        speed: Optional[float] = None,
+        end_ns: Optional[int] = None,
+        topics: Optional[Iterable[str]] = None,
+    ) -> int:
+        """
+        Replay frames and return how many were dispatched
+
+        `speed` 1.0 keeps the recorded pacing, 10.0 replays ten times faster
+        and None replays as fast as possible.
+        """
+        dispatch = self.ws._dispatch
+        count = 0
+        first_ts: Optional[int] = None
+        started = time.monotonic()
+        for ts, frame in self.log.frames(self.position_ns, end_ns, topics):
+            if is_ping(frame):
+                continue
+            if speed:
+                if first_ts is None:
+                    first_ts = ts
+                delay = (ts - first_ts) / 1e9 / speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif count % self.yield_every == 0:
+                await asyncio.sleep(0)
+            await dispatch(frame)
+            self.position_ns = ts + 1
+            count += 1
+        self.frames += count
+        return count
@@ -2,20 +2,35 @@
 Orderly Async REST API Client
 """
 
-import base64
-import datetime
-import json as jsonlib
-from collections import defaultdict
-from typing import Dict, Optional
+import asyncio
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlencode, urlparse
 
 import aiohttp
-import base58
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from yarl import URL
 
-from .exceptions import OrderlyRequestException
-from .helpers import get_loop
+from .cache import ResponseCache
+from .codec import Encoder, get_encoder
+from .exceptions import OrderlyAPIException, OrderlyRequestException
+from .helpers import get_loop, timestamp_ms
+from . import log
 from .log import logger
+from .metrics import Metrics, trace_config
+from .ratelimit import RateLimiter, TokenBucket
+from .signing import Signer, load_private_key, sign
+from .templates import OrderTemplate
 
 
 class AsyncClient:
@@ -30,6 +45,10 @@ class AsyncClient:
     endpoint: Optional[str]
     api_version: str = "v1"
     timeout = 30
+    # max orders or ids per batch-order call
+    batch_size = 10
+    # rows per page for iter_* history helpers
+    page_size = 100
 
     def __init__(
         self,
@@ -39,20 +58,95 @@ class AsyncClient:
         orderly_secret: Optional[str] = None,
         endpoint: Optional[str] = None,
         loop=None,
+        timeout: Optional[Union[float, aiohttp.ClientTimeout]] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        pool_size: int = 100,
+        pool_size_per_host: int = 0,
+        keepalive_timeout: Optional[float] = 30,
+        dns_cache_ttl: Optional[int] = 300,
+        force_close: bool = False,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        json_encoder: Optional[Union[str, Encoder]] = None,
+        metrics: Optional[Metrics] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        signer: Optional[Signer] = None,
     ):
+        """
+        `timeout`, `connect_timeout` and `read_timeout` set the default total,
+        connection and socket read timeouts in seconds; `timeout` may also be a
+        ready-made `aiohttp.ClientTimeout`.
+
+        `pool_size`, `pool_size_per_host` (0 for no limit), `keepalive_timeout`
+        and `dns_cache_ttl` tune the `aiohttp.TCPConnector`. Keep `force_close`
+        off so connections are reused back to back; with it on,
+        `keepalive_timeout` is ignored. Pass `connector` to share
+        an existing connection pool instead; it is not closed by this client.
+
+        `rate_limiter` throttles requests client side; share one instance
+        between clients that count against the same limits.
+
+        `cache` caches slowly changing public endpoints (symbols, futures
+        info, insurance fund, system status) for their configured TTL.
+
+        `json_encoder` serializes request bodies, see `codec.get_encoder()`.
+        Bodies are serialized once and the signed bytes are sent unchanged.
+
+        `metrics` records per-endpoint sign, connection acquire, time to first
+        byte and decode latencies, see `orderly_sdk.metrics`.
+
+        `session` reuses an existing `aiohttp.ClientSession`, e.g. one shared
+        by many accounts (see `orderly_sdk.pool.AccountPool`); it is not
+        closed by this client and the pool options above are ignored.
+
+        `signer` signs requests through a shared `signing.Signer`, which moves
+        signatures to a thread pool during bursts.
+        """
         self._id = _id
         self.account_id = account_id
         self.orderly_key = orderly_key
         self.orderly_secret = orderly_secret
         if orderly_secret is not None:
-            self.orderly_private_key = Ed25519PrivateKey.from_private_bytes(
-                base58.b58decode(orderly_secret)[0:32]
-            )
+            self.orderly_private_key = load_private_key(orderly_secret)
         self.endpoint = endpoint
+        self._dumps = get_encoder(json_encoder)
+        # (ep, version) -> (uri, signed path)
+        self._routes: Dict[Tuple[str, str], Tuple[str, str]] = {}
         self.loop = loop or get_loop()
-        self.session = self._init_session()
-        self.headers: Dict[str, str] = defaultdict(str)
-        self.response = None
+        if isinstance(timeout, aiohttp.ClientTimeout):
+            self.client_timeout = timeout
+        else:
+            self.client_timeout = aiohttp.ClientTimeout(
+                total=self.timeout if timeout is None else timeout,
+                connect=connect_timeout,
+                sock_read=read_timeout,
+            )
+        self._owns_connector = connector is None and session is None
+        if session is not None:
+            connector = session.connector
+        elif connector is None:
+            connector = aiohttp.TCPConnector(
+                limit=pool_size,
+                limit_per_host=pool_size_per_host,
+                # aiohttp rejects a keep-alive timeout on closed connections
+                keepalive_timeout=None if force_close else keepalive_timeout,
+                use_dns_cache=dns_cache_ttl != 0,
+                ttl_dns_cache=dns_cache_ttl,
+                force_close=force_close,
+                enable_cleanup_closed=True,
+                loop=self.loop,
+            )
+        self.connector = connector
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.metrics = metrics
+        self.signer = signer
+        self.symbols: Dict[str, Dict] = {}
+        self._symbols_response: Optional[Dict] = None
+        self._owns_session = session is None
+        self.session = self._init_session() if session is None else session
 
     def _get_headers(self) -> Dict:
         headers = {
@@ -63,61 +157,174 @@ class AsyncClient:
         return headers
 
     def _init_session(self) -> aiohttp.ClientSession:
-        return aiohttp.ClientSession(loop=self.loop, headers=self._get_headers())
+        return aiohttp.ClientSession(
+            loop=self.loop,
+            headers=self._get_headers(),
+            connector=self.connector,
+            connector_owner=self._owns_connector,
+            timeout=self.client_timeout,
+            trace_configs=[trace_config()] if self.metrics is not None else None,
+        )
 
     async def close_connection(self):
         """
         Close the connection
         """
-        if self.session:
-            assert self.session
+        if self.session and self._owns_session:
             await self.session.close()
 
+    async def warm_up(self, connections: int = 1):
+        """
+        Open `connections` pooled keep-alive connections ahead of time
+
+        Concurrent requests to the system info endpoint each take their own
+        connection, so the TCP and TLS handshakes are paid here instead of on
+        the first orders.
+        """
+        await asyncio.gather(
+            *(self._get("public/system_info") for _ in range(connections))
+        )
+
+    def _sign(self, data: bytes) -> str:
+        return sign(self.orderly_private_key, data)
+
+    def _signed_headers(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+    ) -> Dict[str, str]:
+        """
+        Build the auth headers for one request
+
+        `path` includes the query string and `body` is the exact payload that
+        is sent. A fresh dict is returned per call so concurrent requests
+        never share signature or timestamp state.
+        """
+        ts, message = self._sign_message(method, path, body)
+        return self._auth_headers(ts, self._sign(message), body)
+
+    async def _signed_headers_async(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+    ) -> Dict[str, str]:
+        """
+        `_signed_headers()` signing through `self.signer`
+        """
+        ts, message = self._sign_message(method, path, body)
+        signature = await self.signer.sign(self.orderly_private_key, message)
+        return self._auth_headers(ts, signature, body)
+
+    @staticmethod
+    def _sign_message(
+        method: str, path: str, body: Optional[bytes]
+    ) -> Tuple[str, bytes]:
+        ts = str(timestamp_ms())
+        message = (ts + method.upper() + path).encode()
+        if body:
+            message += body
+        return ts, message
+
+    def _auth_headers(
+        self, ts: str, signature: str, body: Optional[bytes]
+    ) -> Dict[str, str]:
+        headers = {
+            "orderly-signature": signature,
+            "orderly-key": f"ed25519:{self.orderly_key}",
+            "orderly-timestamp": ts,
+            "Content-Type": (
+                "application/json" if body else "application/x-www-form-urlencoded"
+            ),
+            "Cache-Control": "no-cache",
+        }
+        if self.account_id is not None:
+            headers["orderly-account-id"] = self.account_id
+        return headers
+
     async def _request(
         self,
         method,
         uri: str,
         signed: bool,
         params: Optional[Dict],
-        json: Optional[Dict],
+        json: Optional[Union[Dict, List, bytes]],
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        bucket: Optional[TokenBucket] = None,
+        path: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        handle: Optional[Callable[[aiohttp.ClientResponse], Awaitable]] = None,
+        throttled: float = 0.0,
     ):
-        if signed:
-            ts = round(datetime.datetime.now().timestamp() * 1000)
-            json_str = ""
-            if json is not None:
-                logger.debug(f"request json body: {json}")
-                json_str = jsonlib.dumps(json)
+        """
+        Send one request
+
+        `json` may be pre-serialized bytes. Signed requests carry the query
+        string already encoded in the URL, so the server sees exactly the
+        signed path. `headers` are sent in addition to the auth headers and
+        `handle(response)` replaces `_handle_response()`.
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+        body = None
+        if json is not None:
+            body = json if isinstance(json, bytes) else self._dumps(json)
+        url: Union[str, URL] = uri
+        extra_headers = headers
+        headers = None
+        if path is None and (signed or metrics is not None):
             path = urlparse(uri).path
+        endpoint = path
+        if signed:
             if params:
                 query = urlencode(params)
                 path = f"{path}?{query}"
-            signature_str = f"{ts}{method.upper()}{path}{json_str}"
-            logger.debug(f"request signature: {signature_str}")
-            data_bytes = bytes(signature_str, "utf-8")
-
-            req_signature = base64.b64encode(
-                self.orderly_private_key.sign(data_bytes)
-            ).decode("utf-8")
-
-            self.headers["orderly-signature"] = req_signature
-            if self.account_id is not None:
-                self.headers["orderly-account-id"] = self.account_id
+                url = URL(f"{uri}?{query}", encoded=True)
+                params = None
+            if self.signer is None:
+                headers = self._signed_headers(method, path, body)
             else:
-                pass
-            self.headers["orderly-key"] = f"ed25519:{self.orderly_key}"
-            self.headers["orderly-timestamp"] = str(ts)
-            self.headers["Content-Type"] = (
-                "application/json" if json else "application/x-www-form-urlencoded"
-            )
-            self.headers["Cache-Control"] = "no-cache"
-            self.session.headers.update(self.headers)
-
-        logger.debug("request uri: {}", uri)
-        async with getattr(self.session, method)(
-            uri, params=params, json=json
+                headers = await self._signed_headers_async(method, path, body)
+        elif body is not None:
+            headers = {"Content-Type": "application/json"}
+        if extra_headers:
+            headers = {**headers, **extra_headers} if headers else extra_headers
+        handle = handle or self._handle_response
+
+        if log.debug_enabled():
+            logger.debug("request uri: {}", uri)
+        trace = None
+        if metrics is not None:
+            signed_at = time.perf_counter()
+            trace = {}
+        async with self.session.request(
+            method,
+            url,
+            params=params,
+            data=body,
+            headers=headers,
+            timeout=timeout or self.client_timeout,
+            trace_request_ctx=trace,
         ) as response:
-            self.response = response
-            return await self._handle_response(response)
+            if response.status == 429 and bucket is not None:
+                bucket.drain()
+            if trace is None:
+                return await handle(response)
+            received_at = time.perf_counter()
+            result = await handle(response)
+        done_at = time.perf_counter()
+        labels = (("method", method.upper()), ("endpoint", endpoint))
+        request_at = trace.get("start", signed_at)
+        sent_at = trace.get("sent", request_at)
+        observe = metrics.observe
+        observe("rest_sign_seconds", labels, signed_at - started)
+        observe("rest_acquire_seconds", labels, throttled + sent_at - request_at)
+        observe("rest_ttfb_seconds", labels, received_at - sent_at)
+        observe("rest_decode_seconds", labels, done_at - received_at)
+        observe("rest_request_seconds", labels, throttled + done_at - started)
+        return result
 
     async def _handle_response(self, response: aiohttp.ClientResponse):
         if not str(response.status).startswith("2"):
@@ -133,11 +340,80 @@ class AsyncClient:
             v = self.api_version
         return f"{self.endpoint}/{v}/{ep}"
 
+    def _route(self, ep: str, v: str = "") -> Tuple[str, str]:
+        """
+        URI and signed path of an endpoint, computed once per endpoint
+        """
+        route = self._routes.get((ep, v))
+        if route is None:
+            uri = self._create_rest_uri(ep, v)
+            route = self._routes[(ep, v)] = (uri, urlparse(uri).path)
+        return route
+
     async def _request_api(
-        self, method, ep: str, signed: bool, v: str = "", params=None, json=None
+        self,
+        method,
+        ep: str,
+        signed: bool,
+        v: str = "",
+        params=None,
+        json=None,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        headers: Optional[Dict[str, str]] = None,
+        handle: Optional[Callable[[aiohttp.ClientResponse], Awaitable]] = None,
     ):
-        uri = self._create_rest_uri(ep, v)
-        return await self._request(method, uri, signed, params=params, json=json)
+        bucket = None
+        throttled = 0.0
+        if self.rate_limiter is not None:
+            if self.metrics is None:
+                bucket = await self.rate_limiter.acquire(method, ep)
+            else:
+                waiting = time.perf_counter()
+                bucket = await self.rate_limiter.acquire(method, ep)
+                throttled = time.perf_counter() - waiting
+        uri, path = self._route(ep, v)
+        return await self._request(
+            method,
+            uri,
+            signed,
+            params=params,
+            json=json,
+            timeout=timeout,
+            bucket=bucket,
+            path=path,
+            headers=headers,
+            handle=handle,
+            throttled=throttled,
+        )
+
+    async def _fetch_cacheable(
+        self, ep: str, params: Optional[Dict], etag: Optional[str]
+    ):
+        async def handle(response: aiohttp.ClientResponse):
+            if response.status == 304:
+                return None, etag, True
+            data = await self._handle_response(response)
+            cacheable = isinstance(data, dict) and bool(data.get("success"))
+            return data, response.headers.get("ETag"), cacheable
+
+        return await self._request_api(
+            "get",
+            ep,
+            False,
+            params=params,
+            headers={"If-None-Match": etag} if etag else None,
+            handle=handle,
+        )
+
+    async def _get_cached(self, ep: str, params: Optional[Dict] = None):
+        cache = self.cache
+        ttl = cache.ttl_for(ep) if cache is not None else None
+        if ttl is None:
+            return await self._get(ep, params=params)
+        key = (ep, tuple(sorted(params.items())) if params else ())
+        return await cache.get_or_fetch(
+            key, ttl, lambda etag: self._fetch_cacheable(ep, params, etag)
+        )
 
     async def _get(self, ep, signed=False, v: str = "", params=None, json=None):
         return await self._request_api("get", ep, signed, v, params, json)
@@ -156,7 +432,7 @@ class AsyncClient:
         Get System Maintenance Status
         https://orderly.network/docs/build-on-evm/evm-api/restful-api/public/get-system-maintenance-status
         """
-        return await self._get("public/system_info")
+        return await self._get_cached("public/system_info")
 
     async def get_user_statistics(self) -> Dict:
         """
@@ -165,13 +441,24 @@ class AsyncClient:
         """
         return await self._get("client/statistics", True)
 
-    async def create_order(self, json: Dict) -> Dict:
+    async def create_order(self, json: Union[Dict, bytes]) -> Dict:
         """
         Create Order
         https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/create-order
+
+        `json` may also be a body rendered by an `OrderTemplate`.
         """
         return await self._post("order", True, json=json)
 
+    def order_template(self, **fields) -> OrderTemplate:
+        """
+        Template for orders that only differ in price, quantity and client
+        order id, serialized with this client's encoder
+
+        `await client.create_order(template.render(price, qty, coid))`
+        """
+        return OrderTemplate(fields, encoder=self._dumps)
+
     async def claim_liquidated_positions(self, json: Dict) -> Dict:
         """
         Claim Liquidated Positions
@@ -212,21 +499,71 @@ class AsyncClient:
         Get Insurance Fund Info
         https://orderly.network/docs/build-on-evm/evm-api/restful-api/public/get-insurance-fund-info
         """
-        return await self._get("public/insurancefund")
+        return await self._get_cached("public/insurancefund")
 
     async def get_available_symbols(self) -> Dict:
         """
         Get Available Symbols
         https://orderly.network/docs/build-on-evm/evm-api/restful-api/public/get-available-symbols
         """
-        return await self._get("public/info")
+        return await self._get_cached("public/info")
 
     async def get_futures_for_one_market(self, symbol) -> Dict:
         """
         Get Futures Info for One Market
         https://orderly.network/docs/build-on-evm/evm-api/restful-api/public/get-futures-info-for-one-market
         """
-        return await self._get("public/futures/" + symbol)
+        return await self._get_cached("public/futures/" + symbol)
+
+    async def load_symbols(self, refresh: bool = False) -> Dict[str, Dict]:
+        """
+        Build the symbol metadata index from get_available_symbols
+
+        `symbols` maps each symbol to its row (quote_tick, base_tick,
+        base_min, quote_min, min_notional, ...). Without a cache the index is
+        only fetched once unless `refresh` is set; with a cache it is rebuilt
+        whenever the cached response changes.
+        """
+        if self.symbols and not refresh and self.cache is None:
+            return self.symbols
+        if refresh and self.cache is not None:
+            self.cache.invalidate("public/info")
+        response = await self.get_available_symbols()
+        if response is not self._symbols_response:
+            if not response.get("success"):
+                raise OrderlyAPIException(response, None)
+            rows = (response.get("data") or {}).get("rows") or ()
+            self.symbols = {row["symbol"]: row for row in rows}
+            self._symbols_response = response
+        return self.symbols
+
+    def symbol_info(self, symbol: str) -> Optional[Dict]:
+        """
+        Metadata of a symbol from the index built by load_symbols
+        """
+        return self.symbols.get(symbol)
+
+    async def get_market_trades(self, symbol: str, limit: Optional[int] = None) -> Dict:
+        """
+        Get Market Trades
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/public/get-market-trades
+        """
+        params = {"symbol": symbol}
+        if limit is not None:
+            params["limit"] = limit
+        return await self._get("public/market_trades", params=params)
+
+    async def get_kline(
+        self, symbol: str, type: str, limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Get Kline
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/get-kline
+        """
+        params = {"symbol": symbol, "type": type}
+        if limit is not None:
+            params["limit"] = limit
+        return await self._get("kline", True, params=params)
 
     async def get_current_holding(self) -> Dict:
         """
@@ -251,3 +588,271 @@ class AsyncClient:
         params = {"order_ids": formatted_order_ids}
 
         return await self._delete("batch-order", True, params=params)
+
+    def _chunks(self, items: Sequence, size: Optional[int]) -> List[Sequence]:
+        size = size or self.batch_size
+        return [items[i : i + size] for i in range(0, len(items), size)]
+
+    async def _gather_chunks(self, calls, max_concurrency: Optional[int]):
+        if max_concurrency is None:
+            return await asyncio.gather(*calls, return_exceptions=True)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(call):
+            async with semaphore:
+                return await call
+
+        return await asyncio.gather(
+            *(bounded(call) for call in calls), return_exceptions=True
+        )
+
+    @staticmethod
+    def _chunk_error(response: Any) -> Optional[str]:
+        if isinstance(response, BaseException):
+            return str(response)
+        if not response.get("success"):
+            return response.get("message") or str(response)
+        return None
+
+    async def batch_create_orders(
+        self,
+        orders: List[Dict],
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        Batch Create Orders, split into chunks sent concurrently
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/batch-create-order
+
+        Returns {"success", "data": {"rows"}, "errors"} where rows line up with
+        `orders`; orders of a failed chunk get a row with `error_message` set.
+        """
+        chunks = self._chunks(orders, chunk_size)
+        responses = await self._gather_chunks(
+            [self._post("batch-order", True, json={"orders": c}) for c in chunks],
+            max_concurrency,
+        )
+        rows: List[Dict] = []
+        errors: List[Dict] = []
+        for chunk, response in zip(chunks, responses):
+            error = self._chunk_error(response)
+            if error is None:
+                rows.extend(response["data"]["rows"])
+                continue
+            errors.append({"orders": chunk, "error": error})
+            rows.extend(
+                {"client_order_id": o.get("client_order_id"), "error_message": error}
+                for o in chunk
+            )
+        return {"success": not errors, "data": {"rows": rows}, "errors": errors}
+
+    async def _bulk_cancel(
+        self,
+        ep: str,
+        key: str,
+        ids: List[str],
+        chunk_size: Optional[int],
+        max_concurrency: Optional[int],
+    ) -> Dict:
+        chunks = self._chunks(ids, chunk_size)
+        responses = await self._gather_chunks(
+            [self._delete(ep, True, params={key: ",".join(c)}) for c in chunks],
+            max_concurrency,
+        )
+        rows: List[Dict] = []
+        errors: List[Dict] = []
+        for chunk, response in zip(chunks, responses):
+            error = self._chunk_error(response)
+            if error is not None:
+                errors.append({key: chunk, "error": error})
+            rows.extend(
+                {key[:-1]: _id, "success": error is None, "error_message": error}
+                for _id in chunk
+            )
+        return {"success": not errors, "data": {"rows": rows}, "errors": errors}
+
+    async def bulk_cancel_orders(
+        self,
+        order_ids: List[str],
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        Cancel any number of orders by order id, chunked over batch_cancel_orders
+
+        Returns {"success", "data": {"rows"}, "errors"} with one row per id.
+        """
+        return await self._bulk_cancel(
+            "batch-order", "order_ids", order_ids, chunk_size, max_concurrency
+        )
+
+    async def bulk_cancel_orders_by_client_order_id(
+        self,
+        client_order_ids: List[str],
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict:
+        """
+        Cancel any number of orders by client order id, in concurrent chunks
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/batch-cancel-orders-by-client_order_id
+        """
+        return await self._bulk_cancel(
+            "client/batch-order",
+            "client_order_ids",
+            client_order_ids,
+            chunk_size,
+            max_concurrency,
+        )
+
+    async def cancel_all_orders(self, symbol: Optional[str] = None) -> Dict:
+        """
+        Cancel All Pending Orders, optionally only for one symbol
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/cancel-all-pending-orders
+        """
+        params = {"symbol": symbol} if symbol else None
+        return await self._delete("orders", True, params=params)
+
+    async def get_orders(self, params=None) -> Dict:
+        """
+        Get Orders
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/get-orders
+        """
+        return await self._get("orders", True, params=params)
+
+    async def get_trades(self, params=None) -> Dict:
+        """
+        Get Trades
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/get-trades
+        """
+        return await self._get("trades", True, params=params)
+
+    async def get_funding_fee_history(self, params=None) -> Dict:
+        """
+        Get Funding Fee History
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/get-funding-fee-history
+        """
+        return await self._get("funding_fee/history", True, params=params)
+
+    async def get_settlement_history(self, params=None) -> Dict:
+        """
+        Get PnL Settlement History
+        https://orderly.network/docs/build-on-evm/evm-api/restful-api/private/get-pnl-settlement-history
+        """
+        return await self._get("pnl_settlement/history", True, params=params)
+
+    async def _get_page(self, ep: str, signed: bool, params: Dict, page: int):
+        response = await self._get(ep, signed, params={**params, "page": page})
+        if not response.get("success"):
+            raise OrderlyAPIException(response, None)
+        return response["data"]
+
+    async def _iter_pages(
+        self,
+        ep: str,
+        signed: bool,
+        params: Optional[Dict],
+        page_size: Optional[int],
+        prefetch: int,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield rows of a paged endpoint lazily
+
+        Up to `prefetch` pages are requested ahead of the consumer. Once the
+        first page reports a total, the known page range is fetched in
+        parallel within that window; otherwise paging stops at a short page.
+        """
+        size = page_size or self.page_size
+        params = {**(params or {}), "size": size}
+        pending: List[asyncio.Task] = []
+        try:
+            data = await self._get_page(ep, signed, params, 1)
+            total = (data.get("meta") or {}).get("total")
+            last_page = -(-total // size) if total is not None else None
+            page = 1
+            next_page = 2
+            while True:
+                rows = data.get("rows") or []
+                if last_page is not None:
+                    more = page < last_page
+                else:
+                    more = len(rows) >= size
+                while more and len(pending) < prefetch:
+                    if last_page is None and pending:
+                        break
+                    if last_page is not None and next_page > last_page:
+                        break
+                    task = self._get_page(ep, signed, params, next_page)
+                    pending.append(asyncio.create_task(task))
+                    next_page += 1
+                for row in rows:
+                    yield row
+                if not more:
+                    return
+                if pending:
+                    data = await pending.pop(0)
+                else:
+                    data = await self._get_page(ep, signed, params, next_page)
+                    next_page += 1
+                page += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                # let the cancelled requests release their connections
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def iter_orders(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over all orders matching `params`, see get_orders
+        """
+        return self._iter_pages("orders", True, params, page_size, prefetch)
+
+    def iter_trades(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over all trades matching `params`, see get_trades
+        """
+        return self._iter_pages("trades", True, params, page_size, prefetch)
+
+    def iter_funding_fee_history(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over funding fee history, see get_funding_fee_history
+        """
+        return self._iter_pages(
+            "funding_fee/history", True, params, page_size, prefetch
+        )
+
+    def iter_settlement_history(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over PnL settlement history, see get_settlement_history
+        """
+        return self._iter_pages(
+            "pnl_settlement/history", True, params, page_size, prefetch
+        )
+
+    def iter_liquidated_positions(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over liquidated positions, see get_liquidated_positions
+        """
+        return self._iter_pages(
+            "public/liquidated_positions", False, params, page_size, prefetch
+        )
+
+    def iter_liquidation(
+        self, params=None, page_size: Optional[int] = None, prefetch: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Iterate over positions under liquidation, see get_liquidation
+        """
+        return self._iter_pages(
+            "public/liquidation", False, params, page_size, prefetch
+        )
@@ -0,0 +1,310 @@
+"""
+Running the SDK on a background thread for synchronous code
+
+`LoopRunner` hosts an event loop (uvloop when installed) on a dedicated
+thread. Websocket managers and REST clients created on it keep the whole
+async fast path, while threaded or synchronous code reads topic messages
+from `RingBuffer` bridges and calls REST methods through `BlockingClient`,
+either blocking or as `concurrent.futures.Future`s:
+
+    with LoopRunner() as runner:
+        ws = runner.create(OrderlyPublicWsManager, endpoint=...)
+        bbo = runner.bridge(ws, "PERP_ETH_USDC@bbo")
+        ws.start()
+        client = runner.client(endpoint=..., orderly_key=..., orderly_secret=...)
+        client.create_order({...})
+        future = client.futures.get_all_positions()
+        message = bbo.get(timeout=1)
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+from collections import deque
+from queue import Empty
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from .helpers import cancel_tasks
+from .log import logger
+
+
+async def _collect(rows: AsyncIterator) -> List[Any]:
+    return [row async for row in rows]
+
+
+def _awaitable(result: Any) -> Awaitable:
+    """
+    A coroutine as is, an async generator drained into a list
+    """
+    return _collect(result) if inspect.isasyncgen(result) else result
+
+
+def new_event_loop(use_uvloop: Optional[bool] = None) -> asyncio.AbstractEventLoop:
+    """
+    A new uvloop loop if available (or required with `use_uvloop=True`),
+    else a default asyncio loop
+    """
+    if use_uvloop is not False:
+        try:
+            import uvloop
+
+            return uvloop.new_event_loop()
+        except ImportError:
+            if use_uvloop:
+                raise
+    return asyncio.new_event_loop()
+
+
+class RingBuffer:
+    """
+    Bounded buffer handing messages from the loop thread to other threads
+
+    `put()` never blocks: once `capacity` items are buffered the oldest is
+    dropped and counted in `dropped`. Appends and pops rely on the atomicity
+    of `collections.deque`, so the lock is only taken to wake consumers that
+    are actually waiting.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._items: deque = deque(maxlen=capacity)
+        self._ready = threading.Condition(threading.Lock())
+        self._waiting = 0
+        self.dropped = 0
+
+    def put(self, item: Any):
+        """
+        Append an item, dropping the oldest when full
+        """
+        if len(self._items) == self.capacity:
+            self.dropped += 1
+        self._items.append(item)
+        if self._waiting:
+            with self._ready:
+                self._ready.notify()
+
+    def get_nowait(self) -> Any:
+        """
+        Pop the oldest item, raising `queue.Empty` if there is none
+        """
+        try:
+            return self._items.popleft()
+        except IndexError:
+            raise Empty from None
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Pop the oldest item, waiting up to `timeout` seconds (forever if
+        None) and raising `queue.Empty` when none arrived
+        """
+        try:
+            return self._items.popleft()
+        except IndexError:
+            pass
+        with self._ready:
+            self._waiting += 1
+            try:
+                # an item put before `_waiting` was raised is seen here
+                if self._ready.wait_for(lambda: self._items, timeout):
+                    return self._items.popleft()
+            finally:
+                self._waiting -= 1
+        raise Empty
+
+    def drain(self, max_items: Optional[int] = None) -> List[Any]:
+        """
+        Pop up to `max_items` (all if None) buffered items without waiting
+        """
+        items = []
+        pop = self._items.popleft
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(pop())
+            except IndexError:
+                break
+        return items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class LoopRunner:
+    """
+    Event loop running on a dedicated daemon thread
+    """
+
+    def __init__(self, use_uvloop: Optional[bool] = None, name: str = "orderly-loop"):
+        self.loop = new_event_loop(use_uvloop)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the loop and return its future
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and block until its result
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run() would block the runner's own loop")
+        return self.submit(coro).result(timeout)
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Call `fn` on the loop thread and block until it returns
+        """
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def call():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.loop.call_soon_threadsafe(call)
+        return future.result()
+
+    def create(self, cls: Callable, *args, **kwargs) -> Any:
+        """
+        Construct an SDK object (websocket manager, `AsyncClient`, ...) on the
+        loop thread, bound to the runner's loop
+        """
+        return self.call(cls, *args, loop=self.loop, **kwargs)
+
+    def client(self, *args, **kwargs) -> "BlockingClient":
+        """
+        `AsyncClient` on the runner's loop, wrapped for synchronous callers
+        """
+        from .rest import AsyncClient
+
+        return BlockingClient(self, self.create(AsyncClient, *args, **kwargs))
+
+    def bridge(self, ws: Any, topic: str, capacity: int = 10000) -> RingBuffer:
+        """
+        Buffer every message of `topic` on `ws` for other threads
+
+        Subscribes the topic right away when `ws` is already connected.
+        """
+        buffer = RingBuffer(capacity)
+
+        async def install():
+            ws.add_listener(topic, lambda data, ts: buffer.put(data))
+
+        self.run(install())
+        return buffer
+
+    def stop(self, timeout: Optional[float] = 5):
+        """
+        Cancel the remaining tasks, stop the loop and join its thread
+        """
+        if not self.running:
+            return
+        try:
+            self.run(cancel_tasks(), timeout)
+        except Exception as e:
+            logger.warning("runner shutdown: {}", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+    def __enter__(self) -> "LoopRunner":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class _FutureMethods:
+    __slots__ = ("_blocking",)
+
+    def __init__(self, blocking: "BlockingClient"):
+        self._blocking = blocking
+
+    def __getattr__(self, name: str) -> Callable[..., concurrent.futures.Future]:
+        method = getattr(self._blocking.client, name)
+        submit = self._blocking.runner.submit
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            future: concurrent.futures.Future
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                future = concurrent.futures.Future()
+                future.set_exception(e)
+                return future
+            if inspect.isawaitable(result) or inspect.isasyncgen(result):
+                return submit(_awaitable(result))
+            # plain methods already ran here, hand back a completed future
+            future = concurrent.futures.Future()
+            future.set_result(result)
+            return future
+
+        return call
+
+
+class BlockingClient:
+    """
+    Synchronous view of an `AsyncClient` hosted by a `LoopRunner`
+
+    Coroutine methods block the calling thread until the response arrives;
+    `client.futures.<method>(...)` returns a `concurrent.futures.Future`
+    instead, already completed for plain methods. Any number of threads may
+    call it concurrently; the requests all share the client's connection
+    pool on the runner's loop.
+
+    The paging `iter_*` methods cannot be iterated across threads, so they
+    are drained on the loop and return a list of every row; narrow them
+    with `params` on long histories.
+    """
+
+    timeout: Optional[float] = None
+
+    def __init__(self, runner: LoopRunner, client: Any):
+        self.runner = runner
+        self.client = client
+        self.futures = _FutureMethods(self)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        run = self.runner.run
+        if inspect.iscoroutinefunction(attr):
+
+            @functools.wraps(attr)
+            def call(*args, **kwargs):
+                return run(attr(*args, **kwargs), self.timeout)
+
+            return call
+        if not inspect.ismethod(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call_sync(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if inspect.isasyncgen(result):
+                return run(_collect(result), self.timeout)
+            return result
+
+        return call_sync
+
+    def close(self):
+        """
+        Close the client's session
+        """
+        self.runner.run(self.client.close_connection())
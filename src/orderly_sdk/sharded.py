@@ -0,0 +1,414 @@
+"""
+Public websocket manager sharded over several connections
+
+Topics are grouped by symbol (the part before "@") so that all streams of a
+symbol share one connection, and groups are spread over `shards` connections
+by hash or by weight. Every shard runs its own receive and decode loop, either
+on the caller's event loop or, with `threaded=True`, on a dedicated thread.
+Consumers use one merged `subscribe()`/`recv()` interface.
+"""
+
+import asyncio
+import threading
+import zlib
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from .codec import Decoder
+from .helpers import cancel_tasks, get_loop
+from .log import logger
+from .metrics import Metrics
+from .queues import BLOCK, TopicQueue
+from .ws import OrderlyPublicWsManager
+
+HASH = "hash"
+WEIGHT = "weight"
+
+# topic kind (suffix after "@", without parameters) -> relative message rate
+DEFAULT_TOPIC_WEIGHTS: Dict[str, float] = {
+    "orderbookupdate": 5,
+    "trade": 2,
+    "orderbook": 2,
+    "bbo": 1,
+    "ticker": 1,
+    "kline": 1,
+}
+
+
+def topic_group(topic: str) -> str:
+    """
+    Sharding key of a topic: its symbol, or the topic itself for global topics
+    """
+    group, _, _ = topic.partition("@")
+    return group
+
+
+class ShardedPublicWsManager:
+    """
+    Orderly public websocket client spreading topics over several connections
+    """
+
+    def __init__(
+        self,
+        shards: int = 2,
+        _id="WS_PUBLIC",
+        account_id="",
+        endpoint="",
+        loop=None,
+        policy: Union[str, Callable[[str, int], int]] = HASH,
+        topic_weights: Optional[Dict[str, float]] = None,
+        threaded: bool = False,
+        json_decoder: Optional[Union[str, Decoder]] = None,
+        typed: bool = False,
+        number_type: type = float,
+        metrics: Optional[Metrics] = None,
+    ):
+        """
+        `policy` is "hash" (stable crc32 of the symbol), "weight" (least
+        loaded shard by `topic_weights`, rebalanced when topics go away) or a
+        callable `(group, shards) -> shard index`.
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.loop = loop or get_loop()
+        self.policy = policy
+        self.topic_weights = (
+            DEFAULT_TOPIC_WEIGHTS if topic_weights is None else topic_weights
+        )
+        self.threaded = threaded
+        self._threads: List[threading.Thread] = []
+        self.shards: List[OrderlyPublicWsManager] = []
+        for i in range(shards):
+            shard_loop = self.loop
+            if threaded:
+                shard_loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=shard_loop.run_forever,
+                    name=f"orderly-ws-shard-{i}",
+                    daemon=True,
+                )
+                self._threads.append(thread)
+            self.shards.append(
+                OrderlyPublicWsManager(
+                    _id=f"{_id}_{i}",
+                    account_id=account_id,
+                    endpoint=endpoint,
+                    loop=shard_loop,
+                    json_decoder=json_decoder,
+                    typed=typed,
+                    number_type=number_type,
+                    metrics=metrics,
+                )
+            )
+        self.queues: Dict[str, TopicQueue] = {}
+        self.listeners: DefaultDict[str, List[Callable[[Any, int], None]]] = (
+            defaultdict(list)
+        )
+        # group -> shard index, group -> subscribed topics
+        self.assignments: Dict[str, int] = {}
+        self._group_topics: DefaultDict[str, Set[str]] = defaultdict(set)
+        # topic -> (shard index, shard level listener, subscribed)
+        self._installed: Dict[str, tuple] = {}
+        self._started = False
+
+    def _weight(self, topic: str) -> float:
+        kind = topic.rpartition("@")[2].partition("_")[0]
+        return self.topic_weights.get(kind, 1)
+
+    def _group_weight(self, group: str) -> float:
+        return sum(self._weight(t) for t in self._group_topics.get(group, ()))
+
+    def loads(self) -> List[float]:
+        """
+        Total topic weight assigned to each shard
+        """
+        loads = [0.0] * len(self.shards)
+        for group, index in self.assignments.items():
+            loads[index] += self._group_weight(group)
+        return loads
+
+    def _pick_shard(self, group: str) -> int:
+        if callable(self.policy):
+            return self.policy(group, len(self.shards)) % len(self.shards)
+        if self.policy == WEIGHT:
+            loads = self.loads()
+            return loads.index(min(loads))
+        return zlib.crc32(group.encode()) % len(self.shards)
+
+    def shard_for(self, topic: str) -> OrderlyPublicWsManager:
+        """
+        Shard serving a topic, assigning its group if needed
+        """
+        group = topic_group(topic)
+        index = self.assignments.get(group)
+        if index is None:
+            index = self.assignments[group] = self._pick_shard(group)
+        return self.shards[index]
+
+    def _deliver(self, topic: str, data: Any, ts: int):
+        for callback in self.listeners.get(topic, ()):
+            callback(data, ts)
+        queue = self.queues.get(topic)
+        if queue is None:
+            return
+        if queue.policy == BLOCK and queue.full():
+            # receive loops never block on consumers; keep the message
+            self.loop.create_task(queue.put(data))
+        else:
+            queue.put_nowait(data)
+
+    def _make_forwarder(self, shard: OrderlyPublicWsManager, topic: str):
+        typed = shard._typed
+        if not self.threaded:
+
+            def forward(data, ts):
+                if typed is not None and topic in self.queues:
+                    data = typed.convert(topic, data, ts)
+                self._deliver(topic, data, ts)
+
+            return forward
+
+        call_soon = self.loop.call_soon_threadsafe
+
+        def forward_threadsafe(data, ts):
+            if typed is not None and topic in self.queues:
+                data = typed.convert(topic, data, ts)
+            call_soon(self._deliver, topic, data, ts)
+
+        return forward_threadsafe
+
+    def _on_shard(self, shard: OrderlyPublicWsManager, fn: Callable, *args):
+        """
+        Run `fn(*args)` on the shard's loop thread, which owns its listener
+        and topic state
+        """
+        if shard.loop is self.loop:
+            fn(*args)
+        else:
+            shard.loop.call_soon_threadsafe(fn, *args)
+
+    @staticmethod
+    def _shard_uninstall(
+        shard: OrderlyPublicWsManager, topic: str, forwarder: Callable, send: bool
+    ):
+        shard.remove_listener(topic, forwarder)
+        if topic in shard.listeners:
+            return
+        # drops the shard queue and keeps late frames and reconnects from
+        # bringing the topic back
+        if shard._forget(topic) and send and shard._connected:
+            message = {"id": shard._id, "event": "unsubscribe", "topic": topic}
+            shard.loop.create_task(shard.send_json(message))
+
+    def _install(self, topic: str, subscribe: bool = True):
+        if topic in self._installed:
+            return
+        shard = self.shard_for(topic)
+        index = self.shards.index(shard)
+        forwarder = self._make_forwarder(shard, topic)
+        self._on_shard(shard, shard.add_listener, topic, forwarder, subscribe)
+        self._installed[topic] = (index, forwarder, subscribe)
+        if subscribe:
+            self._group_topics[topic_group(topic)].add(topic)
+
+    def _uninstall(self, topic: str, send: bool = True):
+        installed = self._installed.pop(topic, None)
+        if installed is None:
+            return
+        index, forwarder, subscribe = installed
+        shard = self.shards[index]
+        self._on_shard(
+            shard, self._shard_uninstall, shard, topic, forwarder, send and subscribe
+        )
+        if subscribe:
+            group = topic_group(topic)
+            topics = self._group_topics[group]
+            topics.discard(topic)
+            if not topics:
+                self._group_topics.pop(group, None)
+                if not any(topic_group(t) == group for t in self._installed):
+                    self.assignments.pop(group, None)
+
+    def subscribe(
+        self,
+        topic,
+        maxsize: int = 0,
+        policy: str = BLOCK,
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ):
+        """
+        Subscribe to a topic, see `WsTopicManager.subscribe()`
+
+        Can be called before or after `start()`. Subscribing again keeps the
+        existing queue.
+        """
+        queue = self.queues.get(topic)
+        if queue is not None:
+            if (queue.maxsize, queue.policy) != (maxsize, policy):
+                logger.warning("{} is already subscribed, keeping its queue", topic)
+        else:
+            self.queues[topic] = TopicQueue(maxsize, policy, key)
+        self._install(topic)
+
+    def add_listener(self, topic, callback: Callable[[Any, int], None], subscribe=True):
+        """
+        Call `callback(data, ts)` for every message on a topic
+
+        Callbacks always run on this manager's loop, also in threaded mode.
+        """
+        self.listeners[topic].append(callback)
+        self._install(topic, subscribe)
+
+    def remove_listener(self, topic, callback: Callable[[Any, int], None]):
+        """
+        Remove a listener added with `add_listener()`
+        """
+        callbacks = self.listeners.get(topic)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.listeners.pop(topic, None)
+            if topic not in self.queues:
+                self._uninstall(topic)
+                self._maybe_rebalance()
+
+    async def unsubscribe(self, topic):
+        """
+        Unsubscribe from a topic
+        """
+        self.queues.pop(topic, None)
+        if topic not in self.listeners:
+            self._uninstall(topic)
+            self._maybe_rebalance()
+
+    async def request(self, symbol: str):
+        """
+        Request an orderbook snapshot on the shard of the symbol
+        """
+        topic = symbol + "@orderbook"
+        self._install(topic, subscribe=False)
+        shard = self.shard_for(topic)
+        if self.threaded:
+            future = asyncio.run_coroutine_threadsafe(shard.request(symbol), shard.loop)
+            await asyncio.wrap_future(future)
+        else:
+            await shard.request(symbol)
+
+    async def recv(self, topic, timeout=10):
+        """
+        Receive a message from a topic
+        """
+        queue = self.queues.get(topic)
+        if queue is None:
+            queue = self.queues[topic] = TopicQueue()
+        res = None
+        while not res:
+            try:
+                res = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.info("no message in {} seconds", timeout)
+        return res
+
+    def add_connection_listener(self, callback: Callable[[str, Dict], None]):
+        """
+        Call `callback(event, info)` on connection events of any shard,
+        see `WsTopicManager.add_connection_listener()`; `info["shard"]` is
+        the shard index
+        """
+        for index, shard in enumerate(self.shards):
+
+            def forward(event, info, index=index):
+                info = {**info, "shard": index}
+                if self.threaded:
+                    self.loop.call_soon_threadsafe(callback, event, info)
+                else:
+                    callback(event, info)
+
+            shard.add_connection_listener(forward)
+
+    def queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Depth and dropped/conflated counters of every topic queue
+        """
+        return {topic: queue.stats() for topic, queue in self.queues.items()}
+
+    def _move_group(self, group: str, index: int):
+        topics = [t for t in self._installed if topic_group(t) == group]
+        subscribed = {t: self._installed[t][2] for t in topics}
+        for topic in topics:
+            self._uninstall(topic)
+        self.assignments[group] = index
+        for topic in topics:
+            self._install(topic, subscribed[topic])
+
+    def _maybe_rebalance(self):
+        if self.policy == WEIGHT:
+            self.rebalance()
+
+    def rebalance(self) -> int:
+        """
+        Move symbol groups off the most loaded shards while that lowers the
+        peak load; returns the number of groups moved
+        """
+        moved = 0
+        while True:
+            loads = self.loads()
+            high = loads.index(max(loads))
+            low = loads.index(min(loads))
+            groups = [
+                g
+                for g, i in self.assignments.items()
+                if i == high and g in self._group_topics
+            ]
+            if not groups:
+                return moved
+            group = min(groups, key=self._group_weight)
+            weight = self._group_weight(group)
+            if loads[low] + weight >= loads[high]:
+                return moved
+            self._move_group(group, low)
+            moved += 1
+
+    def start(self, timeout: Optional[int | float] = None, **kwargs):
+        """
+        Start every shard connection
+        """
+        for thread in self._threads:
+            if not thread.is_alive():
+                thread.start()
+        for shard in self.shards:
+            shard.start(timeout, **kwargs)
+        self._started = True
+
+    def stop(self, timeout: Optional[float] = 5):
+        """
+        Stop the shard threads started in threaded mode
+
+        The connection and handler tasks of each shard are cancelled and
+        awaited on its own loop before that loop is stopped and closed.
+        """
+        shards = [shard for shard in self.shards if shard.loop is not self.loop]
+        for shard, thread in zip(shards, self._threads):
+            if thread.is_alive():
+                future = asyncio.run_coroutine_threadsafe(cancel_tasks(), shard.loop)
+                try:
+                    future.result(timeout)
+                except Exception as e:
+                    logger.warning("shard shutdown: {}", e)
+                shard.loop.call_soon_threadsafe(shard.loop.stop)
+        for shard, thread in zip(shards, self._threads):
+            if thread.is_alive():
+                thread.join(timeout)
+            if not thread.is_alive():
+                shard.loop.close()
+        self._started = False
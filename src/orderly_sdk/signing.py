@@ -0,0 +1,92 @@
+"""
+Module for ed25519 request signing in Orderly SDK
+
+`cryptography` and `base58` are only imported when a secret is loaded, so
+public-data clients never pay for them and they can be left out with a
+public-only install.
+"""
+
+import asyncio
+import binascii
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Optional
+
+
+def load_private_key(orderly_secret: str) -> Any:
+    """
+    Load the ed25519 private key of a base58 encoded orderly secret
+    """
+    try:
+        import base58
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+            Ed25519PrivateKey,
+        )
+    except ImportError as e:
+        raise ImportError(
+            "signing requires cryptography and base58: "
+            'pip install "orderly-sdk[private]"'
+        ) from e
+    return Ed25519PrivateKey.from_private_bytes(base58.b58decode(orderly_secret)[0:32])
+
+
+def sign(private_key: Any, data: bytes) -> str:
+    """
+    Base64 encoded ed25519 signature of `data`
+    """
+    return binascii.b2a_base64(private_key.sign(data), newline=False).decode()
+
+
+class Signer:
+    """
+    Signs inline on the event loop until a burst, then on a thread pool
+
+    Up to `burst` signatures per `window` seconds are computed inline, where
+    they are cheapest; further ones in the same window go to `executor`
+    (a `ThreadPoolExecutor` of `workers` threads by default). The ed25519
+    backend holds the GIL, so offloading adds no throughput; it keeps a large
+    burst of orders from stalling the loop for its whole duration, letting
+    sockets be read in between. Share one instance between clients.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        workers: int = 2,
+        burst: int = 50,
+        window: float = 0.01,
+    ):
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            workers, thread_name_prefix="orderly-sign"
+        )
+        self.burst = burst
+        self.window = window
+        self._window_start = 0.0
+        self._window_count = 0
+        self.inline = 0
+        self.offloaded = 0
+
+    async def sign(self, private_key: Any, data: bytes) -> str:
+        """
+        Base64 encoded ed25519 signature of `data`
+        """
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+        if self._window_count <= self.burst:
+            self.inline += 1
+            return sign(private_key, data)
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, sign, private_key, data
+        )
+
+    def close(self):
+        """
+        Shut down the thread pool if this signer created it
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,69 @@
+"""
+Per-consumer async iterator views over websocket topics
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional
+
+from .queues import DROP_OLDEST, TopicQueue
+
+if TYPE_CHECKING:
+    from .ws import WsTopicManager
+
+
+class TopicStream:
+    """
+    One consumer's bounded view of a topic
+
+    Use as `async with manager.stream(topic) as s: async for msg in s: ...`.
+    Every open stream of a topic receives the same decoded message object,
+    so treat messages as read-only.
+    """
+
+    def __init__(
+        self,
+        manager: "WsTopicManager",
+        topic: str,
+        maxsize: int = 1000,
+        policy: str = DROP_OLDEST,
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ):
+        self.manager = manager
+        self.topic = topic
+        self.queue = TopicQueue(maxsize, policy, key)
+        self.closed = False
+
+    async def __aenter__(self) -> "TopicStream":
+        await self.manager._open_stream(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __aiter__(self) -> "TopicStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed:
+            raise StopAsyncIteration
+        return await self.queue.get()
+
+    async def recv(self, timeout: Optional[float] = None) -> Any:
+        """
+        Receive the next message, raising `asyncio.TimeoutError` after `timeout`
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+
+    async def close(self):
+        """
+        Detach from the topic; the last stream unsubscribes it
+        """
+        if not self.closed:
+            self.closed = True
+            await self.manager._close_stream(self)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth and dropped/conflated counters of this view
+        """
+        return self.queue.stats()
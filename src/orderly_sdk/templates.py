@@ -0,0 +1,85 @@
+"""
+Pre-serialized order bodies
+
+An `OrderTemplate` serializes the fixed fields of an order (symbol, side,
+type, ...) once; `render()` only appends the fields that change per order
+and returns the JSON bytes that `AsyncClient.create_order()` signs and sends
+unchanged.
+"""
+
+import math
+import re
+from decimal import Decimal
+from typing import Any, Dict, Optional, Union
+
+from .codec import Encoder, get_encoder
+
+Number = Union[int, float, Decimal, str]
+
+# JSON number literals only, as strings are spliced into the body unquoted
+_DECIMAL = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def _number(value: Number) -> bytes:
+    if isinstance(value, str):
+        # keep the caller's formatting, but only if it is a number
+        if _DECIMAL.fullmatch(value) is None:
+            raise ValueError(f"not a decimal number: {value!r}")
+        return value.encode()
+    if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+        raise TypeError(f"not a number: {value!r}")
+    if isinstance(value, int):
+        return str(value).encode()
+    if not math.isfinite(value):
+        raise ValueError(f"not a finite number: {value!r}")
+    return (repr(value) if isinstance(value, float) else str(value)).encode()
+
+
+class OrderTemplate:
+    """
+    Order body with fixed fields serialized ahead of time
+    """
+
+    __slots__ = ("fields", "_prefix", "_sep", "_price", "_quantity", "_coid", "_dumps")
+
+    def __init__(
+        self,
+        fields: Dict[str, Any],
+        price_key: str = "order_price",
+        quantity_key: str = "order_quantity",
+        client_order_id_key: str = "client_order_id",
+        encoder: Optional[Union[str, Encoder]] = None,
+    ):
+        """
+        `fields` holds the fixed part of the order, e.g.
+        `{"symbol": "PERP_ETH_USDC", "order_type": "LIMIT", "side": "BUY"}`
+        """
+        self.fields = dict(fields)
+        self._dumps = get_encoder(encoder)
+        self._prefix = self._dumps(self.fields)[:-1]
+        self._sep = b"," if self.fields else b""
+        self._price = b'"' + price_key.encode() + b'":'
+        self._quantity = b'"' + quantity_key.encode() + b'":'
+        self._coid = b'"' + client_order_id_key.encode() + b'":'
+
+    def render(
+        self,
+        price: Optional[Number] = None,
+        quantity: Optional[Number] = None,
+        client_order_id: Optional[str] = None,
+    ) -> bytes:
+        """
+        JSON body of one order; fields left as None are omitted
+        """
+        parts = [self._prefix]
+        sep = self._sep
+        if price is not None:
+            parts += (sep, self._price, _number(price))
+            sep = b","
+        if quantity is not None:
+            parts += (sep, self._quantity, _number(quantity))
+            sep = b","
+        if client_order_id is not None:
+            parts += (sep, self._coid, self._dumps(client_order_id))
+        parts.append(b"}")
+        return b"".join(parts)
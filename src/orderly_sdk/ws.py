@@ -3,19 +3,50 @@ Orderly Async Websocket API Client
 """
 
 import asyncio
-import base64
-import datetime
+import inspect
 import json as jsonlib
+import random
+import time
 from collections import defaultdict
-from typing import DefaultDict, Dict, Optional
+from fnmatch import fnmatchcase
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Union,
+)
 
-import base58
 import websockets
-from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-from websockets import WebSocketClientProtocol
 
-from .helpers import get_loop
+from .codec import Decoder, get_decoder
+from .exceptions import OrderlyAPIException
+from .helpers import get_loop, timestamp_ms
+from . import log
 from .log import logger
+from .metrics import Metrics
+from .models import TypedDecoder
+from .queues import BLOCK, DROP_OLDEST, TopicQueue
+from .signing import load_private_key, sign
+from .stream import TopicStream
+
+if TYPE_CHECKING:
+    from websockets.asyncio.client import ClientConnection
+
+
+class _Handler:
+    __slots__ = ("pattern", "callback", "is_async", "pooled")
+
+    def __init__(self, pattern: str, callback: Callable, pooled: bool):
+        self.pattern = pattern
+        self.callback = callback
+        self.is_async = inspect.iscoroutinefunction(callback)
+        self.pooled = pooled
 
 
 class WsTopicManager:
@@ -24,8 +55,14 @@ class WsTopicManager:
     """
 
     endpoint: str
-    queues: DefaultDict[str, asyncio.Queue]
-    websocket: WebSocketClientProtocol
+    queues: DefaultDict[str, TopicQueue]
+    websocket: "ClientConnection"
+    # reconnect delay: initial * 2 ** attempt, capped at max, with jitter
+    backoff_initial: float = 0.5
+    backoff_max: float = 30.0
+    # worker tasks and queue bound for handlers registered with pooled=True
+    handler_workers: int = 4
+    handler_queue_size: int = 1000
 
     def __init__(
         self,
@@ -33,39 +70,131 @@ class WsTopicManager:
         account_id="",
         endpoint="",
         loop=None,
+        json_decoder: Optional[Union[str, Decoder]] = None,
+        typed: bool = False,
+        number_type: type = float,
+        metrics: Optional[Metrics] = None,
     ):
+        """
+        `json_decoder` picks the JSON backend (see `codec.get_decoder`). With
+        `typed`, queued messages of hot topics are converted to the models in
+        `orderly_sdk.models`, with prices and sizes as `number_type` (`float`
+        or `Decimal`); listeners always get the raw dicts.
+
+        `metrics` records per-topic exchange-to-receive latency, decode and
+        dispatch time and queue depth, see `orderly_sdk.metrics`.
+        """
         self._id = _id
         self.account_id = account_id
         self.endpoint = endpoint + self.account_id
         self.loop = loop or get_loop()
+        self._decode = get_decoder(json_decoder)
+        self._typed = TypedDecoder(number_type) if typed else None
         # topic -> topic event queue
-        self.queues: DefaultDict[str, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self.queues: DefaultDict[str, TopicQueue] = defaultdict(TopicQueue)
+        # topic -> callbacks invoked inline with (data, ts)
+        self.listeners: DefaultDict[str, List[Callable[[Any, int], None]]] = (
+            defaultdict(list)
+        )
+        self._listener_topics: Set[str] = set()
+        # topic -> open consumer streams
+        self._streams: DefaultDict[str, List[TopicStream]] = defaultdict(list)
+        self._connected = False
+        # topics unsubscribed by us; late messages for them are dropped
+        self._unsubscribed: Set[str] = set()
+        self.handlers: List[_Handler] = []
+        # topic -> matching handlers, rebuilt when handlers change
+        self._handler_cache: Dict[str, List[_Handler]] = {}
+        self._handler_queue: Optional[asyncio.Queue] = None
+        self._handler_tasks: List[asyncio.Task] = []
+        # callbacks invoked with (event, info) on connection state changes
+        self.connection_listeners: List[Callable[[str, Dict], None]] = []
+        # callbacks invoked with (raw frame, receive time in ns) before decoding
+        self.frame_listeners: List[Callable[[bytes, int], None]] = []
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.add_gauge("ws_queue_depth", "topic", self._queue_depths)
+
+    def add_frame_listener(self, callback: Callable[[bytes, int], None]):
+        """
+        Call `callback(frame, ts_ns)` with every raw frame as received, e.g.
+        to record feeds with `orderly_sdk.recorder.FrameRecorder`
+        """
+        self.frame_listeners.append(callback)
+
+    def add_connection_listener(self, callback: Callable[[str, Dict], None]):
+        """
+        Call `callback(event, info)` on "connected", "disconnected" and
+        "reconnected"; the latter carries the outage in `info["gap_ms"]` so
+        consumers such as local order books know to resync
+        """
+        self.connection_listeners.append(callback)
+
+    def _emit(self, event: str, info: Dict):
+        for callback in self.connection_listeners:
+            try:
+                callback(event, info)
+            except Exception as e:
+                logger.exception(e)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_initial * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
 
     async def _connect(
         self,
         timeout: Optional[int | float] = None,
         **kwargs,
     ):
-        async for websocket in websockets.connect(self.endpoint, **kwargs):
+        attempt = 0
+        connected_once = False
+        disconnected_at: Optional[int] = None
+        while True:
             try:
-                self.websocket = websocket
-                await self._reconnect()
-                logger.debug(f"Connected to {self.endpoint}")
-                while True:
-                    try:
-                        message = await asyncio.wait_for(
-                            websocket.recv(), timeout=timeout
+                async with websockets.connect(self.endpoint, **kwargs) as websocket:
+                    self.websocket = websocket
+                    await self._reconnect()
+                    self._connected = True
+                    logger.debug("Connected to {}", self.endpoint)
+                    attempt = 0
+                    now = round(time.time() * 1000)
+                    if not connected_once:
+                        connected_once = True
+                        self._emit("connected", {"ts": now})
+                    else:
+                        self._emit(
+                            "reconnected",
+                            {
+                                "ts": now,
+                                "disconnected_at": disconnected_at,
+                                "gap_ms": now - (disconnected_at or now),
+                            },
                         )
-                        await self._handle_heartbeat(message)
-                        # asyncio.create_task(self._handle_message(message))
-                        await self._handle_message(message)
-                    except asyncio.TimeoutError:
-                        logger.warning(f"Connection to {self.endpoint} timed out")
-                        break
+                    disconnected_at = None
+                    while True:
+                        try:
+                            frame = await asyncio.wait_for(
+                                websocket.recv(decode=False), timeout=timeout
+                            )
+                            if self.frame_listeners:
+                                received_ns = time.time_ns()
+                                for callback in self.frame_listeners:
+                                    callback(frame, received_ns)
+                            await self._dispatch(frame)
+                        except asyncio.TimeoutError:
+                            logger.warning("Connection to {} timed out", self.endpoint)
+                            break
             except websockets.ConnectionClosed:
-                logger.warning(f"Disconnected from {self.endpoint}")
+                logger.warning("Disconnected from {}", self.endpoint)
             except Exception as e:
                 logger.exception(e)
+            self._connected = False
+            if disconnected_at is None:
+                disconnected_at = round(time.time() * 1000)
+                if connected_once:
+                    self._emit("disconnected", {"ts": disconnected_at})
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
 
     def start(self, timeout: Optional[int | float] = None, **kwargs):
         """
@@ -75,11 +204,200 @@ class WsTopicManager:
             asyncio.create_task, self._connect(timeout, **kwargs)
         )
 
-    def subscribe(self, topic):
+    def subscribe(
+        self,
+        topic,
+        maxsize: int = 0,
+        policy: str = BLOCK,
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ):
         """
         Subscribe to a topic
+
+        `maxsize` bounds the topic queue and `policy` decides what happens when
+        it is full: "block", "drop_oldest", "drop_newest" or "conflate" (keep
+        only the latest message per `key(message)`, by default its symbol).
+
+        Subscribing again keeps the existing queue; use `stream()` to give
+        several consumers their own view of a topic.
+        """
+        self._unsubscribed.discard(topic)
+        queue = self.queues.get(topic)
+        if queue is not None:
+            if (queue.maxsize, queue.policy) != (maxsize, policy):
+                logger.warning("{} is already subscribed, keeping its queue", topic)
+            return
+        self.queues[topic] = TopicQueue(maxsize, policy, key)
+
+    def stream(
+        self,
+        topic: str,
+        maxsize: int = 1000,
+        policy: str = DROP_OLDEST,
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ) -> TopicStream:
+        """
+        Open a consumer view of a topic, used as an async context manager
+
+        Streams are reference counted: the first one subscribes the topic on
+        the server and the last one to close unsubscribes it. Each stream has
+        its own bounded queue (see `subscribe()` for the policies) and all of
+        them share the same decoded message objects.
+        """
+        return TopicStream(self, topic, maxsize, policy, key)
+
+    async def _open_stream(self, stream: TopicStream):
+        topic = stream.topic
+        subscribed = topic in self._topics()
+        self._unsubscribed.discard(topic)
+        self._streams[topic].append(stream)
+        if not subscribed and self._connected:
+            await self.do_subscribe(topic)
+
+    async def _close_stream(self, stream: TopicStream):
+        topic = stream.topic
+        streams = self._streams.get(topic)
+        if streams and stream in streams:
+            streams.remove(stream)
+        if streams:
+            return
+        self._streams.pop(topic, None)
+        if topic not in self._topics():
+            self._unsubscribed.add(topic)
+            if self._connected:
+                await self.send_json(
+                    {"id": self._id, "event": "unsubscribe", "topic": topic}
+                )
+
+    def _queue_depths(self) -> Dict[str, int]:
+        depths = {topic: queue.qsize() for topic, queue in self.queues.items()}
+        for topic, streams in self._streams.items():
+            depths[topic] = depths.get(topic, 0) + sum(s.queue.qsize() for s in streams)
+        return depths
+
+    def queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Depth and dropped/conflated counters of every topic queue
+        """
+        return {topic: queue.stats() for topic, queue in self.queues.items()}
+
+    def add_listener(self, topic, callback: Callable[[Any, int], None], subscribe=True):
+        """
+        Call `callback(data, ts)` inline for every message on a topic
+
+        Topics with listeners only get queued if `subscribe()` was also called.
+        """
+        self.listeners[topic].append(callback)
+        if subscribe:
+            self._add_topic(topic)
+
+    def remove_listener(self, topic, callback: Callable[[Any, int], None]):
+        """
+        Remove a listener added with `add_listener()`
         """
-        self.queues[topic] = asyncio.Queue()
+        callbacks = self.listeners.get(topic)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self.listeners.pop(topic, None)
+            self._listener_topics.discard(topic)
+
+    def on(self, topic: str, callback: Callable[[str, Any], Any], pooled=False):
+        """
+        Call `callback(topic, data)` for every message on matching topics
+
+        `topic` may be a glob pattern such as "PERP_ETH_USDC@*" or "*@trade";
+        patterns only match topics subscribed some other way, while exact
+        topics are subscribed. The callback may be sync or async and runs
+        inline in the receive loop, so it sees each message in the same loop
+        iteration the frame arrives. Use `pooled=True` for slow handlers: they
+        then run on `handler_workers` tasks fed by a bounded queue. Topics
+        with handlers only get queued if `subscribe()` was also called.
+        """
+        self.handlers.append(_Handler(topic, callback, pooled))
+        self._handler_cache.clear()
+        if not any(c in topic for c in "*?["):
+            self._add_topic(topic)
+
+    def _add_topic(self, topic: str):
+        """
+        Keep a listener or handler topic subscribed, subscribing it right away
+        when the socket is already up
+        """
+        subscribed = topic in self._topics()
+        self._unsubscribed.discard(topic)
+        self._listener_topics.add(topic)
+        if not subscribed and self._connected:
+            self.loop.create_task(self._subscribe_if_wanted(topic))
+
+    async def _subscribe_if_wanted(self, topic: str):
+        # skip topics dropped again before this task ran
+        if self._connected and topic in self._topics():
+            await self.do_subscribe(topic)
+
+    def off(self, topic: str, callback: Callable[[str, Any], Any]):
+        """
+        Remove a handler registered with `on()`
+        """
+        self.handlers = [
+            h for h in self.handlers if h.pattern != topic or h.callback != callback
+        ]
+        self._handler_cache.clear()
+        if topic not in self.listeners and not any(
+            h.pattern == topic for h in self.handlers
+        ):
+            self._listener_topics.discard(topic)
+
+    def _handlers_for(self, topic: str) -> List[_Handler]:
+        handlers = self._handler_cache.get(topic)
+        if handlers is None:
+            handlers = [
+                h
+                for h in self.handlers
+                if h.pattern == topic or fnmatchcase(topic, h.pattern)
+            ]
+            self._handler_cache[topic] = handlers
+        return handlers
+
+    async def _call_handler(self, handler: _Handler, topic: str, data: Any):
+        try:
+            if handler.is_async:
+                await handler.callback(topic, data)
+            else:
+                handler.callback(topic, data)
+        except Exception as e:
+            logger.exception(e)
+
+    async def _handler_worker(self, queue: asyncio.Queue):
+        while True:
+            handler, topic, data = await queue.get()
+            await self._call_handler(handler, topic, data)
+            queue.task_done()
+
+    async def _run_handlers(self, handlers: List[_Handler], topic: str, data: Any):
+        for handler in handlers:
+            if not handler.pooled:
+                await self._call_handler(handler, topic, data)
+                continue
+            queue = self._handler_queue
+            if queue is None:
+                queue = self._handler_queue = asyncio.Queue(self.handler_queue_size)
+                self._handler_tasks = [
+                    asyncio.create_task(self._handler_worker(queue))
+                    for _ in range(self.handler_workers)
+                ]
+            await queue.put((handler, topic, data))
+
+    def _notify(self, topic, data, ts) -> bool:
+        callbacks = self.listeners.get(topic)
+        if not callbacks:
+            return False
+        for callback in callbacks:
+            try:
+                callback(data, ts)
+            except Exception as e:
+                logger.exception(e)
+        return True
 
     async def do_subscribe(self, topic):
         """
@@ -94,40 +412,91 @@ class WsTopicManager:
         params = {"params": {"type": "orderbook", "symbol": symbol}}
         await self.send_json({"id": self._id, "event": "request", **params})
 
+    def _forget(self, topic) -> bool:
+        """
+        Drop the queue of a topic and stop resubscribing it on reconnect;
+        returns whether the topic is no longer needed at all
+        """
+        self.queues.pop(topic, None)
+        self._listener_topics.discard(topic)
+        if topic in self._topics():
+            # still consumed by streams
+            return False
+        self._unsubscribed.add(topic)
+        return True
+
     async def unsubscribe(self, topic):
         """
         Unsubscribe from a topic
+
+        Its queue is dropped and it is no longer subscribed on reconnect,
+        whether it was subscribed through `subscribe()`, `on()` or
+        `add_listener()`; open streams keep it subscribed.
         """
-        await self.websocket.send(
-            jsonlib.dumps({"id": self._id, "event": "unsubscribe", "topic": topic})
-        )
-        self.queues.pop(topic)
+        if self._forget(topic) and self._connected:
+            await self.send_json(
+                {"id": self._id, "event": "unsubscribe", "topic": topic}
+            )
 
     async def send_json(self, message):
         """
         Send a json message
         """
-        if "event" in message and message["event"] != "pong":
-            logger.debug(f"sending message to {self.endpoint}: {message}")
+        if log.debug_enabled() and message.get("event", "pong") != "pong":
+            logger.debug("sending message to {}: {}", self.endpoint, message)
         await self.websocket.send(jsonlib.dumps(message))
 
-    async def _handle_heartbeat(self, message):
-        message = jsonlib.loads(message)
-        if "event" in message:
-            if message["event"] == "ping":
-                await self.send_json({"event": "pong"})
+    async def _dispatch(self, frame: Union[bytes, str]):
+        """
+        Decode a raw frame once and route it
+        """
+        metrics = self.metrics
+        if metrics is None:
+            await self._handle_message(self._decode(frame))
+            return
+        received_at = time.time()
+        started = time.perf_counter()
+        message = self._decode(frame)
+        decoded_at = time.perf_counter()
+        await self._handle_message(message)
+        done_at = time.perf_counter()
+        labels = (("topic", message.get("topic") or message.get("event") or ""),)
+        ts = message.get("ts")
+        if ts:
+            metrics.observe("ws_latency_seconds", labels, received_at - ts / 1000)
+        metrics.observe("ws_decode_seconds", labels, decoded_at - started)
+        metrics.observe("ws_dispatch_seconds", labels, done_at - decoded_at)
+
+    async def _deliver(self, topic: str, data: Any, ts: Optional[int]):
+        consumed = self._notify(topic, data, ts)
+        handlers = self._handlers_for(topic) if self.handlers else None
+        streams = self._streams.get(topic)
+        queued = topic in self.queues or not (
+            consumed or handlers or streams or topic in self._unsubscribed
+        )
+        if not (handlers or streams or queued):
+            return
+        if self._typed is not None:
+            data = self._typed.convert(topic, data, ts)
+        if handlers:
+            await self._run_handlers(handlers, topic, data)
+        if streams:
+            for stream in streams:
+                await stream.queue.put(data)
+        if queued:
+            await self.queues[topic].put(data)
 
     async def _handle_request_orderbook(self, message: Dict):
         topic = message["data"]["symbol"] + "@orderbook"
         data = message["data"]
         data["ts"] = message["ts"]
-        await self.queues[topic].put(data)
+        await self._deliver(topic, data, message["ts"])
 
     async def _handle_general_message(self, message: Dict):
         data = message["data"]
         # data["ts"] = message["ts"]
         # logger.info(f"received message from {self.endpoint}: {message}")
-        await self.queues[message["topic"]].put(data)
+        await self._deliver(message["topic"], data, message.get("ts"))
 
     async def recv(self, topic, timeout=10):
         """
@@ -138,16 +507,18 @@ class WsTopicManager:
             try:
                 res = await asyncio.wait_for(self.queues[topic].get(), timeout=timeout)
             except asyncio.TimeoutError:
-                logger.info(f"no message in {timeout} seconds")
+                logger.info("no message in {} seconds", timeout)
         return res
 
-    async def _handle_message(self, message):
-        message = jsonlib.loads(message)
+    async def _handle_message(self, message: Dict):
         # logger.info(f"received message from {self.endpoint}: {message}")
-        if "event" in message:
-            if message["event"] not in ("ping", "pong"):
+        event = message.get("event")
+        if event is not None:
+            if event == "ping":
+                await self.send_json({"event": "pong"})
+            elif event != "pong":
                 if message["success"]:
-                    if "data" in message and message["event"] == "request":
+                    if "data" in message and event == "request":
                         await self._handle_request_orderbook(message)
                     return
                 else:
@@ -155,10 +526,19 @@ class WsTopicManager:
         if "data" in message:
             await self._handle_general_message(message)
 
-    # reconnect, resubscribe
+    def _topics(self) -> List[str]:
+        topics = list(self.queues.keys())
+        topics.extend(t for t in self._listener_topics if t not in self.queues)
+        topics.extend(
+            t
+            for t in self._streams
+            if t not in self.queues and t not in self._listener_topics
+        )
+        return topics
+
+    # reconnect, resubscribe; frames are pipelined without waiting for acks
     async def _reconnect(self):
-        for topic in self.queues.keys():
-            await self.do_subscribe(topic)
+        await asyncio.gather(*(self.do_subscribe(t) for t in self._topics()))
 
 
 class OrderlyPublicWsManager(WsTopicManager):
@@ -172,12 +552,20 @@ class OrderlyPublicWsManager(WsTopicManager):
         account_id="",
         endpoint="",
         loop=None,
+        json_decoder: Optional[Union[str, Decoder]] = None,
+        typed: bool = False,
+        number_type: type = float,
+        metrics: Optional[Metrics] = None,
     ):
         super().__init__(
             _id=_id,
             account_id=account_id,
             endpoint=endpoint,
             loop=loop,
+            json_decoder=json_decoder,
+            typed=typed,
+            number_type=number_type,
+            metrics=metrics,
         )
 
 
@@ -186,6 +574,9 @@ class OrderlyPrivateWsManager(WsTopicManager):
     Orderly Private Async Websocket API Client
     """
 
+    # seconds to wait for the auth reply before reconnecting
+    auth_timeout: float = 10
+
     def __init__(
         self,
         _id="WS_PRIVATE",
@@ -194,29 +585,31 @@ class OrderlyPrivateWsManager(WsTopicManager):
         orderly_secret: Optional[str] = None,
         endpoint="",
         loop=None,
+        json_decoder: Optional[Union[str, Decoder]] = None,
+        typed: bool = False,
+        number_type: type = float,
+        metrics: Optional[Metrics] = None,
     ):
         super().__init__(
             _id=_id,
             account_id=account_id,
             endpoint=endpoint,
             loop=loop,
+            json_decoder=json_decoder,
+            typed=typed,
+            number_type=number_type,
+            metrics=metrics,
         )
         self.orderly_key = orderly_key
         self.orderly_secret = orderly_secret
         if orderly_secret is not None:
-            self.orderly_private_key = Ed25519PrivateKey.from_private_bytes(
-                base58.b58decode(orderly_secret)[0:32]
-            )
+            self.orderly_private_key = load_private_key(orderly_secret)
 
     def _signature(self, data):
-        data_bytes = bytes(str(data), "utf-8")
-        request_signature = base64.b64encode(
-            self.orderly_private_key.sign(data_bytes)
-        ).decode("utf-8")
-        return request_signature
+        return sign(self.orderly_private_key, str(data).encode())
 
     async def _login(self) -> None:
-        ts = round(datetime.datetime.now().timestamp() * 1000)
+        ts = timestamp_ms()
         await self.send_json(
             {
                 "id": self._id,
@@ -229,8 +622,27 @@ class OrderlyPrivateWsManager(WsTopicManager):
             }
         )
 
-    # reconnect, resubscribe
+    async def _wait_for_auth(self):
+        """
+        Read frames until the auth reply arrives, dispatching anything else
+        """
+        deadline = time.monotonic() + self.auth_timeout
+        while True:
+            frame = await asyncio.wait_for(
+                self.websocket.recv(decode=False),
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+            message = self._decode(frame)
+            if message.get("event") != "auth":
+                await self._handle_message(message)
+                continue
+            if not message.get("success"):
+                raise OrderlyAPIException(message, None)
+            return
+
+    # reconnect: authenticate once, then resubscribe
     async def _reconnect(self):
-        for topic in self.queues.keys():
+        if self.orderly_secret is not None:
             await self._login()
-            await self.do_subscribe(topic)
+            await self._wait_for_auth()
+        await super()._reconnect()
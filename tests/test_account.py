@@ -0,0 +1,145 @@
+"""
+REST reconciliation and websocket updates of AccountState
+"""
+
+import asyncio
+
+import pytest
+
+from orderly_sdk.account import AccountState
+from orderly_sdk.exceptions import OrderlyAPIException
+
+
+def ok(data):
+    return {"success": True, "data": data}
+
+
+class FakeClient:
+    def __init__(self):
+        self.positions = [{"symbol": "PERP_ETH_USDC", "position_qty": 1.0}]
+        self.holding = [{"token": "USDC", "holding": 100.0}]
+        self.orders = [{"order_id": 1, "symbol": "PERP_ETH_USDC", "status": "NEW"}]
+        self.info = {"account_id": "0xtest"}
+        self.failing = None
+        # set to pause get_all_positions until released
+        self.gate = None
+
+    async def get_all_positions(self):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failing == "positions":
+            return {"success": False, "code": -1003, "message": "too many requests"}
+        return ok({"rows": list(self.positions)})
+
+    async def get_current_holding(self):
+        return ok({"holding": list(self.holding)})
+
+    async def get_account_info(self):
+        return ok(self.info)
+
+    async def iter_orders(self, params=None):
+        for order in self.orders:
+            yield order
+
+
+class FakeWs:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.listeners = {}
+
+    def add_listener(self, topic, callback, subscribe=True):
+        self.listeners[topic] = callback
+
+    def add_connection_listener(self, callback):
+        pass
+
+
+def run(test):
+    async def main():
+        client = FakeClient()
+        ws = FakeWs()
+        state = AccountState(client, ws, reconcile_interval=None)
+        await state.reconcile()
+        await test(client, ws, state)
+
+    asyncio.run(main())
+
+
+def test_reconcile_seeds_the_state():
+    async def test(client, ws, state):
+        assert state.position_qty("PERP_ETH_USDC") == 1.0
+        assert state.holding("USDC") == 100.0
+        assert list(state.open_orders) == [1]
+        assert state.info == {"account_id": "0xtest"}
+        assert state.drift_count == 0
+
+    run(test)
+
+
+def test_failed_response_keeps_the_state():
+    async def test(client, ws, state):
+        client.failing = "positions"
+        with pytest.raises(OrderlyAPIException):
+            await state.reconcile()
+        assert state.position_qty("PERP_ETH_USDC") == 1.0
+        assert state.drift_count == 0
+
+    run(test)
+
+
+def test_websocket_updates_are_normalized():
+    async def test(client, ws, state):
+        ws.listeners["position"](
+            {"positions": [{"symbol": "PERP_BTC_USDC", "positionQty": -0.5}]}, 1
+        )
+        ws.listeners["balance"]({"balances": {"USDC": {"holding": 90.0}}}, 2)
+        ws.listeners["executionreport"](
+            {"symbol": "PERP_BTC_USDC", "orderId": 2, "status": "NEW"}, 3
+        )
+        ws.listeners["executionreport"](
+            {"symbol": "PERP_ETH_USDC", "orderId": 1, "status": "FILLED"}, 4
+        )
+        assert state.position_qty("PERP_BTC_USDC") == -0.5
+        assert state.holding("USDC") == 90.0
+        assert [o["order_id"] for o in state.orders()] == [2]
+        assert state.orders("PERP_ETH_USDC") == []
+
+    run(test)
+
+
+def test_updates_during_reconcile_win_over_the_snapshot():
+    async def test(client, ws, state):
+        client.gate = asyncio.Event()
+        task = asyncio.create_task(state.reconcile())
+        await asyncio.sleep(0)
+        # newer than the REST snapshot still being fetched
+        ws.listeners["position"](
+            {"positions": [{"symbol": "PERP_ETH_USDC", "positionQty": 3.0}]}, 1
+        )
+        ws.listeners["executionreport"](
+            {"symbol": "PERP_ETH_USDC", "orderId": 1, "status": "FILLED"}, 2
+        )
+        client.gate.set()
+        await task
+        assert state.position_qty("PERP_ETH_USDC") == 3.0
+        assert state.open_orders == {}
+        assert state.drift_count == 0
+        # the next snapshot supersedes those updates again
+        await state.reconcile()
+        assert state.position_qty("PERP_ETH_USDC") == 1.0
+        assert list(state.open_orders) == [1]
+        assert state.drift_count == 1
+
+    run(test)
+
+
+def test_drift_is_counted_and_corrected():
+    async def test(client, ws, state):
+        client.positions = [{"symbol": "PERP_ETH_USDC", "position_qty": 2.0}]
+        await state.reconcile()
+        assert state.drift_count == 1
+        assert state.position_qty("PERP_ETH_USDC") == 2.0
+        await state.reconcile()
+        assert state.drift_count == 1
+
+    run(test)
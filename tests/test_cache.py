@@ -0,0 +1,93 @@
+"""
+Request coalescing of ResponseCache
+"""
+
+import asyncio
+
+import pytest
+
+from orderly_sdk.cache import ResponseCache
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def main():
+        cache = ResponseCache()
+        calls = []
+
+        async def fetch(etag):
+            calls.append(etag)
+            await asyncio.sleep(0.01)
+            return {"success": True}, None, True
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("key", 60, fetch) for _ in range(5))
+        )
+        assert results == [{"success": True}] * 5
+        assert len(calls) == 1
+        assert cache.stats()["coalesced"] == 4
+
+    asyncio.run(main())
+
+
+def test_cancelled_fetch_is_retried_by_a_waiter():
+    async def main():
+        cache = ResponseCache()
+        started = asyncio.Event()
+
+        async def slow_fetch(etag):
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fetch(etag):
+            return {"success": True}, None, True
+
+        leader = asyncio.create_task(cache.get_or_fetch("key", 60, slow_fetch))
+        await started.wait()
+        follower = asyncio.create_task(cache.get_or_fetch("key", 60, fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == {"success": True}
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_fetch_running():
+    async def main():
+        cache = ResponseCache()
+        release = asyncio.Event()
+
+        async def fetch(etag):
+            await release.wait()
+            return {"success": True}, None, True
+
+        leader = asyncio.create_task(cache.get_or_fetch("key", 60, fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("key", 60, fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        release.set()
+        assert await leader == {"success": True}
+
+    asyncio.run(main())
+
+
+def test_fetch_errors_reach_every_waiter():
+    async def main():
+        cache = ResponseCache()
+
+        async def fetch(etag):
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("key", 60, fetch) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, ValueError) for r in results)
+        assert len(cache) == 0
+
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""
+Candles and rolling statistics of TradeAggregator
+"""
+
+import asyncio
+import time
+
+from orderly_sdk.candles import CandleSeries, TradeAggregator
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.rest import AsyncClient
+from orderly_sdk.ws import OrderlyPublicWsManager
+
+SYMBOL = "PERP_ETH_USDC"
+
+
+class FakeWs:
+    def __init__(self):
+        self.listeners = {}
+
+    def add_listener(self, topic, callback, subscribe=True):
+        self.listeners[topic] = callback
+
+    def trade(self, ts, price, size=1.0):
+        self.listeners[SYMBOL + "@trade"]({"price": price, "size": size}, ts)
+
+
+class FakeClient:
+    def __init__(self, trades):
+        self.trades = trades
+
+    async def get_market_trades(self, symbol, limit):
+        rows = [
+            {"executed_timestamp": ts, "executed_price": p, "executed_quantity": 1.0}
+            for ts, p in self.trades
+        ]
+        return {"success": True, "data": {"rows": rows}}
+
+    async def get_kline(self, symbol, kline_type, limit):
+        return {"success": False, "message": "no klines"}
+
+
+def test_candles_roll_and_take_late_trades():
+    series = CandleSeries(1000, capacity=3)
+    assert series.update(100, 10, 1) is None
+    series.update(900, 12, 1)
+    closed = series.update(1100, 11, 2)
+    assert (closed.open, closed.high, closed.close, closed.count) == (10, 12, 12, 2)
+    series.update(950, 9, 1)
+    assert series.last()[0].low == 9
+    for i in range(2, 6):
+        series.update(i * 1000, i, 1)
+    assert [c.start for c in series.last()] == [3000, 4000, 5000]
+
+
+def test_rolling_windows_expire():
+    aggregator = TradeAggregator(FakeWs(), resolutions=("1s",), windows=("1m",))
+    aggregate = aggregator.track(SYMBOL)
+    ws = aggregator.ws
+    ws.trade(0, 100, 1)
+    ws.trade(30_000, 110, 3)
+    assert aggregate.rolling.vwap("1m") == 107.5
+    ws.trade(61_000, 120, 1)
+    stats = aggregator.stats(SYMBOL, "1m")
+    assert stats["count"] == 2
+    assert stats["volume"] == 4
+
+
+def test_seeding_after_live_trades_keeps_candles_ordered():
+    async def main():
+        ws = FakeWs()
+        aggregator = TradeAggregator(ws, resolutions=("1s",), windows=("1m",))
+        aggregator.track(SYMBOL)
+        ws.trade(5_000, 105)
+        client = FakeClient([(1_000, 101), (2_000, 102), (5_000, 105)])
+        await aggregator.seed(client)
+        ws.trade(6_000, 106)
+        starts = [c.start for c in aggregator.candles(SYMBOL, "1s")]
+        assert starts == [1_000, 2_000, 5_000, 6_000]
+        assert aggregator.stats(SYMBOL, "1m")["count"] == 4
+
+    asyncio.run(main())
+
+
+def test_seed_then_follow_the_feed():
+    async def main():
+        async with MockExchange(feed_rate=200) as exchange:
+            loop = asyncio.get_running_loop()
+            ws = OrderlyPublicWsManager(endpoint=exchange.ws_public_endpoint, loop=loop)
+            closed = []
+            aggregator = TradeAggregator(
+                ws,
+                resolutions=("1s",),
+                windows=("1m",),
+                on_candle=lambda *args: closed.append(args),
+            )
+            aggregate = aggregator.track(SYMBOL)
+            client = AsyncClient(endpoint=exchange.rest_endpoint, loop=loop)
+            await aggregator.seed(client, trade_limit=50)
+            assert aggregate.seeded
+            assert aggregate.rolling.n == 50
+            task = asyncio.create_task(ws._connect())
+            deadline = time.monotonic() + 5
+            while aggregate.rolling.n < 80:
+                assert time.monotonic() < deadline, "timed out"
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await client.close_connection()
+        starts = [c.start for c in aggregator.candles(SYMBOL, "1s")]
+        assert starts == sorted(set(starts))
+        assert aggregate.last_price == aggregator.candles(SYMBOL, "1s")[-1].close
+        assert all(symbol == SYMBOL for symbol, _, _ in closed)
+
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Column buffers of the columnar sinks
+"""
+
+import pytest
+
+from orderly_sdk.columnar import OrderBookLevelSink, trade_sink
+
+
+def trade(ts, price, size=1.0, side="BUY"):
+    return {
+        "symbol": "PERP_ETH_USDC",
+        "side": side,
+        "price": price,
+        "size": size,
+        "ts": ts,
+    }
+
+
+def columns(sink):
+    return [list(buffer.values()) for buffer in sink._buffers]
+
+
+def test_rows_grow_past_the_capacity():
+    sink = trade_sink(capacity=0)
+    sink.extend(trade(i, 100 + i) for i in range(5))
+    assert len(sink) == 5
+    ts, symbol, side, price, size = columns(sink)
+    assert ts == [0, 1, 2, 3, 4]
+    assert price == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert symbol == side == [0] * 5
+
+
+def test_bad_value_leaves_no_partial_row():
+    sink = trade_sink()
+    sink.append(trade(1, 100))
+    with pytest.raises(TypeError):
+        sink.append(trade(2, 101, size="bad"))
+    sink.append(trade(3, 102))
+    assert len(sink) == 2
+    assert all(len(column) == 2 for column in columns(sink))
+    assert columns(sink)[0] == [1, 3]
+
+
+def test_bad_level_drops_the_message():
+    sink = OrderBookLevelSink()
+    sink.on_message({"symbol": "A", "bids": [[9, 1]], "asks": [[11, 1]]}, 1)
+    with pytest.raises(TypeError):
+        sink.on_message({"symbol": "A", "bids": [[9, 2]], "asks": [[11, "bad"]]}, 2)
+    assert len(sink) == 2
+    assert all(len(column) == 2 for column in columns(sink))
+
+
+def test_numpy_export():
+    np = pytest.importorskip("numpy")
+    sink = trade_sink()
+    sink.extend([trade(1, 100, side="BUY"), trade(2, 101, side="SELL")])
+    exported = sink.to_numpy()
+    assert exported["side"].tolist() == ["BUY", "SELL"]
+    assert exported["price"].dtype == np.float64
@@ -0,0 +1,31 @@
+"""
+Log sink setup and the debug switch of the hot paths
+"""
+
+import pytest
+from loguru import logger
+
+from orderly_sdk import log
+
+
+def test_debug_follows_the_sdk_sink():
+    lines = []
+    try:
+        log.setup_logging("DEBUG", sink=lines.append, replace=False)
+        assert log.debug_enabled()
+        log.setup_logging(20, sink=lines.append, replace=False)
+        assert not log.debug_enabled()
+        log.verbose = True
+        assert log.debug_enabled()
+    finally:
+        log.verbose = None
+        logger.remove(log._handler_id)
+        log._handler_id = None
+        log._debug = False
+
+
+def test_invalid_level_keeps_the_sinks():
+    with pytest.raises(ValueError):
+        log.setup_logging("NOPE")
+    with pytest.raises(ValueError):
+        log.setup_logging(-1)
@@ -0,0 +1,354 @@
+"""
+End-to-end tests against the local mock exchange
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from orderly_sdk.account import AccountState
+from orderly_sdk.mockserver import MockExchange, _Book, _Market, _now_ms
+from orderly_sdk.orderbook import OrderBook, OrderBookManager
+from orderly_sdk.pool import AccountPool, PrivateWsSupervisor
+from orderly_sdk.queues import TopicQueue
+from orderly_sdk.rest import AsyncClient
+from orderly_sdk.ws import OrderlyPrivateWsManager, OrderlyPublicWsManager
+
+base58 = pytest.importorskip("base58")
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (  # noqa: E402
+    Ed25519PrivateKey,
+)
+
+ACCOUNT_ID = "0xtest"
+SYMBOL = "PERP_ETH_USDC"
+
+
+def make_keys():
+    private_key = Ed25519PrivateKey.generate()
+    secret = private_key.private_bytes(
+        serialization.Encoding.Raw,
+        serialization.PrivateFormat.Raw,
+        serialization.NoEncryption(),
+    )
+    public = private_key.public_key().public_bytes(
+        serialization.Encoding.Raw, serialization.PublicFormat.Raw
+    )
+    return base58.b58encode(public).decode(), base58.b58encode(secret).decode()
+
+
+def make_client(exchange: MockExchange, key: str, secret: str) -> AsyncClient:
+    return AsyncClient(
+        account_id=ACCOUNT_ID,
+        orderly_key=key,
+        orderly_secret=secret,
+        endpoint=exchange.rest_endpoint,
+        loop=asyncio.get_running_loop(),
+    )
+
+
+def order(i: int):
+    return {
+        "symbol": SYMBOL,
+        "order_type": "LIMIT",
+        "side": "BUY",
+        "order_price": 2000.5,
+        "order_quantity": 0.01,
+        "client_order_id": f"c{i}",
+    }
+
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_signed_request_is_accepted():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            client = make_client(exchange, *make_keys())
+            response = await client.create_order(order(1))
+            assert response["success"], response
+            orders = await client.get_orders()
+            assert [o["client_order_id"] for o in orders["data"]["rows"]] == ["c1"]
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_rendered_template_is_accepted():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            client = make_client(exchange, *make_keys())
+            template = client.order_template(
+                symbol=SYMBOL, order_type="LIMIT", side="SELL"
+            )
+            response = await client.create_order(template.render("2001.5", 0.02, "t1"))
+            assert response["success"], response
+            orders = (await client.get_orders())["data"]["rows"]
+            assert [(o["side"], o["price"], o["quantity"]) for o in orders] == [
+                ("SELL", 2001.5, 0.02)
+            ]
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_bad_signature_is_rejected():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            key, _ = make_keys()
+            _, other_secret = make_keys()
+            client = make_client(exchange, key, other_secret)
+            response = await client.create_order(order(1))
+            assert not response["success"]
+            assert response["code"] == -1001
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_batch_create_and_cancel():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            client = make_client(exchange, *make_keys())
+            created = await client.batch_create_orders(
+                [order(i) for i in range(5)], chunk_size=2
+            )
+            assert created["success"], created
+            rows = created["data"]["rows"]
+            assert [r["client_order_id"] for r in rows] == [f"c{i}" for i in range(5)]
+            cancelled = await client.batch_cancel_orders(
+                [str(r["order_id"]) for r in rows]
+            )
+            assert all(r["success"] for r in cancelled["data"]["rows"])
+            open_orders = await client.get_orders({"status": "INCOMPLETE"})
+            assert open_orders["data"]["rows"] == []
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_book_updates_chain_onto_snapshot():
+    book = _Book(_Market(SYMBOL))
+    local = OrderBook(SYMBOL)
+    local.load_snapshot(book.snapshot(), book.ts)
+    for i in range(500):
+        now = _now_ms()
+        # every other update falls in the same millisecond as the previous one
+        update = book.update(now if i % 2 else book.ts)
+        assert update["prevTs"] == local.ts
+        assert book.ts > local.ts
+        assert book.ts <= _now_ms() + i + 1
+        local.apply_update(update, book.ts)
+        assert local.best_bid()[0] < local.best_ask()[0]
+    snapshot = book.snapshot()
+    assert local.depth(_Book.depth) == {
+        "bids": [tuple(level) for level in snapshot["bids"]],
+        "asks": [tuple(level) for level in snapshot["asks"]],
+    }
+
+
+def test_orderbook_manager_syncs_from_feed():
+    async def main():
+        async with MockExchange(feed_rate=500) as exchange:
+            ws = OrderlyPublicWsManager(
+                account_id=ACCOUNT_ID,
+                endpoint=exchange.ws_public_endpoint,
+                loop=asyncio.get_running_loop(),
+            )
+            requests = []
+            request = ws.request
+
+            async def counted_request(symbol):
+                requests.append(symbol)
+                await request(symbol)
+
+            ws.request = counted_request
+            updates = []
+            manager = OrderBookManager(ws, on_update=updates.append)
+            book = manager.track(SYMBOL)
+            task = asyncio.create_task(ws._connect())
+            await wait_for(lambda: len(updates) >= 50)
+            task.cancel()
+            assert book.synced
+            assert requests == [SYMBOL]
+            assert len(book.bids) == len(book.asks) == _Book.depth
+            assert book.best_bid()[0] < book.best_ask()[0]
+
+    asyncio.run(main())
+
+
+def test_queue_drop_oldest():
+    queue = TopicQueue(2, "drop_oldest")
+    for i in range(3):
+        queue.put_nowait(i)
+    assert [queue.get_nowait() for _ in range(2)] == [1, 2]
+    assert queue.dropped == 1
+
+
+def test_queue_drop_newest():
+    queue = TopicQueue(2, "drop_newest")
+    for i in range(3):
+        queue.put_nowait(i)
+    assert [queue.get_nowait() for _ in range(2)] == [0, 1]
+    assert queue.dropped == 1
+
+
+def test_queue_conflate():
+    queue = TopicQueue(0, "conflate")
+    queue.put_nowait({"symbol": "A", "v": 1})
+    queue.put_nowait({"symbol": "B", "v": 1})
+    queue.put_nowait({"symbol": "A", "v": 2})
+    assert queue.qsize() == 2
+    assert queue.get_nowait() == {"symbol": "A", "v": 2}
+    assert queue.conflated == 1
+
+
+def test_queue_block_raises_when_full():
+    queue = TopicQueue(1, "block")
+    queue.put_nowait(0)
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait(1)
+
+
+def test_subscribed_queue_drops_under_load():
+    async def main():
+        async with MockExchange(feed_rate=2000) as exchange:
+            ws = OrderlyPublicWsManager(
+                account_id=ACCOUNT_ID,
+                endpoint=exchange.ws_public_endpoint,
+                loop=asyncio.get_running_loop(),
+            )
+            topic = f"{SYMBOL}@trade"
+            ws.subscribe(topic, maxsize=5, policy="drop_oldest")
+            task = asyncio.create_task(ws._connect())
+            await wait_for(lambda: ws.queue_stats()[topic]["dropped"] > 0)
+            task.cancel()
+            assert ws.queue_stats()[topic]["size"] == 5
+
+    asyncio.run(main())
+
+
+def test_account_state_follows_execution_reports():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            key, secret = make_keys()
+            client = make_client(exchange, key, secret)
+            ws = OrderlyPrivateWsManager(
+                account_id=ACCOUNT_ID,
+                orderly_key=key,
+                orderly_secret=secret,
+                endpoint=exchange.ws_private_endpoint,
+                loop=asyncio.get_running_loop(),
+            )
+            state = AccountState(client, ws, reconcile_interval=None)
+            task = asyncio.create_task(ws._connect())
+            await state.start()
+            assert state.holding("USDC") == 10_000.0
+            assert state.info["account_id"] == ACCOUNT_ID
+            assert state.orders() == []
+            connections = exchange.accounts[ACCOUNT_ID].connections
+            await wait_for(
+                lambda: any("executionreport" in t for t in connections.values())
+            )
+            created = await client.create_order(order(1))
+            order_id = created["data"]["order_id"]
+            await wait_for(lambda: order_id in state.open_orders)
+            assert state.open_orders[order_id]["client_order_id"] == "c1"
+            await client.cancel_all_orders(SYMBOL)
+            await wait_for(lambda: order_id not in state.open_orders)
+            await state.reconcile()
+            assert state.drift_count == 0
+            task.cancel()
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_account_pool_keeps_accounts_apart():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            async with AccountPool(
+                endpoint=exchange.rest_endpoint,
+                loop=asyncio.get_running_loop(),
+                rate_limits={"public": (10, 10), "private": (10, 10)},
+            ) as pool:
+                ids = [f"0xacct{i}" for i in range(3)]
+                for account_id in ids:
+                    pool.add(account_id, *make_keys())
+                with pytest.raises(ValueError):
+                    pool.add(ids[0])
+                assert all(pool[i].session is pool.session for i in ids)
+                # the per-IP bucket is shared, the per-account one is not
+                buckets = [pool[i].rate_limiter.buckets for i in ids]
+                assert buckets[0]["public"] is buckets[1]["public"]
+                assert buckets[0]["private"] is not buckets[1]["private"]
+                created = await pool.gather(
+                    lambda c: c.create_order(order(int(c.account_id[-1])))
+                )
+                assert all(r["success"] for r in created.values()), created
+                orders = await pool.gather(lambda c: c.get_orders())
+                for i, account_id in enumerate(ids):
+                    rows = orders[account_id]["data"]["rows"]
+                    assert [o["client_order_id"] for o in rows] == [f"c{i}"]
+                assert pool.remove(ids[0]) is not None
+                assert ids[0] not in pool and len(pool) == 2
+
+    asyncio.run(main())
+
+
+def test_supervisor_tags_messages_with_the_account():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            loop = asyncio.get_running_loop()
+            supervisor = PrivateWsSupervisor(
+                endpoint=exchange.ws_private_endpoint, loop=loop
+            )
+            supervisor.connect_interval = 0
+            reports = []
+            supervisor.add_listener(
+                "executionreport",
+                lambda account_id, data, ts: reports.append((account_id, data)),
+            )
+            ids = ["0xacct0", "0xacct1"]
+            clients = []
+            for account_id in ids:
+                key, secret = make_keys()
+                supervisor.add(account_id, key, secret)
+                clients.append(
+                    AsyncClient(
+                        account_id=account_id,
+                        orderly_key=key,
+                        orderly_secret=secret,
+                        endpoint=exchange.rest_endpoint,
+                        loop=loop,
+                    )
+                )
+            supervisor.start()
+
+            def subscribed(account_id):
+                account = exchange.accounts.get(account_id)
+                topics = account.connections.values() if account else ()
+                return any("executionreport" in t for t in topics)
+
+            await wait_for(lambda: all(subscribed(i) for i in ids))
+            for i, client in enumerate(clients):
+                await client.create_order(order(i))
+            await wait_for(lambda: len(reports) == 2)
+            assert sorted((a, d["clientOrderId"]) for a, d in reports) == [
+                ("0xacct0", "c0"),
+                ("0xacct1", "c1"),
+            ]
+            await supervisor.remove(ids[0])
+            assert supervisor.connected() == [ids[1]]
+            await supervisor.stop()
+            for client in clients:
+                await client.close_connection()
+
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+"""
+Typed payload models
+"""
+
+from decimal import Decimal
+
+from orderly_sdk.models import Bbo, OrderBookData, PriceLevel, Trade, TypedDecoder
+
+
+def test_trade_fields_and_missing_numbers():
+    trade = TypedDecoder().convert(
+        "PERP_ETH_USDC@trade", {"symbol": "PERP_ETH_USDC", "price": 2000.5}, 7
+    )
+    assert isinstance(trade, Trade)
+    assert trade.to_dict() == {
+        "symbol": "PERP_ETH_USDC",
+        "price": 2000.5,
+        "size": None,
+        "side": None,
+        "source": None,
+        "ts": 7,
+    }
+
+
+def test_decimal_lists_and_books():
+    decoder = TypedDecoder(Decimal)
+    bbos = decoder.convert("bbos", [{"symbol": "A", "bid": 0.1, "askSize": "2"}], 1)
+    assert bbos == [
+        Bbo.from_dict({"symbol": "A", "bid": 0.1, "askSize": 2}, decoder.number, 1)
+    ]
+    assert bbos[0].bid == Decimal("0.1")
+    book = decoder.convert(
+        "PERP_ETH_USDC@orderbook", {"bids": [[9.5, 1]], "asks": [], "ts": 3}
+    )
+    assert isinstance(book, OrderBookData)
+    assert book.bids == [PriceLevel(Decimal("9.5"), Decimal(1))]
+    assert type(book.bids[0]) is PriceLevel
+    assert book.ts == 3
+
+
+def test_unknown_topic_is_unchanged():
+    data = {"a": 1}
+    assert TypedDecoder().convert("PERP_ETH_USDC@kline_1m", data) is data
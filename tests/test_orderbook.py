@@ -0,0 +1,151 @@
+"""
+Snapshot and delta sequencing of OrderBookManager
+"""
+
+import asyncio
+
+from orderly_sdk.orderbook import OrderBookManager
+
+SYMBOL = "PERP_ETH_USDC"
+
+
+class FakeWs:
+    """
+    The parts of a websocket manager used by OrderBookManager
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.listeners = {}
+        self.connection_listeners = []
+        self.requests = []
+
+    def add_listener(self, topic, callback, subscribe=True):
+        self.listeners[topic] = callback
+
+    def add_connection_listener(self, callback):
+        self.connection_listeners.append(callback)
+
+    async def request(self, symbol):
+        self.requests.append(symbol)
+
+    def update(self, ts, prev_ts, bids=(), asks=()):
+        data = {"symbol": SYMBOL, "prevTs": prev_ts, "bids": bids, "asks": asks}
+        self.listeners[SYMBOL + "@orderbookupdate"](data, ts)
+
+    def snapshot(self, ts, bids, asks):
+        data = {"symbol": SYMBOL, "bids": bids, "asks": asks}
+        self.listeners[SYMBOL + "@orderbook"](data, ts)
+
+    def emit(self, event):
+        for callback in self.connection_listeners:
+            callback(event, {})
+
+
+def run(test):
+    async def main():
+        ws = FakeWs()
+        manager = OrderBookManager(ws)
+        book = manager.track(SYMBOL)
+        await test(ws, manager, book)
+
+    asyncio.run(main())
+
+
+async def settle():
+    # let the snapshot request task run
+    await asyncio.sleep(0)
+
+
+def test_buffered_updates_replay_onto_snapshot():
+    async def test(ws, manager, book):
+        ws.update(101, 100, bids=[[9, 1]])
+        ws.update(102, 101, asks=[[11, 2]])
+        await settle()
+        assert ws.requests == [SYMBOL]
+        assert not book.synced
+        # the snapshot already contains the first update
+        ws.snapshot(101, bids=[[9, 1], [8, 1]], asks=[[12, 1]])
+        assert book.synced
+        assert book.ts == 102
+        assert book.best_bid() == (9, 1)
+        assert book.best_ask() == (11, 2)
+
+    run(test)
+
+
+def test_gap_requests_a_new_snapshot():
+    async def test(ws, manager, book):
+        ws.snapshot(100, bids=[[9, 1]], asks=[[11, 1]])
+        ws.update(101, 100, bids=[[9, 2]])
+        assert book.best_bid() == (9, 2)
+        ws.update(103, 102, bids=[[9, 3]])
+        await settle()
+        assert not book.synced
+        assert ws.requests == [SYMBOL]
+        ws.snapshot(102, bids=[[9, 5]], asks=[[11, 1]])
+        assert book.synced
+        assert book.ts == 103
+        assert book.best_bid() == (9, 3)
+
+    run(test)
+
+
+def test_stale_and_duplicate_updates_are_ignored():
+    async def test(ws, manager, book):
+        ws.snapshot(100, bids=[[9, 1]], asks=[[11, 1]])
+        ws.update(100, 99, bids=[[9, 7]])
+        assert book.best_bid() == (9, 1)
+        assert book.synced
+        assert ws.requests == []
+
+    run(test)
+
+
+def test_pending_updates_are_trimmed():
+    async def test(ws, manager, book):
+        manager.max_pending = 3
+        for ts in range(101, 106):
+            ws.update(ts, ts - 1, bids=[[9, ts]])
+        state = manager._states[SYMBOL]
+        assert [ts for _, ts in state.pending] == [103, 104, 105]
+        ws.snapshot(102, bids=[[9, 1]], asks=[[11, 1]])
+        assert book.ts == 105
+        assert book.best_bid() == (9, 105)
+
+    run(test)
+
+
+def test_snapshot_older_than_buffered_updates():
+    async def test(ws, manager, book):
+        ws.update(105, 104, bids=[[9, 5]])
+        ws.update(106, 105, bids=[[9, 6]])
+        await settle()
+        assert ws.requests == [SYMBOL]
+        ws.snapshot(100, bids=[[9, 1]], asks=[[11, 1]])
+        await settle()
+        assert not book.synced
+        assert ws.requests == [SYMBOL, SYMBOL]
+        assert [ts for _, ts in manager._states[SYMBOL].pending] == [105, 106]
+        ws.snapshot(104, bids=[[9, 4]], asks=[[11, 1]])
+        assert book.synced
+        assert book.best_bid() == (9, 6)
+
+    run(test)
+
+
+def test_disconnect_drops_the_book_state():
+    async def test(ws, manager, book):
+        ws.update(101, 100)
+        await settle()
+        ws.emit("disconnected")
+        state = manager._states[SYMBOL]
+        assert not book.synced
+        assert state.pending == []
+        assert not state.requested
+        ws.snapshot(100, bids=[[9, 1]], asks=[[11, 1]])
+        assert book.synced
+        ws.emit("disconnected")
+        assert not book.synced
+
+    run(test)
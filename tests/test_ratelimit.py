@@ -0,0 +1,52 @@
+"""
+Request classification and token buckets
+"""
+
+import asyncio
+
+import pytest
+
+from orderly_sdk.ratelimit import PRIORITY_HIGH, PRIORITY_LOW, RateLimiter, TokenBucket
+
+
+@pytest.mark.parametrize(
+    "method, ep, expected",
+    [
+        ("post", "order", ("private", 1, PRIORITY_HIGH)),
+        ("delete", "order/123", ("private", 1, PRIORITY_HIGH)),
+        ("delete", "orders", ("private", 1, PRIORITY_HIGH)),
+        ("get", "orders", ("private", 1, PRIORITY_LOW)),
+        ("get", "client/orders", ("private", 1, PRIORITY_LOW)),
+        ("delete", "client/batch-order", ("private", 1, PRIORITY_HIGH)),
+        ("get", "public/info", ("public", 1, PRIORITY_LOW)),
+        ("get", "publicity", ("private", 1, PRIORITY_LOW)),
+    ],
+)
+def test_rules_match_whole_segments(method, ep, expected):
+    assert RateLimiter().classify(method, ep) == expected
+
+
+def test_weight_above_capacity_is_rejected():
+    async def main():
+        with pytest.raises(ValueError):
+            await TokenBucket(10, 5).acquire(6)
+
+    asyncio.run(main())
+
+
+def test_high_priority_is_served_first():
+    async def main():
+        bucket = TokenBucket(100, 1)
+        await bucket.acquire()
+        served = []
+
+        async def acquire(name, priority):
+            await bucket.acquire(1, priority)
+            served.append(name)
+
+        await asyncio.gather(
+            acquire("low", PRIORITY_LOW), acquire("high", PRIORITY_HIGH)
+        )
+        assert served == ["high", "low"]
+
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Frame recording, segment indexes and replay
+"""
+
+import asyncio
+import json
+import os
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.recorder import (
+    INDEX_SUFFIX,
+    SEGMENT_SUFFIX,
+    FrameLog,
+    FrameRecorder,
+    Replayer,
+    is_ping,
+)
+from orderly_sdk.ws import OrderlyPublicWsManager
+
+TOPICS = ["PERP_ETH_USDC@trade", "PERP_BTC_USDC@trade"]
+
+
+def frame(i: int) -> bytes:
+    topic = TOPICS[i % 2]
+    message = {"topic": topic, "ts": i, "data": {"symbol": topic[:-6], "price": i}}
+    return json.dumps(message).encode()
+
+
+def record(directory, count: int, **kwargs) -> FrameRecorder:
+    recorder = FrameRecorder(str(directory), **kwargs)
+    for i in range(count):
+        recorder.write(frame(i), 1_000 + i)
+    return recorder
+
+
+def segments(directory):
+    return sorted(p for p in os.listdir(directory) if p.endswith(SEGMENT_SUFFIX))
+
+
+def test_segments_roll_and_index(tmp_path):
+    with record(tmp_path, 100, segment_size=1024, index_interval=4):
+        pass
+    names = segments(tmp_path)
+    assert len(names) > 2
+    assert all(os.path.exists(tmp_path / (n + INDEX_SUFFIX)) for n in names)
+    log = FrameLog(str(tmp_path))
+    assert len(log) == 100
+    assert (log.first_ts, log.last_ts) == (1_000, 1_099)
+    assert log.topics() == {TOPICS[0]: 50, TOPICS[1]: 50}
+    assert [f for _, f in log.frames()] == [frame(i) for i in range(100)]
+    # a new recorder continues after the newest segment
+    with record(tmp_path, 1, segment_size=1024):
+        pass
+    assert segments(tmp_path)[:-1] == names
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    recorder = record(tmp_path, 30, segment_size=1024)
+    recorder.flush()
+    # the open segment has no index yet and a zero filled tail
+    log = FrameLog(str(tmp_path))
+    assert len(log) == 30
+    assert [ts for ts, _ in log.frames()] == list(range(1_000, 1_030))
+    recorder.close()
+    os.remove(tmp_path / (segments(tmp_path)[0] + INDEX_SUFFIX))
+    assert len(FrameLog(str(tmp_path))) == 30
+
+
+def test_frames_seek_and_filter(tmp_path):
+    with record(tmp_path, 100, segment_size=1024, index_interval=4):
+        pass
+    log = FrameLog(str(tmp_path))
+    frames = list(log.frames(1_050, 1_059, topics=[TOPICS[1]]))
+    assert [ts for ts, _ in frames] == list(range(1_051, 1_060, 2))
+
+
+def test_recorded_feed_replays_into_listeners(tmp_path):
+    async def main():
+        async with MockExchange(feed_rate=500) as exchange:
+            ws = OrderlyPublicWsManager(
+                account_id="0xtest",
+                endpoint=exchange.ws_public_endpoint,
+                loop=asyncio.get_running_loop(),
+            )
+            live = []
+            ws.add_listener(TOPICS[0], lambda data, ts: live.append(data))
+            recorder = FrameRecorder(str(tmp_path))
+            recorder.attach(ws)
+            task = asyncio.create_task(ws._connect())
+            while len(live) < 20:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            recorder.close()
+
+        replay_ws = OrderlyPublicWsManager(loop=asyncio.get_running_loop())
+        replayed = []
+        replay_ws.add_listener(TOPICS[0], lambda data, ts: replayed.append(data))
+        log = FrameLog(str(tmp_path))
+        replayer = Replayer(replay_ws, log)
+        pings = sum(is_ping(f) for _, f in log.frames())
+        assert await replayer.run() == len(log) - pings
+        assert replayed[: len(live)] == live
+        # seek to the 10th recorded trade and replay the rest at speed
+        ts = [ts for ts, f in log.frames(topics=[TOPICS[0]])][10]
+        replayed.clear()
+        replayer.seek(ts)
+        await replayer.run(speed=100)
+        assert replayed == live[10 : 10 + len(replayed)]
+        assert len(replayed) >= len(live) - 10
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""
+Connection handling and paging of AsyncClient
+"""
+
+import asyncio
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.rest import AsyncClient
+
+
+def test_force_close_client_reconnects_per_request():
+    async def main():
+        async with MockExchange(feed_rate=0) as exchange:
+            client = AsyncClient(
+                endpoint=exchange.rest_endpoint,
+                force_close=True,
+                loop=asyncio.get_running_loop(),
+            )
+            for _ in range(2):
+                response = await client.get_maintenance_info()
+                assert response["success"], response
+            await client.close_connection()
+
+    asyncio.run(main())
+
+
+def test_stopped_pager_cancels_its_prefetch():
+    async def main():
+        client = AsyncClient(
+            endpoint="http://localhost", loop=asyncio.get_running_loop()
+        )
+        started = []
+
+        async def get_page(ep, signed, params, page):
+            started.append(page)
+            if page > 1:
+                await asyncio.sleep(10)
+            return {"rows": [{"page": page}] * 2, "meta": {"total": 20}}
+
+        client._get_page = get_page
+        rows = client.iter_orders(page_size=2, prefetch=3)
+        assert (await anext(rows)) == {"page": 1}
+        await asyncio.sleep(0)
+        await rows.aclose()
+        assert started == [1, 2, 3, 4]
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        assert not tasks
+        await client.close_connection()
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+LoopRunner and the blocking client wrapper
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.runner import BlockingClient, LoopRunner
+from orderly_sdk.ws import OrderlyPublicWsManager
+
+
+class FakeClient:
+    def __init__(self):
+        self.threads = []
+
+    async def get_order(self, order_id):
+        self.threads.append(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return {"success": True, "data": {"order_id": order_id}}
+
+    async def iter_orders(self, params=None):
+        for i in range(3):
+            yield {"order_id": i}
+
+    def symbol_info(self, symbol):
+        return {"symbol": symbol}
+
+    def fail(self):
+        raise ValueError("boom")
+
+    async def close_connection(self):
+        pass
+
+
+@pytest.fixture
+def runner():
+    runner = LoopRunner(use_uvloop=False, name="test-loop")
+    yield runner
+    runner.stop()
+
+
+def test_blocking_calls_run_on_the_loop(runner):
+    client = BlockingClient(runner, FakeClient())
+    assert client.get_order(1)["data"] == {"order_id": 1}
+    assert client.client.threads == ["test-loop"]
+    assert [row["order_id"] for row in client.iter_orders()] == [0, 1, 2]
+    assert client.symbol_info("PERP_ETH_USDC") == {"symbol": "PERP_ETH_USDC"}
+
+
+def test_futures_wrap_every_kind_of_method(runner):
+    client = BlockingClient(runner, FakeClient())
+    assert client.futures.get_order(2).result(5)["data"] == {"order_id": 2}
+    assert len(client.futures.iter_orders().result(5)) == 3
+    future = client.futures.symbol_info("PERP_ETH_USDC")
+    assert future.done()
+    assert future.result() == {"symbol": "PERP_ETH_USDC"}
+    with pytest.raises(ValueError):
+        client.futures.fail().result()
+
+
+def test_run_from_the_loop_thread_is_refused(runner):
+    async def nested():
+        coro = asyncio.sleep(0)
+        try:
+            runner.run(coro)
+        finally:
+            coro.close()
+
+    with pytest.raises(RuntimeError):
+        runner.run(nested(), 5)
+
+
+def test_threads_share_a_client_and_a_bridged_feed(runner):
+    exchange = MockExchange(feed_rate=200)
+    runner.run(exchange.start(), 5)
+    try:
+        client = runner.client(endpoint=exchange.rest_endpoint)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(
+                pool.map(
+                    lambda _: client.get_market_trades("PERP_ETH_USDC", 5), range(8)
+                )
+            )
+        assert all(r["success"] and len(r["data"]["rows"]) == 5 for r in results)
+        future = client.futures.get_market_trades("PERP_BTC_USDC", 2)
+        assert future.result(5)["data"]["rows"][0]["symbol"] == "PERP_BTC_USDC"
+        ws = runner.create(OrderlyPublicWsManager, endpoint=exchange.ws_public_endpoint)
+        buffer = runner.bridge(ws, "PERP_ETH_USDC@trade", capacity=100)
+        ws.start()
+        assert buffer.get(timeout=5)["symbol"] == "PERP_ETH_USDC"
+        client.close()
+    finally:
+        runner.run(exchange.stop(), 5)
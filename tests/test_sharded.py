@@ -0,0 +1,94 @@
+"""
+Topic assignment, rebalancing and shutdown of ShardedPublicWsManager
+"""
+
+import asyncio
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.sharded import ShardedPublicWsManager
+
+SYMBOLS = ["PERP_ETH_USDC", "PERP_BTC_USDC", "PERP_SOL_USDC", "PERP_NEAR_USDC"]
+
+
+def make_manager(**kwargs) -> ShardedPublicWsManager:
+    return ShardedPublicWsManager(loop=asyncio.get_running_loop(), **kwargs)
+
+
+def shard_index(manager, topic):
+    return manager.shards.index(manager.shard_for(topic))
+
+
+def test_topics_of_a_symbol_share_a_shard():
+    async def main():
+        manager = make_manager(shards=3)
+        for symbol in SYMBOLS:
+            manager.subscribe(symbol + "@trade")
+            manager.subscribe(symbol + "@bbo")
+        for symbol in SYMBOLS:
+            index = shard_index(manager, symbol + "@trade")
+            assert shard_index(manager, symbol + "@bbo") == index
+            assert symbol + "@bbo" in manager.shards[index].listeners
+        # a fresh manager hashes the symbols onto the same shards
+        other = make_manager(shards=3)
+        for symbol in SYMBOLS:
+            topic = symbol + "@trade"
+            assert shard_index(other, topic) == shard_index(manager, topic)
+
+    asyncio.run(main())
+
+
+def test_weight_policy_rebalances_after_unsubscribe():
+    async def main():
+        manager = make_manager(shards=2, policy="weight")
+        for symbol in SYMBOLS:
+            manager.subscribe(symbol + "@trade")
+        assert manager.loads() == [4, 4]
+        on_first = [s for s in SYMBOLS if manager.assignments[s] == 0]
+        for symbol in on_first:
+            await manager.unsubscribe(symbol + "@trade")
+        # the remaining two symbols are spread again
+        assert manager.loads() == [2, 2]
+        assert sorted(manager.assignments.values()) == [0, 1]
+        for index, shard in enumerate(manager.shards):
+            topics = [t for t in shard.listeners]
+            assert [manager.assignments[t.partition("@")[0]] for t in topics] == [
+                index
+            ] * len(topics)
+
+    asyncio.run(main())
+
+
+def test_unsubscribe_forgets_the_topic_on_its_shard():
+    async def main():
+        manager = make_manager(shards=2)
+        topic = SYMBOLS[0] + "@trade"
+        manager.subscribe(topic)
+        shard = manager.shard_for(topic)
+        assert topic in shard._topics()
+        await manager.unsubscribe(topic)
+        assert topic not in shard.listeners
+        assert topic not in shard._topics()
+        assert SYMBOLS[0] not in manager.assignments
+
+    asyncio.run(main())
+
+
+def test_threaded_shards_receive_and_stop():
+    async def main():
+        async with MockExchange(feed_rate=200) as exchange:
+            manager = make_manager(
+                shards=2, threaded=True, endpoint=exchange.ws_public_endpoint
+            )
+            for symbol in SYMBOLS[:2]:
+                manager.subscribe(symbol + "@trade")
+            manager.start()
+            messages = await asyncio.gather(
+                *(manager.recv(symbol + "@trade", 5) for symbol in SYMBOLS[:2])
+            )
+            assert [m["symbol"] for m in messages] == SYMBOLS[:2]
+            await asyncio.to_thread(manager.stop)
+            for shard, thread in zip(manager.shards, manager._threads):
+                assert not thread.is_alive()
+                assert shard.loop.is_closed()
+
+    asyncio.run(main())
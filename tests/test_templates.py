@@ -0,0 +1,49 @@
+"""
+Pre-serialized order bodies
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from orderly_sdk.templates import OrderTemplate
+
+FIELDS = {"symbol": "PERP_ETH_USDC", "order_type": "LIMIT", "side": "BUY"}
+
+
+@pytest.mark.parametrize("encoder", ["json", None])
+def test_render_matches_the_full_body(encoder):
+    template = OrderTemplate(FIELDS, encoder=encoder)
+    body = template.render(2000.5, Decimal("0.010"), 'c"1')
+    assert json.loads(body) == {
+        **FIELDS,
+        "order_price": 2000.5,
+        "order_quantity": 0.01,
+        "client_order_id": 'c"1',
+    }
+    assert b'"order_quantity":0.010' in body
+
+
+def test_omitted_and_custom_fields():
+    template = OrderTemplate({}, price_key="trigger_price")
+    assert template.render() == b"{}"
+    assert json.loads(template.render("12.5")) == {"trigger_price": 12.5}
+    assert json.loads(template.render(quantity=3)) == {"order_quantity": 3}
+
+
+@pytest.mark.parametrize(
+    "value, error",
+    [
+        ("1,5", ValueError),
+        ('1,"x":2', ValueError),
+        ("01", ValueError),
+        (float("nan"), ValueError),
+        (Decimal("Infinity"), ValueError),
+        (True, TypeError),
+        ([1], TypeError),
+    ],
+)
+def test_invalid_numbers_are_rejected(value, error):
+    with pytest.raises(error):
+        OrderTemplate(FIELDS).render(value, 1)
@@ -0,0 +1,143 @@
+"""
+Listener bookkeeping and dispatch of the websocket managers
+"""
+
+import asyncio
+import json
+import time
+
+from orderly_sdk.mockserver import MockExchange
+from orderly_sdk.ws import OrderlyPublicWsManager
+
+TOPIC = "PERP_ETH_USDC@trade"
+
+
+def make_ws() -> OrderlyPublicWsManager:
+    return OrderlyPublicWsManager(account_id="0xtest", loop=asyncio.get_running_loop())
+
+
+def test_failing_listener_does_not_stop_dispatch():
+    async def main():
+        ws = make_ws()
+        seen = []
+
+        def failing(data, ts):
+            raise ValueError("boom")
+
+        ws.add_listener(TOPIC, failing, subscribe=False)
+        ws.add_listener(TOPIC, lambda data, ts: seen.append(ts), subscribe=False)
+        await ws._deliver(TOPIC, {"price": 1}, 100)
+        await ws._deliver(TOPIC, {"price": 2}, 101)
+        assert seen == [100, 101]
+
+    asyncio.run(main())
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def test_new_topics_are_subscribed_while_connected():
+    async def main():
+        ws = make_ws()
+        ws.websocket = socket = FakeSocket()
+        ws._connected = True
+        ws.add_listener(TOPIC, lambda data, ts: None)
+        ws.add_listener(TOPIC, lambda data, ts: None)
+        ws.on("PERP_BTC_USDC@trade", lambda topic, data: None)
+        ws.on("*@ticker", lambda topic, data: None)
+        ws.add_listener("PERP_SOL_USDC@trade", lambda data, ts: None, subscribe=False)
+        await asyncio.sleep(0)
+        assert [m["topic"] for m in socket.sent if m["event"] == "subscribe"] == [
+            TOPIC,
+            "PERP_BTC_USDC@trade",
+        ]
+
+    asyncio.run(main())
+
+
+async def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_streams_share_messages_and_unsubscribe_last():
+    async def main():
+        async with MockExchange(feed_rate=500) as exchange:
+            ws = OrderlyPublicWsManager(
+                account_id="0xtest",
+                endpoint=exchange.ws_public_endpoint,
+                loop=asyncio.get_running_loop(),
+            )
+            task = asyncio.create_task(ws._connect())
+            await wait_for(lambda: ws._connected)
+            async with ws.stream(TOPIC) as first, ws.stream(TOPIC, maxsize=5) as second:
+                message = await first.recv(5)
+                assert await second.recv(5) is message
+                assert message["symbol"] == "PERP_ETH_USDC"
+            assert TOPIC not in ws._topics()
+            assert TOPIC in ws._unsubscribed
+            task.cancel()
+
+    asyncio.run(main())
+
+
+def test_stream_keeps_a_listener_topic_subscribed():
+    async def main():
+        ws = make_ws()
+        ws.websocket = socket = FakeSocket()
+        ws._connected = True
+        ws.add_listener(TOPIC, lambda data, ts: None)
+        await asyncio.sleep(0)
+        async with ws.stream(TOPIC):
+            await ws.unsubscribe(TOPIC)
+            assert [m["event"] for m in socket.sent] == ["subscribe"]
+        assert [m["event"] for m in socket.sent] == ["subscribe", "unsubscribe"]
+        await ws._deliver(TOPIC, {"price": 1}, 1)
+        assert TOPIC not in ws.queues
+        # a subscribe still pending when the topic is dropped is skipped
+        ws.add_listener(TOPIC, lambda data, ts: None)
+        await ws.unsubscribe(TOPIC)
+        await asyncio.sleep(0)
+        assert [m["event"] for m in socket.sent][2:] == ["unsubscribe"]
+
+    asyncio.run(main())
+
+
+def test_handlers_match_patterns_and_run_pooled():
+    async def main():
+        ws = make_ws()
+        seen = []
+        done = asyncio.Event()
+
+        async def slow(topic, data):
+            await asyncio.sleep(0)
+            seen.append(("pooled", topic))
+            done.set()
+
+        def every(topic, data):
+            seen.append(("glob", topic))
+
+        ws.on("*@trade", every)
+        ws.on(TOPIC, slow, pooled=True)
+        # patterns are not subscribed, exact topics are
+        assert ws._topics() == [TOPIC]
+        await ws._deliver(TOPIC, {"price": 1}, 1)
+        await ws._deliver("PERP_BTC_USDC@bbo", {"bid": 1}, 2)
+        await asyncio.wait_for(done.wait(), 5)
+        assert seen == [("glob", TOPIC), ("pooled", TOPIC)]
+        ws.off("*@trade", every)
+        ws.off(TOPIC, slow)
+        assert TOPIC not in ws._topics()
+        await ws._deliver(TOPIC, {"price": 2}, 3)
+        assert len(seen) == 2
+        for task in ws._handler_tasks:
+            task.cancel()
+
+    asyncio.run(main())